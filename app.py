@@ -17,13 +17,14 @@ import pandas as pd
 current_dir = Path(__file__).parent
 sys.path.append(str(current_dir))
 
-from config import APP_TITLE, APP_ICON, PAGE_ICON, CUSTOM_COLORS
-from database.supabase_manager import SupabaseManager
+from config import APP_TITLE, APP_ICON, PAGE_ICON, CUSTOM_COLORS, USE_SUPABASE, DATABASE_PATH
+from database.supabase_manager import get_supabase_manager, reset_supabase_manager
 from components.crud_table import CRUDTable
 from components.crud_form import CRUDForm
-from components.auth_manager import AuthManager
+from components.auth_manager import get_auth_manager
 from components.login_form import render_auth_guard, check_permissions
 from components.gruppi_pamm_manager import render_gruppi_pamm_manager_page
+from utils.backup_manager import BackupManager
 
 # Configurazione pagina
 st.set_page_config(
@@ -97,14 +98,19 @@ def render_dashboard():
     """Renderizza la dashboard principale"""
     
     # Inizializza il Supabase manager
-    supabase_manager = SupabaseManager()
+    supabase_manager = get_supabase_manager()
     
     if not supabase_manager.is_configured:
         st.error("❌ Supabase non configurato. Controlla le variabili d'ambiente.")
         return
     
-    # Ottieni statistiche
-    stats = supabase_manager.get_statistiche_generali()
+    # Statistiche e dati dei grafici in parallelo
+    data = supabase_manager.fetch_many(
+        stats=supabase_manager.get_statistiche_generali,
+        brokers=lambda: supabase_manager.get_brokers(columns=['regolamentazione']),
+        props=lambda: supabase_manager.get_props(columns=['nome_prop', 'profit_target'])
+    )
+    stats = data['stats'] or {}
     
     # Header della dashboard
     st.markdown("## 📊 Dashboard Principale")
@@ -158,7 +164,7 @@ def render_dashboard():
     
     with col1:
         st.markdown("### 📈 Distribuzione Broker per Regolamentazione")
-        brokers = supabase_manager.get_brokers()
+        brokers = data['brokers']
         if brokers:
             df_brokers = pd.DataFrame(brokers)
             if 'regolamentazione' in df_brokers.columns:
@@ -176,7 +182,7 @@ def render_dashboard():
     
     with col2:
         st.markdown("### 📊 Performance Prop Firm")
-        props = supabase_manager.get_props()
+        props = data['props']
         if props:
             df_props = pd.DataFrame(props)
             if 'profit_target' in df_props.columns:
@@ -197,13 +203,19 @@ def render_brokers_page():
     st.markdown("## 🏢 Gestione Broker")
     st.markdown("Gestisci i broker e le loro informazioni")
     
-    supabase_manager = SupabaseManager()
+    supabase_manager = get_supabase_manager()
+    
+    # Colonne caricate per le liste (proiezione della select)
+    list_columns = ['nome_broker', 'tipo_broker', 'regolamentazione', 'paese', 'stato', 'data_creazione']
     
     # Tab per organizzare le funzionalità
     tab_lista, tab_aggiungi, tab_modifica = st.tabs(["📋 Lista Broker", "➕ Aggiungi Broker", "✏️ Modifica/Elimina"])
     
     with tab_lista:
-        brokers = supabase_manager.get_brokers()
+        brokers = CRUDTable("Broker").load_page(
+            lambda after, size: supabase_manager.get_brokers_page(after, size, columns=list_columns),
+            key_prefix="broker_list"
+        )
         if brokers:
             df_brokers = pd.DataFrame(brokers)
             st.dataframe(df_brokers, width='stretch')
@@ -213,7 +225,7 @@ def render_brokers_page():
     with tab_modifica:
         st.markdown("### ✏️ Modifica o Elimina Broker")
         
-        brokers = supabase_manager.get_brokers()
+        brokers = supabase_manager.get_brokers(columns=list_columns)
         if brokers:
             # Configurazione colonne per la tabella
             columns_config = {
@@ -223,7 +235,7 @@ def render_brokers_page():
                 "regolamentazione": st.column_config.TextColumn("Regolamentazione", width=120),
                 "paese": st.column_config.TextColumn("Paese", width=100),
                 "stato": st.column_config.TextColumn("Stato", width=100),
-                "created_at": st.column_config.TextColumn("Creato", width=120)
+                "data_creazione": st.column_config.TextColumn("Creato", width=120)
             }
             
             # Usa il componente CRUD Table
@@ -293,13 +305,19 @@ def render_props_page():
     st.markdown("## 🏛️ Gestione Prop Firm")
     st.markdown("Gestisci le prop firm e le loro configurazioni")
     
-    supabase_manager = SupabaseManager()
+    supabase_manager = get_supabase_manager()
+    
+    # Colonne caricate per le liste (proiezione della select)
+    list_columns = ['nome_prop', 'tipo_prop', 'capitale_iniziale', 'profit_target', 'stato', 'data_creazione']
     
     # Tab per organizzare le funzionalità
     tab_lista, tab_aggiungi, tab_modifica = st.tabs(["📋 Lista Prop Firm", "➕ Aggiungi Prop Firm", "✏️ Modifica/Elimina"])
     
     with tab_lista:
-        props = supabase_manager.get_props()
+        props = CRUDTable("Prop Firm").load_page(
+            lambda after, size: supabase_manager.get_props_page(after, size, columns=list_columns),
+            key_prefix="prop_list"
+        )
         if props:
             df_props = pd.DataFrame(props)
             st.dataframe(df_props, width='stretch')
@@ -309,7 +327,7 @@ def render_props_page():
     with tab_modifica:
         st.markdown("### ✏️ Modifica o Elimina Prop Firm")
         
-        props = supabase_manager.get_props()
+        props = supabase_manager.get_props(columns=list_columns)
         if props:
             # Configurazione colonne per la tabella
             columns_config = {
@@ -319,7 +337,7 @@ def render_props_page():
                 "capitale_iniziale": st.column_config.TextColumn("Capitale Iniziale", width=120),
                 "profit_target": st.column_config.TextColumn("Profit Target", width=120),
                 "stato": st.column_config.TextColumn("Stato", width=100),
-                "created_at": st.column_config.TextColumn("Creato", width=120)
+                "data_creazione": st.column_config.TextColumn("Creato", width=120)
             }
             
             # Usa il componente CRUD Table
@@ -389,13 +407,19 @@ def render_wallets_page():
     st.markdown("## 💰 Gestione Wallet")
     st.markdown("Gestisci i wallet e le loro informazioni")
     
-    supabase_manager = SupabaseManager()
+    supabase_manager = get_supabase_manager()
+    
+    # Colonne caricate per le liste (proiezione della select)
+    list_columns = ['nome_wallet', 'tipo_wallet', 'indirizzo_wallet', 'saldo_attuale', 'valuta', 'stato', 'data_creazione']
     
     # Tab per organizzare le funzionalità
     tab_lista, tab_aggiungi, tab_modifica = st.tabs(["📋 Lista Wallet", "➕ Aggiungi Wallet", "✏️ Modifica/Elimina"])
     
     with tab_lista:
-        wallets = supabase_manager.get_wallets()
+        wallets = CRUDTable("Wallet").load_page(
+            lambda after, size: supabase_manager.get_wallets_page(after, size, columns=list_columns),
+            key_prefix="wallet_list"
+        )
         if wallets:
             df_wallets = pd.DataFrame(wallets)
             # Nascondi informazioni sensibili
@@ -408,7 +432,7 @@ def render_wallets_page():
     with tab_modifica:
         st.markdown("### ✏️ Modifica o Elimina Wallet")
         
-        wallets = supabase_manager.get_wallets()
+        wallets = supabase_manager.get_wallets(columns=list_columns)
         if wallets:
             # Configurazione colonne per la tabella
             columns_config = {
@@ -419,7 +443,7 @@ def render_wallets_page():
                 "saldo_attuale": st.column_config.TextColumn("Saldo", width=120),
                 "valuta": st.column_config.TextColumn("Valuta", width=80),
                 "stato": st.column_config.TextColumn("Stato", width=100),
-                "created_at": st.column_config.TextColumn("Creato", width=120)
+                "data_creazione": st.column_config.TextColumn("Creato", width=120)
             }
             
             # Usa il componente CRUD Table
@@ -487,13 +511,19 @@ def render_pack_copiatori_page():
     st.markdown("## 📦 Gestione Pack Copiatori")
     st.markdown("Gestisci i pack copiatori e le loro configurazioni")
     
-    supabase_manager = SupabaseManager()
+    supabase_manager = get_supabase_manager()
+    
+    # Colonne caricate per le liste (proiezione della select)
+    list_columns = ['numero_pack', 'account_number', 'server_broker', 'tipo_account', 'saldo_attuale', 'stato', 'data_creazione']
     
     # Tab per organizzare le funzionalità
     tab_lista, tab_aggiungi, tab_modifica = st.tabs(["📋 Lista Pack Copiatori", "➕ Aggiungi Pack Copiatore", "✏️ Modifica/Elimina"])
     
     with tab_lista:
-        packs = supabase_manager.get_pack_copiatori()
+        packs = CRUDTable("Pack Copiatori").load_page(
+            lambda after, size: supabase_manager.get_pack_copiatori_page(after, size, columns=list_columns),
+            key_prefix="pack_list"
+        )
         if packs:
             df_packs = pd.DataFrame(packs)
             st.dataframe(df_packs, width='stretch')
@@ -503,7 +533,7 @@ def render_pack_copiatori_page():
     with tab_modifica:
         st.markdown("### ✏️ Modifica o Elimina Pack Copiatore")
         
-        packs = supabase_manager.get_pack_copiatori()
+        packs = supabase_manager.get_pack_copiatori(columns=list_columns)
         if packs:
             # Configurazione colonne per la tabella
             columns_config = {
@@ -514,7 +544,7 @@ def render_pack_copiatori_page():
                 "tipo_account": st.column_config.TextColumn("Tipo Account", width=120),
                 "saldo_attuale": st.column_config.TextColumn("Saldo", width=120),
                 "stato": st.column_config.TextColumn("Stato", width=100),
-                "created_at": st.column_config.TextColumn("Creato", width=120)
+                "data_creazione": st.column_config.TextColumn("Creato", width=120)
             }
             
             # Usa il componente CRUD Table
@@ -533,7 +563,7 @@ def render_pack_copiatori_page():
         st.markdown("### ➕ Aggiungi Nuovo Pack Copiatore")
         
         # Ottieni lista broker per il select
-        brokers = supabase_manager.get_brokers()
+        brokers = supabase_manager.get_brokers(columns=['nome_broker'])
         broker_options = {f"{b['nome_broker']} (ID: {b['id']})": b['id'] for b in brokers}
         
         with st.form("pack_form"):
@@ -590,13 +620,21 @@ def render_gruppi_pamm_page():
     st.markdown("## 👥 Gestione Gruppi PAMM")
     st.markdown("Gestisci i gruppi PAMM e le loro performance")
     
-    supabase_manager = SupabaseManager()
+    supabase_manager = get_supabase_manager()
+    
+    # Colonne caricate per le liste (proiezione della select)
+    list_columns = ['nome_gruppo', 'manager', 'account_pamm', 'capitale_totale', 'stato', 'nome_cliente', 'importo_cliente']
+    # Colonne della tabella di modifica e dei form di modifica/eliminazione (l'id è sempre incluso)
+    edit_columns = ['nome_gruppo', 'manager', 'broker_id', 'account_pamm', 'capitale_totale', 'stato', 'data_creazione']
     
     # Tab per organizzare le funzionalità
     tab_lista, tab_aggiungi, tab_modifica = st.tabs(["📋 Lista Gruppi PAMM", "➕ Aggiungi Gruppo PAMM", "✏️ Modifica/Elimina"])
     
     with tab_lista:
-        gruppi = supabase_manager.get_gruppi_pamm()
+        gruppi = CRUDTable("Gruppi PAMM").load_page(
+            lambda after, size: supabase_manager.get_clienti_gruppi_page(after, size, columns=list_columns),
+            key_prefix="gruppi_list"
+        )
         if gruppi:
             df_gruppi = pd.DataFrame(gruppi)
             st.dataframe(df_gruppi, width='stretch')
@@ -606,7 +644,7 @@ def render_gruppi_pamm_page():
     with tab_modifica:
         st.markdown("### ✏️ Modifica o Elimina Gruppo PAMM")
         
-        gruppi = supabase_manager.get_gruppi_pamm()
+        gruppi = supabase_manager.get_gruppi_pamm(columns=edit_columns)
         if gruppi:
             # Configurazione colonne per la tabella
             columns_config = {
@@ -617,7 +655,7 @@ def render_gruppi_pamm_page():
                 "capitale_totale": st.column_config.TextColumn("Capitale Totale", width=120),
                 "performance_totale": st.column_config.TextColumn("Performance", width=120),
                 "stato": st.column_config.TextColumn("Stato", width=100),
-                "created_at": st.column_config.TextColumn("Creato", width=120)
+                "data_creazione": st.column_config.TextColumn("Creato", width=120)
             }
             
             # Usa il componente CRUD Table
@@ -636,7 +674,7 @@ def render_gruppi_pamm_page():
         st.markdown("### ➕ Aggiungi Nuovo Gruppo PAMM")
         
         # Ottieni lista broker per il select
-        brokers = supabase_manager.get_brokers()
+        brokers = supabase_manager.get_brokers(columns=['nome_broker'])
         broker_options = {f"{b['nome_broker']} (ID: {b['id']})": b['id'] for b in brokers}
         
         with st.form("gruppo_form"):
@@ -699,13 +737,19 @@ def render_incroci_page():
     st.markdown("## 🔄 Gestione Incroci")
     st.markdown("Gestisci gli incroci tra broker, prop firm, wallet e gruppi PAMM")
     
-    supabase_manager = SupabaseManager()
+    supabase_manager = get_supabase_manager()
+    
+    # Colonne caricate per le liste (proiezione della select)
+    list_columns = ['nome_incrocio', 'tipo_incrocio', 'performance_totale', 'rischio_totale', 'stato', 'data_creazione']
     
     # Tab per organizzare le funzionalità
     tab_lista, tab_aggiungi, tab_modifica = st.tabs(["📋 Lista Incroci", "➕ Aggiungi Incrocio", "✏️ Modifica/Elimina"])
     
     with tab_lista:
-        incroci = supabase_manager.get_incroci()
+        incroci = CRUDTable("Incroci").load_page(
+            lambda after, size: supabase_manager.get_incroci_page(after, size, columns=list_columns),
+            key_prefix="incroci_list"
+        )
         if incroci:
             df_incroci = pd.DataFrame(incroci)
             st.dataframe(df_incroci, width='stretch')
@@ -715,7 +759,7 @@ def render_incroci_page():
     with tab_modifica:
         st.markdown("### ✏️ Modifica o Elimina Incrocio")
         
-        incroci = supabase_manager.get_incroci()
+        incroci = supabase_manager.get_incroci(columns=list_columns)
         if incroci:
             # Configurazione colonne per la tabella
             columns_config = {
@@ -725,7 +769,7 @@ def render_incroci_page():
                 "performance_totale": st.column_config.TextColumn("Performance", width=120),
                 "rischio_totale": st.column_config.TextColumn("Rischio", width=120),
                 "stato": st.column_config.TextColumn("Stato", width=100),
-                "created_at": st.column_config.TextColumn("Creato", width=120)
+                "data_creazione": st.column_config.TextColumn("Creato", width=120)
             }
             
             # Usa il componente CRUD Table
@@ -744,11 +788,18 @@ def render_incroci_page():
         st.markdown("### ➕ Aggiungi Nuovo Incrocio")
         
         # Ottieni liste per i select
-        brokers = supabase_manager.get_brokers()
-        props = supabase_manager.get_props()
-        wallets = supabase_manager.get_wallets()
-        gruppi = supabase_manager.get_gruppi_pamm()
-        packs = supabase_manager.get_pack_copiatori()
+        options_data = supabase_manager.fetch_many(
+            brokers=lambda: supabase_manager.get_brokers(columns=['nome_broker']),
+            props=lambda: supabase_manager.get_props(columns=['nome_prop']),
+            wallets=lambda: supabase_manager.get_wallets(columns=['nome_wallet']),
+            gruppi=lambda: supabase_manager.get_gruppi_pamm(columns=['nome_gruppo']),
+            packs=lambda: supabase_manager.get_pack_copiatori(columns=['numero_pack'])
+        )
+        brokers = options_data['brokers'] or []
+        props = options_data['props'] or []
+        wallets = options_data['wallets'] or []
+        gruppi = options_data['gruppi'] or []
+        packs = options_data['packs'] or []
         
         broker_options = {f"{b['nome_broker']} (ID: {b['id']})": b['id'] for b in brokers}
         prop_options = {f"{p['nome_prop']} (ID: {p['id']})": p['id'] for p in props}
@@ -819,7 +870,7 @@ def render_users_page():
         st.markdown("#### 📋 Lista Utenti")
         
         # Ottieni tutti gli utenti
-        supabase_manager = SupabaseManager()
+        supabase_manager = get_supabase_manager()
         users = supabase_manager.get_all_users()
         
         if users:
@@ -884,7 +935,7 @@ def render_users_page():
             if st.form_submit_button("➕ Crea Utente", type="primary"):
                 if username and email and password:
                     # Hash della password
-                    auth_manager = AuthManager()
+                    auth_manager = get_auth_manager()
                     
                     user_data = {
                         'username': username,
@@ -957,13 +1008,80 @@ def render_users_page():
         else:
             st.warning("Nessun utente disponibile per la modifica")
 
+def render_backup_tab():
+    """Backup compressi delle tabelle: creazione, ripristino e retention (solo amministratori)"""
+    st.subheader("💾 Backup Database")
+    
+    if not get_auth_manager().has_permission('all'):
+        st.warning("⚠️ Solo gli amministratori possono gestire i backup")
+        return
+    
+    supabase_manager = get_supabase_manager()
+    if not supabase_manager.is_configured:
+        st.error("❌ Database non configurato")
+        return
+    
+    backup_manager = BackupManager(supabase_manager)
+    st.info(f"📁 **CARTELLA BACKUP**: {backup_manager.backups_dir} • Retention: {backup_manager.retention_days} giorni")
+    
+    col_full, col_incr, col_prune = st.columns(3)
+    with col_full:
+        if st.button("💾 Backup Completo", type="primary", width='stretch'):
+            with st.spinner("Backup completo in corso..."):
+                success, message = backup_manager.create_full_backup()
+            if success:
+                backup_manager.prune_backups()
+                st.success(message)
+            else:
+                st.error(message)
+    with col_incr:
+        if st.button("➕ Backup Incrementale", width='stretch'):
+            with st.spinner("Backup incrementale in corso..."):
+                success, message = backup_manager.create_incremental_backup()
+            if success:
+                backup_manager.prune_backups()
+                st.success(message)
+            else:
+                st.error(message)
+    with col_prune:
+        if st.button("🧹 Applica Retention", width='stretch'):
+            removed, _ = backup_manager.prune_backups()
+            st.success(f"✅ {removed} backup eliminati")
+    
+    backups = backup_manager.list_backups()
+    if not backups:
+        st.info("ℹ️ Nessun backup disponibile")
+        return
+    
+    st.markdown("---")
+    st.dataframe(pd.DataFrame([{
+        'ID': backup['id'],
+        'Tipo': 'Completo' if backup['type'] == 'full' else 'Incrementale',
+        'Creato': backup['created_at'][:19].replace('T', ' '),
+        'Righe': backup['rows'],
+        'Dimensione': f"{sum(info['bytes'] for info in backup['tables'].values()) / 1024:.1f} KB",
+        'Tabelle non salvate': ', '.join(backup['errors']) or '-'
+    } for backup in reversed(backups)]), width='stretch', hide_index=True)
+    
+    st.subheader("♻️ Ripristino")
+    backup_id = st.selectbox("Backup da ripristinare", [backup['id'] for backup in reversed(backups)])
+    st.warning("⚠️ Il ripristino reinserisce le righe del backup e riapplica le eliminazioni; le righe create dopo il backup restano")
+    confirm = st.checkbox("Confermo il ripristino", key="confirm_restore_backup")
+    if st.button("♻️ Ripristina Backup", disabled=not confirm):
+        with st.spinner("Ripristino in corso..."):
+            success, message = backup_manager.restore_backup(backup_id)
+        if success:
+            st.success(message)
+        else:
+            st.error(message)
+
 def render_settings_page():
     """Renderizza la pagina delle impostazioni"""
     st.markdown("## ⚙️ Impostazioni Sistema")
     st.info("🚀 **CONFIGURAZIONE SUPABASE**: Gestisci sistema remoto, sicurezza e configurazione")
     
     # Tab per organizzare le impostazioni
-    tab_supabase, tab_system = st.tabs(["🚀 Supabase", "ℹ️ Sistema"])
+    tab_supabase, tab_backup, tab_system = st.tabs(["🚀 Supabase", "💾 Backup", "ℹ️ Sistema"])
     
     # TAB 1: Supabase
     with tab_supabase:
@@ -971,10 +1089,14 @@ def render_settings_page():
         st.info("📊 **DATABASE REMOTO**: Tutti i dati sono sincronizzati automaticamente con Supabase")
         
         # Stato Supabase
-        supabase_manager = SupabaseManager()
+        supabase_manager = get_supabase_manager()
         
-        if supabase_manager.is_configured:
+        if supabase_manager.is_configured and not USE_SUPABASE:
+            st.success(f"✅ **SQLITE LOCALE ATTIVO** - {DATABASE_PATH}")
+        elif supabase_manager.is_configured:
             st.success("✅ **SUPABASE ATTIVO** - Configurazione corretta")
+        
+        if supabase_manager.is_configured:
             
             # Statistiche Supabase
             stats = supabase_manager.get_statistiche_generali()
@@ -1004,10 +1126,122 @@ def render_settings_page():
                     st.success(f"✅ **{message}**")
                 else:
                     st.error(f"❌ **{message}**")
+            
+            if st.button("🔄 Riconnetti Supabase"):
+                reset_supabase_manager()
+                st.rerun()
+            
+            # Metriche del data layer (solo amministratori)
+            if get_auth_manager().has_permission('all'):
+                st.markdown("---")
+                st.subheader("📈 Metriche Query")
+                query_metrics = supabase_manager.get_query_metrics()
+                
+                if query_metrics:
+                    col_met1, col_met2, col_met3, col_met4 = st.columns(4)
+                    with col_met1:
+                        st.metric("🔢 Query", sum(row['queries'] for row in query_metrics))
+                    with col_met2:
+                        st.metric("❌ Errori", sum(row['errors'] for row in query_metrics))
+                    with col_met3:
+                        st.metric("⏱️ Tempo Totale", f"{sum(row['total_ms'] for row in query_metrics) / 1000:.2f} s")
+                    with col_met4:
+                        st.metric("📦 Dati Ricevuti", f"{sum(row['bytes'] for row in query_metrics) / 1024:.1f} KB")
+                    
+                    st.dataframe(pd.DataFrame(query_metrics), width='stretch', hide_index=True)
+                else:
+                    st.info("ℹ️ Nessuna query registrata dall'avvio")
+                
+                col_exp1, col_exp2 = st.columns(2)
+                with col_exp1:
+                    st.download_button(
+                        "📥 Esporta Metriche JSON",
+                        data=supabase_manager.export_query_metrics(),
+                        file_name=f"metriche_query_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
+                        mime="application/json"
+                    )
+                with col_exp2:
+                    if st.button("🧹 Azzera Metriche"):
+                        supabase_manager.reset_query_metrics()
+                        st.rerun()
+                
+                # Pool bcrypt e limite tentativi di login
+                st.subheader("🔐 Autenticazione")
+                password_stats = get_auth_manager().get_password_stats()
+                col_auth1, col_auth2, col_auth3, col_auth4 = st.columns(4)
+                with col_auth1:
+                    st.metric("⏳ Coda Password", password_stats['pool']['queue_depth'],
+                              help=f"Massimo osservato: {password_stats['pool']['max_queue_depth']}")
+                with col_auth2:
+                    st.metric("⏱️ Attesa Media", f"{password_stats['pool']['avg_wait_ms']:.0f} ms")
+                with col_auth3:
+                    st.metric("🔑 Verifiche", password_stats['pool']['completed'],
+                              help=f"Rifiutate: {password_stats['pool']['rejected']} per coda piena, "
+                                   f"{password_stats['pool']['timeouts']} per timeout")
+                with col_auth4:
+                    st.metric("🔒 Utenti Bloccati", password_stats['limiter']['locked_users'])
+            
+            # Cache delle query
+            st.markdown("---")
+            st.subheader("🗄️ Cache Query")
+            cache_stats = supabase_manager.get_cache_stats()
+            
+            col_cache1, col_cache2, col_cache3, col_cache4 = st.columns(4)
+            with col_cache1:
+                st.metric("✅ Hit", cache_stats['hits'])
+            with col_cache2:
+                st.metric("❌ Miss", cache_stats['misses'])
+            with col_cache3:
+                st.metric("♻️ Evictions", cache_stats['evictions'])
+            with col_cache4:
+                st.metric("📈 Hit Rate", f"{cache_stats['hit_rate']}%")
+            
+            st.caption(
+                f"Voci: {cache_stats['entries']}/{cache_stats['max_entries']} • "
+                f"TTL: {cache_stats['ttl_seconds']}s • Scadute: {cache_stats['expired']} • "
+                f"Invalidate: {cache_stats['invalidations']}"
+            )
+            st.caption(
+                f"Richieste al database: {cache_stats['backend_calls']} • "
+                f"Letture accorpate: {cache_stats['collapsed']} • In corso: {cache_stats['in_flight']}"
+            )
+            
+            if st.button("🧹 Svuota Cache"):
+                supabase_manager.invalidate_cache()
+                st.rerun()
+            
+            # Mirror locale sincronizzato
+            st.markdown("---")
+            st.subheader("🔄 Mirror Locale")
+            sync_stats = supabase_manager.get_sync_stats()
+            
+            if sync_stats['enabled']:
+                col_sync1, col_sync2, col_sync3, col_sync4 = st.columns(4)
+                with col_sync1:
+                    st.metric("📥 Caricamenti completi", sync_stats['full_syncs'])
+                with col_sync2:
+                    st.metric("🔁 Refresh delta", sync_stats['delta_syncs'])
+                with col_sync3:
+                    st.metric("📄 Righe scaricate", sync_stats['rows_pulled'])
+                with col_sync4:
+                    st.metric("🗑️ Righe eliminate", sync_stats['rows_deleted'])
+            
+                for table, table_stats in sync_stats['tables'].items():
+                    st.caption(f"{table}: {table_stats['rows']} righe • aggiornato a {table_stats['high_water'] or 'N/A'}")
+            else:
+                st.warning("⚠️ Mirror non attivo: eseguire create_sync_tombstones.sql su Supabase")
+            
+            if st.button("🔄 Risincronizza"):
+                supabase_manager.resync_mirror()
+                st.rerun()
         else:
             st.error("❌ **SUPABASE NON CONFIGURATO** - Controlla le variabili d'ambiente")
     
-    # TAB 2: Sistema
+    # TAB 2: Backup
+    with tab_backup:
+        render_backup_tab()
+    
+    # TAB 3: Sistema
     with tab_system:
         st.subheader("ℹ️ Informazioni Sistema")
         st.info("📋 **STATO APPLICAZIONE**: Monitora lo stato generale del sistema")
@@ -1032,42 +1266,50 @@ def render_settings_page():
 
 def handle_edit_broker(broker_data):
     """Gestisce la modifica di un broker"""
-    st.session_state['editing_broker'] = broker_data
+    # Le liste caricano solo le colonne mostrate: recupera il record completo
+    st.session_state['editing_broker'] = get_supabase_manager().get_broker_by_id(broker_data['id']) or broker_data
     st.rerun()
 
 def handle_delete_broker(broker_data):
     """Gestisce l'eliminazione di un broker"""
-    st.session_state['deleting_broker'] = broker_data
+    # Le liste caricano solo le colonne mostrate: recupera il record completo
+    st.session_state['deleting_broker'] = get_supabase_manager().get_broker_by_id(broker_data['id']) or broker_data
     st.rerun()
 
 def handle_edit_prop(prop_data):
     """Gestisce la modifica di una prop firm"""
-    st.session_state['editing_prop'] = prop_data
+    # Le liste caricano solo le colonne mostrate: recupera il record completo
+    st.session_state['editing_prop'] = get_supabase_manager().get_prop_by_id(prop_data['id']) or prop_data
     st.rerun()
 
 def handle_delete_prop(prop_data):
     """Gestisce l'eliminazione di una prop firm"""
-    st.session_state['deleting_prop'] = prop_data
+    # Le liste caricano solo le colonne mostrate: recupera il record completo
+    st.session_state['deleting_prop'] = get_supabase_manager().get_prop_by_id(prop_data['id']) or prop_data
     st.rerun()
 
 def handle_edit_wallet(wallet_data):
     """Gestisce la modifica di un wallet"""
-    st.session_state['editing_wallet'] = wallet_data
+    # Le liste caricano solo le colonne mostrate: recupera il record completo
+    st.session_state['editing_wallet'] = get_supabase_manager().get_wallet_by_id(wallet_data['id']) or wallet_data
     st.rerun()
 
 def handle_delete_wallet(wallet_data):
     """Gestisce l'eliminazione di un wallet"""
-    st.session_state['deleting_wallet'] = wallet_data
+    # Le liste caricano solo le colonne mostrate: recupera il record completo
+    st.session_state['deleting_wallet'] = get_supabase_manager().get_wallet_by_id(wallet_data['id']) or wallet_data
     st.rerun()
 
 def handle_edit_pack(pack_data):
     """Gestisce la modifica di un pack copiatore"""
-    st.session_state['editing_pack'] = pack_data
+    # Le liste caricano solo le colonne mostrate: recupera il record completo
+    st.session_state['editing_pack'] = get_supabase_manager().get_pack_copiatore_by_id(pack_data['id']) or pack_data
     st.rerun()
 
 def handle_delete_pack(pack_data):
     """Gestisce l'eliminazione di un pack copiatore"""
-    st.session_state['deleting_pack'] = pack_data
+    # Le liste caricano solo le colonne mostrate: recupera il record completo
+    st.session_state['deleting_pack'] = get_supabase_manager().get_pack_copiatore_by_id(pack_data['id']) or pack_data
     st.rerun()
 
 def handle_edit_gruppo(gruppo_data):
@@ -1082,12 +1324,14 @@ def handle_delete_gruppo(gruppo_data):
 
 def handle_edit_incrocio(incrocio_data):
     """Gestisce la modifica di un incrocio"""
-    st.session_state['editing_incrocio'] = incrocio_data
+    # Le liste caricano solo le colonne mostrate: recupera il record completo
+    st.session_state['editing_incrocio'] = get_supabase_manager().get_incrocio_by_id(incrocio_data['id']) or incrocio_data
     st.rerun()
 
 def handle_delete_incrocio(incrocio_data):
     """Gestisce l'eliminazione di un incrocio"""
-    st.session_state['deleting_incrocio'] = incrocio_data
+    # Le liste caricano solo le colonne mostrate: recupera il record completo
+    st.session_state['deleting_incrocio'] = get_supabase_manager().get_incrocio_by_id(incrocio_data['id']) or incrocio_data
     st.rerun()
 
 def main():
@@ -1135,7 +1379,7 @@ def main():
     st.session_state['selected_menu'] = selected
     
     # Gestione modal di modifica ed eliminazione
-    supabase_manager = SupabaseManager()
+    supabase_manager = get_supabase_manager()
     
     # Modal modifica broker
     if 'editing_broker' in st.session_state:
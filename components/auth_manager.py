@@ -7,7 +7,7 @@ Creato da Ezio Camporeale
 
 import streamlit as st
 import bcrypt
-import json
+import threading
 from typing import Dict, Optional, List, Tuple
 from datetime import datetime, timedelta
 import logging
@@ -18,7 +18,9 @@ from pathlib import Path
 current_dir = Path(__file__).parent.parent
 sys.path.append(str(current_dir))
 
-from database.supabase_manager import SupabaseManager
+from database.supabase_manager import get_supabase_manager
+from database.role_cache import RoleInfo, permissions_allow
+from utils.password_pool import PasswordPoolBusy, get_password_pool, get_login_limiter
 
 # Configurazione logging
 logger = logging.getLogger(__name__)
@@ -28,22 +30,27 @@ class AuthManager:
     
     def __init__(self):
         """Inizializza il gestore di autenticazione"""
-        self.supabase_manager = SupabaseManager()
         self.session_key = 'user_session'
         self.session_timeout = timedelta(days=7)  # 7 giorni di sessione
-        
-        # Inizializza la sessione se non esiste
-        if self.session_key not in st.session_state:
-            st.session_state[self.session_key] = None
+        # bcrypt gira in un pool condiviso, fuori dal thread dello script
+        self.password_pool = get_password_pool()
+        self.login_limiter = get_login_limiter()
+    
+    @property
+    def supabase_manager(self):
+        """Manager condiviso (ricreato dopo un reset_supabase_manager)"""
+        return get_supabase_manager()
     
     def hash_password(self, password: str) -> str:
         """Crea l'hash di una password"""
-        return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        return self.password_pool.run(_bcrypt_hash, password)
     
     def verify_password(self, password: str, hashed_password: str) -> bool:
         """Verifica una password contro il suo hash"""
         try:
-            return bcrypt.checkpw(password.encode('utf-8'), hashed_password.encode('utf-8'))
+            return self.password_pool.run(_bcrypt_check, password, hashed_password)
+        except PasswordPoolBusy:
+            raise
         except Exception as e:
             logger.error(f"Errore verifica password: {e}")
             return False
@@ -51,15 +58,22 @@ class AuthManager:
     def login(self, username: str, password: str) -> Optional[Dict]:
         """Effettua il login di un utente"""
         try:
-            # Ottieni l'utente dal database Supabase
-            user = self.supabase_manager.get_user_by_username(username)
+            # Username bloccato dopo troppi tentativi: nessuna richiesta e nessun bcrypt
+            if self.login_limiter.check(username):
+                logger.warning(f"Tentativo di login per username bloccato: {username}")
+                return None
+            
+            # Utente e ruolo in una sola richiesta
+            user = self.supabase_manager.get_user_with_role(username)
             
             if not user:
+                self.login_limiter.record_failure(username)
                 logger.warning(f"Tentativo di login con username non esistente: {username}")
                 return None
             
             # Verifica la password
             if not self.verify_password(password, user['password_hash']):
+                self.login_limiter.record_failure(username)
                 logger.warning(f"Password errata per utente: {username}")
                 return None
             
@@ -68,11 +82,11 @@ class AuthManager:
                 logger.warning(f"Tentativo di login per utente disattivato: {username}")
                 return None
             
-            # Aggiorna l'ultimo login
-            self.supabase_manager.update_user_last_login(user['id'])
+            # Aggiorna l'ultimo login in differita: non rallenta il login
+            self.supabase_manager.record_user_login(user['id'])
             
-            # Ottieni il nome del ruolo
-            role_name = self._get_role_name(user['role_id'])
+            # Ruolo incorporato nella lettura dell'utente, altrimenti dalla cache condivisa
+            role = RoleInfo.from_row(user.get('roles')) or self._get_role(user['role_id'])
             
             # Salva la sessione
             session_data = {
@@ -82,19 +96,32 @@ class AuthManager:
                 'first_name': user['first_name'],
                 'last_name': user['last_name'],
                 'role_id': user['role_id'],
-                'role_name': role_name,
+                'role_name': role.name if role else 'Unknown',
                 'login_time': datetime.now().isoformat(),
-                'permissions': self._get_user_permissions(user['role_id'])
+                'permissions': role.permissions if role else frozenset()
             }
             
             st.session_state[self.session_key] = session_data
+            self.login_limiter.record_success(username)
             logger.info(f"Login effettuato con successo per utente: {username}")
             return session_data
             
+        except PasswordPoolBusy as e:
+            # Sovraccarico (coda piena o timeout del pool): il tentativo non conta come fallito
+            logger.warning(f"Login rifiutato per sovraccarico ({username}): {e}")
+            return None
         except Exception as e:
             logger.error(f"Errore durante il login: {e}")
             return None
     
+    def login_retry_after(self, username: str) -> float:
+        """Secondi di attesa prima di un nuovo tentativo di login (0 se consentito)"""
+        return self.login_limiter.retry_after(username)
+    
+    def get_password_stats(self) -> Dict:
+        """Metriche del pool delle password e del limitatore dei tentativi"""
+        return {'pool': self.password_pool.get_stats(), 'limiter': self.login_limiter.get_stats()}
+    
     def logout(self):
         """Effettua il logout dell'utente"""
         if self.session_key in st.session_state and st.session_state[self.session_key]:
@@ -131,8 +158,11 @@ class AuthManager:
         if not user:
             return False
         
-        permissions = user.get('permissions', [])
-        return permission in permissions or 'all' in permissions
+        # Ruolo aggiornato dalla cache (modifiche ai ruoli valide subito), altrimenti i permessi del login
+        role = self._get_role(user.get('role_id'))
+        if role:
+            return role.allows(permission)
+        return permissions_allow(user.get('permissions', frozenset()), permission)
     
     def has_role(self, roles: List[str]) -> bool:
         """Verifica se l'utente ha uno dei ruoli specificati"""
@@ -140,7 +170,8 @@ class AuthManager:
         if not user:
             return False
         
-        user_role = user.get('role_name', '')
+        role = self._get_role(user.get('role_id'))
+        user_role = role.name if role else user.get('role_name', '')
         return user_role in roles
     
     def require_auth(self):
@@ -163,28 +194,13 @@ class AuthManager:
             st.error(f"🚫 Accesso negato. Permesso richiesto: {permission}")
             st.stop()
     
-    def _get_role_name(self, role_id: int) -> str:
-        """Ottieni il nome del ruolo dall'ID"""
+    def _get_role(self, role_id: Optional[int]) -> Optional[RoleInfo]:
+        """Ottieni il ruolo con i permessi dalla cache condivisa"""
         try:
-            role = self.supabase_manager.get_role_by_id(role_id)
-            return role['name'] if role else 'Unknown'
+            return self.supabase_manager.role_cache.get(role_id)
         except Exception as e:
             logger.error(f"Errore recupero ruolo: {e}")
-            return 'Unknown'
-    
-    def _get_user_permissions(self, role_id: int) -> List[str]:
-        """Ottieni i permessi dell'utente dal ruolo"""
-        try:
-            role = self.supabase_manager.get_role_by_id(role_id)
-            if role and role.get('permissions'):
-                if isinstance(role['permissions'], str):
-                    return json.loads(role['permissions'])
-                elif isinstance(role['permissions'], list):
-                    return role['permissions']
-            return []
-        except Exception as e:
-            logger.error(f"Errore recupero permessi: {e}")
-            return []
+            return None
     
     def create_user(self, user_data: Dict) -> Tuple[bool, str]:
         """Crea un nuovo utente"""
@@ -261,3 +277,21 @@ class AuthManager:
             if st.button("🚪 Logout", width='stretch'):
                 self.logout()
                 st.rerun()
+
+def _bcrypt_hash(password: str) -> str:
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+
+def _bcrypt_check(password: str, hashed_password: str) -> bool:
+    return bcrypt.checkpw(password.encode('utf-8'), hashed_password.encode('utf-8'))
+
+_shared_auth_manager: Optional[AuthManager] = None
+_shared_auth_manager_lock = threading.Lock()
+
+def get_auth_manager() -> AuthManager:
+    """Restituisce l'AuthManager condiviso (lo stato dell'utente resta in st.session_state)"""
+    global _shared_auth_manager
+    if _shared_auth_manager is None:
+        with _shared_auth_manager_lock:
+            if _shared_auth_manager is None:
+                _shared_auth_manager = AuthManager()
+    return _shared_auth_manager
@@ -7,8 +7,9 @@ Creato da Ezio Camporeale
 
 import streamlit as st
 import pandas as pd
-from typing import Dict, List, Optional, Callable, Any
+from typing import Dict, List, Optional, Callable, Any, Tuple
 import logging
+from config import ITEMS_PER_PAGE
 
 logger = logging.getLogger(__name__)
 
@@ -126,6 +127,46 @@ class CRUDTable:
         
         return None
     
+    def load_page(
+        self,
+        page_loader: Callable[[Any, int], Tuple[List[Dict], Any]],
+        key_prefix: str = "table",
+        page_size: int = ITEMS_PER_PAGE
+    ) -> List[Dict]:
+        """
+        Carica la pagina corrente e rende i controlli di navigazione
+        
+        Args:
+            page_loader: Funzione (after, page_size) -> (righe, cursore successivo), es. get_brokers_page
+            key_prefix: Prefisso per le chiavi Streamlit
+            page_size: Righe per pagina
+            
+        Returns:
+            Righe della pagina corrente
+        """
+        
+        # Pila dei cursori keyset delle pagine visitate (None = prima pagina)
+        cursors_key = f"{key_prefix}_page_cursors"
+        if cursors_key not in st.session_state:
+            st.session_state[cursors_key] = [None]
+        cursors = st.session_state[cursors_key]
+        
+        rows, next_after = page_loader(cursors[-1], page_size)
+        
+        col_prev, col_info, col_next = st.columns([1, 2, 1])
+        with col_prev:
+            if st.button("⬅️ Precedente", key=f"{key_prefix}_page_prev", disabled=len(cursors) == 1):
+                cursors.pop()
+                st.rerun()
+        with col_info:
+            st.caption(f"Pagina {len(cursors)} · {len(rows)} elementi")
+        with col_next:
+            if st.button("Successiva ➡️", key=f"{key_prefix}_page_next", disabled=next_after is None):
+                cursors.append(next_after)
+                st.rerun()
+        
+        return rows
+    
     def render_table_with_selection(
         self,
         data: List[Dict],
@@ -10,13 +10,48 @@ from typing import List, Dict, Any, Optional
 from datetime import datetime
 import json
 from models import StatoProp, DepositoPAMM, GruppiPAMM, dict_to_gruppi_pamm
-from database.supabase_manager import SupabaseManager
+from database.supabase_manager import get_supabase_manager
+from components.auth_manager import get_auth_manager
+from database.aggregations import group_aggregates
+from utils.editor_diff import diff_rows, apply_changes, page_bounds
+from config import EDITABLE_TABLE_PAGE_SIZE
 
 class EditableGruppiTable:
     """Componente per tabella editabile Gruppi PAMM"""
     
+    # Colonne caricate per la tabella editabile (le 14 colonne dell'Excel + raggruppamento)
+    COLUMNS = [
+        'gruppo_pamm_id', 'nome_gruppo', 'nome_cliente', 'stato_prop', 'deposito_pamm',
+        'quota_prop', 'ciclo_numero', 'fase_prop', 'operazione_numero', 'esito_broker',
+        'esito_prop', 'prelievo_prop', 'prelievo_profit', 'commissioni_percentuale',
+        'credenziali_broker', 'credenziali_prop', 'chi_ha_comprato_prop'
+    ]
+    
+    # Colonne della griglia nell'ordine dell'Excel: (campo, intestazione); il cliente non è modificabile
+    EDITOR_COLUMNS = [
+        ('nome_cliente', "Cliente"),
+        ('deposito_pamm', "Deposito Pamm"),
+        ('quota_prop', "Quota Prop"),
+        ('ciclo_numero', "Ciclo #"),
+        ('fase_prop', "Fase Prop"),
+        ('operazione_numero', "Operazione #"),
+        ('esito_broker', "ESITO BROKER"),
+        ('esito_prop', "ESITO PROP"),
+        ('prelievo_prop', "Prelievo prop"),
+        ('prelievo_profit', "Prelievo profit"),
+        ('commissioni_percentuale', "Commissioni 25%"),
+        ('credenziali_broker', "Credenziali Broker"),
+        ('credenziali_prop', "Credenziali PROP (MAI ACCESSI)"),
+        ('chi_ha_comprato_prop', "CHI HA COMPRATO PROP"),
+    ]
+    EDITABLE_FIELDS = [field for field, _ in EDITOR_COLUMNS if field != 'nome_cliente']
+    EDITOR_KEY_PREFIX = "editor_grid_"
+    
+    # Colonne per filtri e statistiche
+    SUMMARY_COLUMNS = ['nome_gruppo', 'stato_prop', 'deposito_pamm']
+    
     def __init__(self):
-        self.supabase_manager = SupabaseManager()
+        self.supabase_manager = get_supabase_manager()
         self.session_key = "editable_gruppi_data"
         self.changes_key = "pending_changes"
     
@@ -27,7 +62,7 @@ class EditableGruppiTable:
         st.markdown("Modifica direttamente le celle come in Excel. Le modifiche vengono salvate automaticamente.")
         
         # Carica dati - usa il metodo specifico per la tabella editabile
-        data = self.supabase_manager.get_all_gruppi_pamm_for_editable_table()
+        data = self.supabase_manager.get_all_gruppi_pamm_for_editable_table(columns=self.COLUMNS)
         if not data:
             st.warning("Nessun dato disponibile")
             return
@@ -44,18 +79,18 @@ class EditableGruppiTable:
         # Ordina per gruppo e cliente
         df = df.sort_values(['nome_gruppo', 'nome_cliente'])
         
-        # Raggruppa per gruppo
-        gruppi = df['nome_gruppo'].unique()
+        # Statistiche di tutti i gruppi in un solo groupby
+        aggregates = group_aggregates(df, by='nome_gruppo').set_index('nome_gruppo')
         
         # Renderizza ogni gruppo
-        for gruppo in gruppi:
-            self._render_gruppo_section(gruppo, df[df['nome_gruppo'] == gruppo])
+        for gruppo, df_gruppo in df.groupby('nome_gruppo', sort=False):
+            self._render_gruppo_section(gruppo, df_gruppo, aggregates.loc[gruppo])
         
         # Pulsante salva modifiche
         if st.session_state[self.changes_key]:
             self._render_save_changes_button()
     
-    def _render_gruppo_section(self, nome_gruppo: str, df_gruppo: pd.DataFrame):
+    def _render_gruppo_section(self, nome_gruppo: str, df_gruppo: pd.DataFrame, stats: pd.Series):
         """Rende una sezione gruppo"""
         
         st.markdown(f"### 🏢 {nome_gruppo}")
@@ -63,13 +98,11 @@ class EditableGruppiTable:
         # Header del gruppo
         col1, col2, col3 = st.columns(3)
         with col1:
-            st.metric("👥 Clienti", len(df_gruppo))
+            st.metric("👥 Clienti", int(stats['numero_clienti']))
         with col2:
-            svolti = len(df_gruppo[df_gruppo['stato_prop'] == 'Svolto'])
-            st.metric("✅ Svolti", svolti)
+            st.metric("✅ Svolti", int(stats['numero_svolti']))
         with col3:
-            depositati = len(df_gruppo[df_gruppo['deposito_pamm'] == 'Depositata'])
-            st.metric("💰 Depositati", depositati)
+            st.metric("💰 Depositati", int(stats['numero_depositati']))
         
         # Tabella editabile per il gruppo
         self._render_group_editable_table(df_gruppo, nome_gruppo)
@@ -77,271 +110,83 @@ class EditableGruppiTable:
     def _render_group_editable_table(self, df_gruppo: pd.DataFrame, gruppo_nome: str):
         """Rende la tabella editabile per un gruppo - REPLICA ESATTA DELL'EXCEL"""
         
-        # Reset index per avere indici continui
-        df_gruppo = df_gruppo.reset_index(drop=True)
-        
-        # Crea colonne per la tabella editabile - TUTTE LE COLONNE DELL'EXCEL
-        cols = st.columns(14)  # 14 colonne come nell'Excel
-        
-        # Header delle colonne (esattamente come nell'Excel)
-        headers = [
-            "Cliente",
-            "Deposito Pamm", 
-            "Quota Prop",
-            "Ciclo #",
-            "Fase Prop",
-            "Operazione #",
-            "ESITO BROKER",
-            "ESITO PROP",
-            "Prelievo prop",
-            "Prelievo profit", 
-            "Commissioni 25%",
-            "Credenziali Broker",
-            "Credenziali PROP (MAI ACCESSI)",
-            "CHI HA COMPRATO PROP"
-        ]
-        
-        # Renderizza header
-        for i, header in enumerate(headers):
-            with cols[i]:
-                st.markdown(f"**{header}**")
-        
-        # Renderizza ogni riga editabile con chiavi uniche
-        for idx, row in df_gruppo.iterrows():
-            self._render_editable_row(row['id'], row, gruppo_nome)
+        # Chiavi stabili: id del gruppo (non cambia tra i rerun) e pagina corrente
+        gruppo_id = int(df_gruppo['gruppo_pamm_id'].iloc[0])
+        rows = df_gruppo.to_dict('records')
         
-        st.divider()
-    
-    def _render_editable_row(self, record_id: int, row: Dict[str, Any], gruppo_nome: str):
-        """Rende una riga editabile - TUTTE LE 14 COLONNE DELL'EXCEL"""
-        
-        # Crea chiave unica usando ID del record e gruppo
-        # Aggiungi un suffisso per garantire unicità globale
-        unique_key_prefix = f"{gruppo_nome}_{record_id}_{id(row)}"
-        
-        # Crea 14 colonne come nell'Excel
-        cols = st.columns(14)
-        
-        with cols[0]:
-            # Cliente (non editabile, solo visualizzazione)
-            cliente_display = f"{row['nome_cliente']}"
-            st.text(cliente_display)
-        
-        with cols[1]:
-            # Deposito PAMM (dropdown editabile)
-            deposito_options = ["Depositata", ""]
-            current_deposito = row['deposito_pamm']
-            new_deposito = st.selectbox(
-                f"deposito_{unique_key_prefix}",
-                options=deposito_options,
-                index=deposito_options.index(current_deposito) if current_deposito in deposito_options else 1,
-                key=f"deposito_select_{unique_key_prefix}",
-                label_visibility="collapsed"
-            )
-            
-            # Applica colore condizionale
-            if new_deposito == "Depositata":
-                st.markdown('<div style="background-color: #d1ecf1; color: #0c5460; padding: 5px; border-radius: 3px;">💰 Depositata</div>', unsafe_allow_html=True)
-            else:
-                st.markdown('<div style="background-color: #f8f9fa; color: #6c757d; padding: 5px; border-radius: 3px;">⚪ Non depositata</div>', unsafe_allow_html=True)
-            
-            # Salva cambiamento
-            if new_deposito != current_deposito:
-                self._save_change(record_id, 'deposito_pamm', new_deposito)
-        
-        with cols[2]:
-            # Quota Prop (input numerico editabile)
-            current_quota = row['quota_prop'] or 1
-            new_quota = st.number_input(
-                f"quota_{unique_key_prefix}",
+        # Gruppi grandi: una pagina alla volta nella griglia
+        page = 1
+        if len(rows) > EDITABLE_TABLE_PAGE_SIZE:
+            _, _, pages = page_bounds(len(rows), 1, EDITABLE_TABLE_PAGE_SIZE)
+            page = st.number_input(
+                f"Pagina (1-{pages})",
                 min_value=1,
-                max_value=999,
-                value=int(current_quota),
-                key=f"quota_input_{unique_key_prefix}",
-                label_visibility="collapsed"
-            )
-            
-            # Salva cambiamento
-            if new_quota != current_quota:
-                self._save_change(record_id, 'quota_prop', new_quota)
-        
-        with cols[3]:
-            # Ciclo # (input numerico editabile)
-            current_ciclo = row['ciclo_numero'] or 0
-            new_ciclo = st.number_input(
-                f"ciclo_{unique_key_prefix}",
-                min_value=0,
-                max_value=999,
-                value=int(current_ciclo),
-                key=f"ciclo_input_{unique_key_prefix}",
-                label_visibility="collapsed"
-            )
-            
-            # Salva cambiamento
-            if new_ciclo != current_ciclo:
-                self._save_change(record_id, 'ciclo_numero', new_ciclo)
-        
-        with cols[4]:
-            # Fase Prop (input testuale editabile)
-            current_fase = row['fase_prop'] or ""
-            new_fase = st.text_input(
-                f"fase_{unique_key_prefix}",
-                value=current_fase,
-                key=f"fase_input_{unique_key_prefix}",
-                label_visibility="collapsed",
-                placeholder="Es: 1 fase"
-            )
-            
-            # Salva cambiamento
-            if new_fase != current_fase:
-                self._save_change(record_id, 'fase_prop', new_fase)
-        
-        with cols[5]:
-            # Operazione # (input testuale editabile)
-            current_operazione = row['operazione_numero'] or ""
-            new_operazione = st.text_input(
-                f"operazione_{unique_key_prefix}",
-                value=str(current_operazione),
-                key=f"operazione_input_{unique_key_prefix}",
-                label_visibility="collapsed",
-                placeholder="Es: Prima operazione"
-            )
-            
-            # Salva cambiamento
-            if str(new_operazione) != str(current_operazione):
-                self._save_change(record_id, 'operazione_numero', new_operazione)
-        
-        with cols[6]:
-            # ESITO BROKER (input testuale editabile)
-            current_esito_broker = row['esito_broker'] or ""
-            new_esito_broker = st.text_input(
-                f"esito_broker_{unique_key_prefix}",
-                value=current_esito_broker,
-                key=f"esito_broker_input_{unique_key_prefix}",
-                label_visibility="collapsed",
-                placeholder="Esito broker"
-            )
-            
-            # Salva cambiamento
-            if new_esito_broker != current_esito_broker:
-                self._save_change(record_id, 'esito_broker', new_esito_broker)
-        
-        with cols[7]:
-            # ESITO PROP (input testuale editabile)
-            current_esito_prop = row['esito_prop'] or ""
-            new_esito_prop = st.text_input(
-                f"esito_prop_{unique_key_prefix}",
-                value=current_esito_prop,
-                key=f"esito_prop_input_{unique_key_prefix}",
-                label_visibility="collapsed",
-                placeholder="Esito prop"
-            )
-            
-            # Salva cambiamento
-            if new_esito_prop != current_esito_prop:
-                self._save_change(record_id, 'esito_prop', new_esito_prop)
-        
-        with cols[8]:
-            # Prelievo prop (input numerico editabile)
-            current_prelievo_prop = row['prelievo_prop'] or 0.0
-            new_prelievo_prop = st.number_input(
-                f"prelievo_prop_{unique_key_prefix}",
-                min_value=0.0,
-                max_value=999999.99,
-                value=float(current_prelievo_prop),
-                key=f"prelievo_prop_input_{unique_key_prefix}",
-                label_visibility="collapsed",
-                format="%.2f"
-            )
-            
-            # Salva cambiamento
-            if new_prelievo_prop != current_prelievo_prop:
-                self._save_change(record_id, 'prelievo_prop', new_prelievo_prop)
-        
-        with cols[9]:
-            # Prelievo profit (input numerico editabile)
-            current_prelievo_profit = row['prelievo_profit'] or 0.0
-            new_prelievo_profit = st.number_input(
-                f"prelievo_profit_{unique_key_prefix}",
-                min_value=0.0,
-                max_value=999999.99,
-                value=float(current_prelievo_profit),
-                key=f"prelievo_profit_input_{unique_key_prefix}",
-                label_visibility="collapsed",
-                format="%.2f"
-            )
-            
-            # Salva cambiamento
-            if new_prelievo_profit != current_prelievo_profit:
-                self._save_change(record_id, 'prelievo_profit', new_prelievo_profit)
-        
-        with cols[10]:
-            # Commissioni 25% (input numerico editabile)
-            current_commissioni = row['commissioni_percentuale'] or 25.0
-            new_commissioni = st.number_input(
-                f"commissioni_{unique_key_prefix}",
-                min_value=0.0,
-                max_value=100.0,
-                value=float(current_commissioni),
-                key=f"commissioni_input_{unique_key_prefix}",
-                label_visibility="collapsed",
-                format="%.1f"
-            )
-            
-            # Applica colore condizionale
-            if new_commissioni == 25.0:
-                st.markdown('<div style="background-color: #d4edda; color: #155724; padding: 5px; border-radius: 3px;">25%</div>', unsafe_allow_html=True)
-            else:
-                st.markdown('<div style="background-color: #fff3cd; color: #856404; padding: 5px; border-radius: 3px;">{:.1f}%</div>'.format(new_commissioni), unsafe_allow_html=True)
-            
-            # Salva cambiamento
-            if new_commissioni != current_commissioni:
-                self._save_change(record_id, 'commissioni_percentuale', new_commissioni)
-        
-        with cols[11]:
-            # Credenziali Broker (input editabile)
-            current_credenziali_broker = row['credenziali_broker'] or ""
-            new_credenziali_broker = st.text_input(
-                f"credenziali_broker_{unique_key_prefix}",
-                value=current_credenziali_broker,
-                key=f"credenziali_broker_input_{unique_key_prefix}",
-                label_visibility="collapsed",
-                placeholder="Es: 6001855"
-            )
-            
-            # Salva cambiamento
-            if new_credenziali_broker != current_credenziali_broker:
-                self._save_change(record_id, 'credenziali_broker', new_credenziali_broker)
-        
-        with cols[12]:
-            # Credenziali PROP (MAI ACCESSI) (input editabile)
-            current_credenziali_prop = row['credenziali_prop'] or ""
-            new_credenziali_prop = st.text_input(
-                f"credenziali_prop_{unique_key_prefix}",
-                value=current_credenziali_prop,
-                key=f"credenziali_prop_input_{unique_key_prefix}",
-                label_visibility="collapsed",
-                placeholder="Es: 1125804"
-            )
-            
-            # Salva cambiamento
-            if new_credenziali_prop != current_credenziali_prop:
-                self._save_change(record_id, 'credenziali_prop', new_credenziali_prop)
-        
-        with cols[13]:
-            # CHI HA COMPRATO PROP (input testuale editabile)
-            current_chi_ha_comprato = row.get('chi_ha_comprato_prop', '') or ""
-            new_chi_ha_comprato = st.text_input(
-                f"chi_ha_comprato_{unique_key_prefix}",
-                value=current_chi_ha_comprato,
-                key=f"chi_ha_comprato_input_{unique_key_prefix}",
-                label_visibility="collapsed",
-                placeholder="Es: MATTEO"
+                max_value=pages,
+                value=1,
+                key=f"editor_page_{gruppo_id}"
             )
-            
-            # Salva cambiamento
-            if new_chi_ha_comprato != current_chi_ha_comprato:
-                self._save_change(record_id, 'chi_ha_comprato_prop', new_chi_ha_comprato)
+        start, end, _ = page_bounds(len(rows), int(page), EDITABLE_TABLE_PAGE_SIZE)
+        page_rows = rows[start:end]
+        if end - start < len(rows):
+            st.caption(f"Clienti {start + 1}-{end} di {len(rows)}")
+        
+        # La griglia parte dalle righe con le modifiche in attesa (cambiando pagina non si perdono).
+        # Il punto di partenza resta fisso finché la griglia è visibile: se i dati cambiassero
+        # a ogni modifica, Streamlit ricreerebbe il widget perdendo le modifiche appena fatte
+        editor_key = f"{self.EDITOR_KEY_PREFIX}{gruppo_id}_{page}"
+        base_key = f"{editor_key}_base"
+        if editor_key not in st.session_state or base_key not in st.session_state:
+            st.session_state[base_key] = apply_changes(page_rows, self._pending_by_id())
+        fields = ['id'] + [field for field, _ in self.EDITOR_COLUMNS]
+        df_page = pd.DataFrame(st.session_state[base_key], columns=fields)
+        
+        edited = st.data_editor(
+            df_page,
+            key=editor_key,
+            column_config=self._editor_column_config(),
+            disabled=['id', 'nome_cliente'],
+            hide_index=True,
+            num_rows="fixed",
+            use_container_width=True
+        )
+        
+        # Diff con le righe originali: le celle riportate al valore iniziale tolgono la modifica
+        changed = diff_rows(page_rows, edited.to_dict('records'), self.EDITABLE_FIELDS)
+        for row in page_rows:
+            for field in self.EDITABLE_FIELDS:
+                if field in changed.get(row['id'], {}):
+                    self._save_change(row['id'], field, changed[row['id']][field])
+                else:
+                    st.session_state[self.changes_key].pop(f"{row['id']}_{field}", None)
+        
+        st.divider()
+    
+    def _editor_column_config(self) -> Dict[str, Any]:
+        """Tipi, limiti e intestazioni delle colonne della griglia"""
+        headers = dict(self.EDITOR_COLUMNS)
+        config = {field: st.column_config.TextColumn(header) for field, header in self.EDITOR_COLUMNS}
+        config.update({
+            'id': None,  # Nascosta: serve solo per il diff
+            'deposito_pamm': st.column_config.SelectboxColumn(headers['deposito_pamm'], options=["Depositata", ""]),
+            'quota_prop': st.column_config.NumberColumn(headers['quota_prop'], min_value=1, max_value=999, step=1),
+            'ciclo_numero': st.column_config.NumberColumn(headers['ciclo_numero'], min_value=0, max_value=999, step=1),
+            'prelievo_prop': st.column_config.NumberColumn(headers['prelievo_prop'], min_value=0.0, max_value=999999.99, format="%.2f"),
+            'prelievo_profit': st.column_config.NumberColumn(headers['prelievo_profit'], min_value=0.0, max_value=999999.99, format="%.2f"),
+            'commissioni_percentuale': st.column_config.NumberColumn(headers['commissioni_percentuale'], min_value=0.0, max_value=100.0, format="%.1f"),
+        })
+        return config
+    
+    def _pending_by_id(self) -> Dict[int, Dict[str, Any]]:
+        """Modifiche in attesa raggruppate per cliente"""
+        pending: Dict[int, Dict[str, Any]] = {}
+        for change in st.session_state.get(self.changes_key, {}).values():
+            pending.setdefault(change['id'], {})[change['field']] = change['value']
+        return pending
+    
+    def _reset_editors(self):
+        """Ricrea le griglie dai dati salvati o ricaricati al prossimo rerun"""
+        for key in [key for key in st.session_state.keys() if str(key).startswith(self.EDITOR_KEY_PREFIX)]:
+            del st.session_state[key]
     
     def _save_change(self, record_id: int, field: str, value: Any):
         """Salva un cambiamento nella session state"""
@@ -371,54 +216,51 @@ class EditableGruppiTable:
                 self._save_all_changes()
     
     def _save_all_changes(self):
-        """Salva tutte le modifiche nel database"""
+        """Salva tutte le modifiche nel database con update a blocchi dei soli campi modificati"""
+        
+        # Autore delle modifiche: l'utente loggato
+        user = get_auth_manager().get_current_user()
+        if not user:
+            st.error("❌ Sessione non valida: effettua il login per salvare le modifiche")
+            return
         
         changes = st.session_state[self.changes_key]
+        rows_by_id = {row['id']: row for row in st.session_state[self.session_key]}
+        
+        # Unisci le modifiche per record: un'unica riga per cliente con tutti i campi cambiati
+        updates_by_id: Dict[int, Dict[str, Any]] = {}
+        for change_data in changes.values():
+            updates_by_id.setdefault(change_data['id'], {})[change_data['field']] = change_data['value']
+        
+        # Solo i campi modificati: nome e gruppo del cliente non vengono riscritti dalla copia in sessione
+        with st.spinner(f"Salvando {len(changes)} modifiche su {len(updates_by_id)} clienti..."):
+            results = self.supabase_manager.bulk_update_clienti_gruppi_pamm(updates_by_id, aggiornato_da=user['username'])
+        
         success_count = 0
         error_count = 0
-        
-        progress_bar = st.progress(0)
-        status_text = st.empty()
-        
-        total_changes = len(changes)
-        
-        for i, (change_key, change_data) in enumerate(changes.items()):
-            try:
-                # Aggiorna il record nel database (tabella clienti_gruppi_pamm)
-                success, message = self.supabase_manager.update_cliente_gruppo_pamm(
-                    change_data['id'],
-                    {change_data['field']: change_data['value']}
-                )
-                
-                if success:
-                    success_count += 1
-                else:
-                    error_count += 1
-                    st.error(f"Errore aggiornamento record {change_data['id']}: {message}")
-                
-                # Aggiorna progress bar
-                progress_bar.progress((i + 1) / total_changes)
-                status_text.text(f"Salvando modifiche... {i + 1}/{total_changes}")
-                
-            except Exception as e:
+        for record_id, (success, message) in results.items():
+            if success:
+                success_count += 1
+                # Aggiorna solo le righe toccate in session state, senza ricaricare tutto
+                if record_id in rows_by_id:
+                    rows_by_id[record_id].update(updates_by_id[record_id])
+                for field in updates_by_id[record_id]:
+                    changes.pop(f"{record_id}_{field}", None)
+            else:
                 error_count += 1
-                st.error(f"Errore durante il salvataggio: {e}")
+                st.error(f"Errore aggiornamento record {record_id}: {message}")
         
         # Risultato finale
         if success_count > 0:
-            st.success(f"✅ {success_count} modifiche salvate con successo!")
+            st.success(f"✅ {success_count} clienti aggiornati con successo!")
         
         if error_count > 0:
-            st.error(f"❌ {error_count} modifiche non salvate")
-        
-        # Pulisci le modifiche salvate
-        st.session_state[self.changes_key] = {}
-        
-        # Ricarica i dati
-        st.session_state[self.session_key] = self.supabase_manager.get_gruppi_pamm()
-        
-        # Riavvia la pagina per mostrare i dati aggiornati
-        st.rerun()
+            # Le modifiche non salvate restano in attesa per un nuovo tentativo
+            st.error(f"❌ {error_count} clienti non salvati")
+        else:
+            # Riavvia la pagina per mostrare i dati aggiornati
+            self._reset_editors()
+            st.rerun()
     
     def render_quick_actions(self):
         """Rende azioni rapide per la tabella"""
@@ -428,7 +270,7 @@ class EditableGruppiTable:
         # Filtri
         st.sidebar.markdown("### 🔍 Filtri")
         
-        data = self.supabase_manager.get_gruppi_pamm()
+        data = self.supabase_manager.get_gruppi_pamm(columns=self.SUMMARY_COLUMNS)
         if data:
             df = pd.DataFrame(data)
             
@@ -453,7 +295,9 @@ class EditableGruppiTable:
         st.sidebar.markdown("### ⚡ Azioni Bulk")
         
         if st.sidebar.button("🔄 Aggiorna Dati", use_container_width=True):
-            st.session_state[self.session_key] = self.supabase_manager.get_gruppi_pamm()
+            self.supabase_manager.invalidate_cache('gruppi_pamm_gruppi', 'clienti_gruppi_pamm')
+            st.session_state[self.session_key] = self.supabase_manager.get_all_gruppi_pamm_for_editable_table(columns=self.COLUMNS)
+            self._reset_editors()
             st.rerun()
         
         if st.sidebar.button("📊 Statistiche", use_container_width=True):
@@ -462,7 +306,7 @@ class EditableGruppiTable:
     def _show_statistics(self):
         """Mostra statistiche dettagliate"""
         
-        data = self.supabase_manager.get_gruppi_pamm()
+        data = self.supabase_manager.get_gruppi_pamm(columns=self.SUMMARY_COLUMNS)
         if not data:
             return
         
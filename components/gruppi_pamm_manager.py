@@ -9,6 +9,7 @@ import pandas as pd
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 import json
+import tempfile
 
 from models import (
     GruppoPAMM, ClienteGruppoPAMM, 
@@ -16,15 +17,29 @@ from models import (
     cliente_gruppo_pamm_to_dict, dict_to_cliente_gruppo_pamm,
     StatoProp, DepositoPAMM
 )
-from database.supabase_manager import SupabaseManager
+from database.supabase_manager import get_supabase_manager
+from components.auth_manager import get_auth_manager
+from database.aggregations import group_aggregates, summarize, totals_from_aggregates
 from components.crud_table import CRUDTable
 from components.crud_form import CRUDForm
+from utils.excel_importer import ExcelImporter, EXCEL_COLUMN_MAP
+from utils.excel_exporter import ExcelExporter
 
 class GruppiPAMMManager:
     """Manager per la gestione completa dei gruppi PAMM"""
     
+    # Aggregati per gruppo -> colonne statistiche della tabella gruppi
+    GROUP_STATISTICS = {
+        'numero_clienti': 'numero_clienti_attivi',
+        'numero_svolti': 'numero_clienti_svolti',
+        'numero_depositati': 'numero_clienti_depositati',
+        'totale_importi': 'totale_depositi',
+        'totale_prelievi_prop': 'totale_prelievi_prop',
+        'totale_prelievi_profit': 'totale_prelievi_profit'
+    }
+    
     def __init__(self):
-        self.supabase_manager = SupabaseManager()
+        self.supabase_manager = get_supabase_manager()
         self.session_key = "gruppi_pamm_data"
         self.clienti_key = "clienti_gruppi_pamm_data"
     
@@ -49,61 +64,78 @@ class GruppiPAMMManager:
         with tab4:
             self._render_statistiche_tab()
     
+    def _render_export_excel(self):
+        """Esporta tutti i gruppi in un workbook Excel scaricabile"""
+        
+        if st.button("📤 Esporta Excel", key="export_gruppi_excel"):
+            with st.spinner("Esportazione in corso..."):
+                # Il workbook è scritto su file temporaneo: in memoria resta solo il file compresso da scaricare
+                with tempfile.NamedTemporaryFile(suffix='.xlsx') as tmp:
+                    report = ExcelExporter(self.supabase_manager).export_workbook(tmp.name)
+                    tmp.seek(0)
+                    st.session_state['export_gruppi_excel_data'] = tmp.read()
+            
+            if report.errors:
+                st.error(f"❌ Errore esportazione: {report.errors[0]}")
+                st.session_state['export_gruppi_excel_data'] = None
+            else:
+                st.success(f"✅ Esportati {report.rows} clienti in {report.sheets} fogli")
+        
+        if st.session_state.get('export_gruppi_excel_data'):
+            st.download_button(
+                "📥 Scarica Excel",
+                data=st.session_state['export_gruppi_excel_data'],
+                file_name=f"gruppi_pamm_{datetime.now().strftime('%Y%m%d_%H%M')}.xlsx",
+                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+            )
+    
     def _render_panoramica_tab(self):
         """Tab per panoramica compatta e riassuntiva dei gruppi"""
         
         st.subheader("📋 Panoramica Gruppi PAMM")
         st.markdown("Visualizzazione compatta e riassuntiva di tutti i gruppi e clienti")
         
+        # Esportazione Excel (un foglio per gruppo)
+        self._render_export_excel()
+        
         # Carica tutti i dati
-        all_data = self.supabase_manager.get_all_gruppi_pamm_for_editable_table()
-        if not all_data:
+        df = self.supabase_manager.get_clienti_gruppi_dataframe()
+        if df.empty:
             st.warning("Nessun dato disponibile")
             return
         
-        # Converti in DataFrame
-        df = pd.DataFrame(all_data)
-        
-        # Raggruppa per gruppo e calcola statistiche
-        gruppi_summary = []
-        for gruppo in df['nome_gruppo'].unique():
-            gruppo_data = df[df['nome_gruppo'] == gruppo]
-            
-            # Calcola statistiche per il gruppo
-            summary = {
-                'Gruppo': gruppo,
-                'Manager': gruppo_data['manager'].iloc[0],
-                'Clienti': len(gruppo_data),
-                'Totale Importi': f"€{gruppo_data['importo_cliente'].sum():,.2f}",
-                'Svolti': len(gruppo_data[gruppo_data['stato_prop'] == 'Svolto']),
-                'Depositati': len(gruppo_data[gruppo_data['deposito_pamm'] == 'Depositata']),
-                'Totale Prelievi Prop': f"€{gruppo_data['prelievo_prop'].sum():,.2f}",
-                'Totale Prelievi Profit': f"€{gruppo_data['prelievo_profit'].sum():,.2f}",
-                'Commissioni Medie': f"{gruppo_data['commissioni_percentuale'].mean():.1f}%",
-                'Stato': gruppo_data['stato'].iloc[0]
-            }
-            gruppi_summary.append(summary)
+        # Statistiche di tutti i gruppi in un solo groupby
+        aggregates = group_aggregates(df)
+        totals = totals_from_aggregates(aggregates)
         
         # Crea DataFrame riassuntivo
-        summary_df = pd.DataFrame(gruppi_summary)
+        summary_df = pd.DataFrame({
+            'Gruppo': aggregates['nome_gruppo'],
+            'Manager': aggregates['manager'],
+            'Clienti': aggregates['numero_clienti'],
+            'Totale Importi': aggregates['totale_importi'].map(lambda x: f"€{x:,.2f}"),
+            'Svolti': aggregates['numero_svolti'],
+            'Depositati': aggregates['numero_depositati'],
+            'Totale Prelievi Prop': aggregates['totale_prelievi_prop'].map(lambda x: f"€{x:,.2f}"),
+            'Totale Prelievi Profit': aggregates['totale_prelievi_profit'].map(lambda x: f"€{x:,.2f}"),
+            'Commissioni Medie': aggregates['commissioni_medie'].map(lambda x: f"{x:.1f}%"),
+            'Stato': aggregates['stato']
+        })
         
         # Mostra metriche generali
         col1, col2, col3, col4 = st.columns(4)
         
         with col1:
-            st.metric("📊 Gruppi Totali", len(summary_df))
+            st.metric("📊 Gruppi Totali", totals['numero_gruppi'])
         
         with col2:
-            total_clienti = summary_df['Clienti'].sum()
-            st.metric("👥 Clienti Totali", total_clienti)
+            st.metric("👥 Clienti Totali", int(totals['numero_clienti']))
         
         with col3:
-            total_importi = df['importo_cliente'].sum()
-            st.metric("💰 Importi Totali", f"€{total_importi:,.2f}")
+            st.metric("💰 Importi Totali", f"€{totals['totale_importi']:,.2f}")
         
         with col4:
-            total_svolti = summary_df['Svolti'].sum()
-            st.metric("✅ Svolti Totali", total_svolti)
+            st.metric("✅ Svolti Totali", int(totals['numero_svolti']))
         
         st.divider()
         
@@ -124,8 +156,8 @@ class GruppiPAMMManager:
         # Mostra dettagli clienti in formato compatto
         st.markdown("### 👥 Dettagli Clienti per Gruppo")
         
-        for gruppo in df['nome_gruppo'].unique():
-            gruppo_data = df[df['nome_gruppo'] == gruppo]
+        for _, gruppo_data in df.groupby('gruppo_pamm_id', sort=False):
+            gruppo = gruppo_data['nome_gruppo'].iloc[0]
             
             with st.expander(f"📋 {gruppo} - {len(gruppo_data)} clienti"):
                 # Crea tabella compatta per i clienti
@@ -161,10 +193,13 @@ class GruppiPAMMManager:
                 st.rerun()
         
         with col3:
-            if st.button("📊 Calcola Statistiche", use_container_width=True):
-                self._calculate_all_statistics()
-                st.success("Statistiche calcolate!")
-                st.rerun()
+            if st.button("📊 Calcola Statistiche", use_container_width=True, disabled=not self._can_rebuild_aggregates(),
+                         help="Ricalcolo completo degli aggregati (solo admin): normalmente li aggiornano i trigger"):
+                success, message = self._calculate_all_statistics()
+                if success:
+                    st.success(message)
+                else:
+                    st.error(message)
         
         # Form per creare nuovo gruppo
         if st.session_state.get('show_create_gruppo', False):
@@ -301,7 +336,7 @@ class GruppiPAMMManager:
         """Rende la gestione clienti per un gruppo specifico"""
         
         # Pulsanti azioni
-        col1, col2, col3 = st.columns(3)
+        col1, col2, col3, col4 = st.columns(4)
         
         with col1:
             if st.button("➕ Aggiungi Cliente", type="primary", use_container_width=True):
@@ -313,15 +348,26 @@ class GruppiPAMMManager:
                 st.rerun()
         
         with col3:
-            if st.button("📊 Calcola Totali", use_container_width=True):
-                self._calculate_gruppo_statistics(gruppo_id)
-                st.success("Totali calcolati!")
-                st.rerun()
+            if st.button("📊 Calcola Totali", use_container_width=True, disabled=not self._can_rebuild_aggregates(),
+                         help="Ricalcolo completo degli aggregati (solo admin): normalmente li aggiornano i trigger"):
+                success, message = self._calculate_gruppo_statistics(gruppo_id)
+                if success:
+                    st.success(message)
+                else:
+                    st.error(message)
+        
+        with col4:
+            if st.button("📥 Importa Excel", use_container_width=True):
+                st.session_state['show_import_clienti'] = gruppo_id
         
         # Form per aggiungere cliente
         if st.session_state.get('show_create_cliente') == gruppo_id:
             self._render_create_cliente_form(gruppo_id)
         
+        # Importazione clienti da Excel
+        if st.session_state.get('show_import_clienti') == gruppo_id:
+            self._render_import_clienti_form(gruppo_id)
+        
         # Tabella clienti del gruppo
         self._render_clienti_table(gruppo_id)
     
@@ -374,6 +420,60 @@ class GruppiPAMMManager:
                 st.session_state['show_create_cliente'] = None
                 st.rerun()
     
+    def _render_import_clienti_form(self, gruppo_id: int):
+        """Importa i clienti del gruppo da un foglio del workbook 'gruppi DEF'"""
+        
+        st.markdown("---")
+        st.subheader("📥 Importa Clienti da Excel")
+        st.caption("Colonne riconosciute: " + ", ".join(EXCEL_COLUMN_MAP.keys()))
+        
+        uploaded_file = st.file_uploader("File Excel", type=['xlsx', 'xlsm'], key=f"import_clienti_file_{gruppo_id}")
+        if uploaded_file is None:
+            if st.button("❌ Chiudi", key=f"import_clienti_close_{gruppo_id}"):
+                st.session_state['show_import_clienti'] = None
+                st.rerun()
+            return
+        
+        importer = ExcelImporter(self.supabase_manager)
+        try:
+            sheet_names = importer.sheet_names(uploaded_file)
+        except Exception as e:
+            st.error(f"❌ File non leggibile: {e}")
+            return
+        
+        sheet_name = st.selectbox("Foglio", sheet_names, key=f"import_clienti_sheet_{gruppo_id}")
+        dry_run = st.checkbox("🔍 Solo verifica (nessun salvataggio)", value=True, key=f"import_clienti_dry_{gruppo_id}")
+        
+        if st.button("🚀 Avvia Importazione", type="primary", key=f"import_clienti_run_{gruppo_id}"):
+            # Autore dell'importazione: l'utente loggato
+            user = get_auth_manager().get_current_user()
+            if not user and not dry_run:
+                st.error("❌ Sessione non valida: effettua il login per importare i clienti")
+                return
+            
+            with st.spinner("Importazione in corso..."):
+                report = importer.import_workbook(uploaded_file, gruppo_id, sheet_name, dry_run=dry_run,
+                                                  aggiornato_da=user['username'] if user else None)
+            
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("📄 Righe Lette", report.rows_read)
+            with col2:
+                st.metric("✅ Righe Valide", report.rows_valid)
+            with col3:
+                st.metric("💾 Righe Salvate", report.rows_saved)
+            
+            if report.errors:
+                st.warning(f"⚠️ {len(report.errors)} righe con problemi")
+                with st.expander("Dettaglio errori"):
+                    for error in report.errors[:200]:
+                        st.write(f"• {error}")
+            elif dry_run:
+                st.success("✅ Verifica completata: nessun errore, disattiva 'Solo verifica' per salvare")
+            else:
+                st.success(f"✅ {report.rows_saved} clienti importati")
+                self._refresh_data()
+    
     def _render_clienti_table(self, gruppo_id: int):
         """Tabella clienti per un gruppo specifico"""
         
@@ -406,15 +506,16 @@ class GruppiPAMMManager:
         if df_clienti.empty:
             return
         
-        # Calcola totali
-        totale_importi = df_clienti['importo_cliente'].sum()
-        totale_prelievi_prop = df_clienti['prelievo_prop'].sum()
-        totale_prelievi_profit = df_clienti['prelievo_profit'].sum()
-        totale_commissioni = df_clienti['commissioni_percentuale'].mean()
+        # Calcola totali (stesso calcolo degli aggregati per gruppo)
+        totals = summarize(df_clienti)
+        totale_importi = totals['totale_importi']
+        totale_prelievi_prop = totals['totale_prelievi_prop']
+        totale_prelievi_profit = totals['totale_prelievi_profit']
+        totale_commissioni = totals['commissioni_medie']
         
-        numero_clienti = len(df_clienti)
-        numero_svolti = len(df_clienti[df_clienti['stato_prop'] == 'Svolto'])
-        numero_depositati = len(df_clienti[df_clienti['deposito_pamm'] == 'Depositata'])
+        numero_clienti = int(totals['numero_clienti'])
+        numero_svolti = int(totals['numero_svolti'])
+        numero_depositati = int(totals['numero_depositati'])
         
         # Mostra metriche
         col1, col2, col3, col4 = st.columns(4)
@@ -533,36 +634,38 @@ class GruppiPAMMManager:
     
     def _refresh_data(self):
         """Aggiorna i dati dalla sessione"""
+        self.supabase_manager.invalidate_cache('gruppi_pamm_gruppi', 'clienti_gruppi_pamm')
         st.session_state[self.session_key] = self.supabase_manager.get_gruppi_pamm_gruppi()
         st.session_state[self.clienti_key] = self.supabase_manager.get_all_clienti_gruppi()
     
     def _add_group_statistics(self, df_gruppi: pd.DataFrame) -> pd.DataFrame:
         """Aggiunge statistiche calcolate ai gruppi"""
         
-        clienti = self.supabase_manager.get_all_clienti_gruppi()
-        df_clienti = pd.DataFrame(clienti)
+        # Aggregati in cache: nessuna nuova lettura dei clienti ad ogni rerun
+        aggregates = pd.DataFrame(self.supabase_manager.get_gruppi_aggregates(), columns=['gruppo_pamm_id', *self.GROUP_STATISTICS])
+        stats = aggregates.set_index('gruppo_pamm_id').rename(columns=self.GROUP_STATISTICS)
         
-        for idx, gruppo in df_gruppi.iterrows():
-            gruppo_clienti = df_clienti[df_clienti['gruppo_pamm_id'] == gruppo['id']]
-            
-            df_gruppi.at[idx, 'numero_clienti_attivi'] = len(gruppo_clienti)
-            df_gruppi.at[idx, 'numero_clienti_svolti'] = len(gruppo_clienti[gruppo_clienti['stato_prop'] == 'Svolto'])
-            df_gruppi.at[idx, 'numero_clienti_depositati'] = len(gruppo_clienti[gruppo_clienti['deposito_pamm'] == 'Depositata'])
-            df_gruppi.at[idx, 'totale_depositi'] = gruppo_clienti['importo_cliente'].sum()
-            df_gruppi.at[idx, 'totale_prelievi_prop'] = gruppo_clienti['prelievo_prop'].sum()
-            df_gruppi.at[idx, 'totale_prelievi_profit'] = gruppo_clienti['prelievo_profit'].sum()
-        
-        return df_gruppi
+        df_gruppi = df_gruppi.drop(columns=list(self.GROUP_STATISTICS.values()), errors='ignore').join(stats, on='id')
+        # I gruppi senza clienti non compaiono negli aggregati
+        df_gruppi = df_gruppi.fillna({column: 0 for column in self.GROUP_STATISTICS.values()})
+        counts = ['numero_clienti_attivi', 'numero_clienti_svolti', 'numero_clienti_depositati']
+        return df_gruppi.astype({column: 'int64' for column in counts})
+    
+    def _can_rebuild_aggregates(self) -> bool:
+        """La ricostruzione blocca la tabella degli aggregati: riservata agli admin"""
+        return get_auth_manager().has_permission('all')
     
-    def _calculate_all_statistics(self):
-        """Calcola statistiche per tutti i gruppi"""
-        # Implementazione per calcolare e aggiornare statistiche
-        pass
+    def _calculate_all_statistics(self) -> tuple:
+        """Ricostruisce gli aggregati di tutti i gruppi (normalmente aggiornati dai trigger)"""
+        if not self._can_rebuild_aggregates():
+            return False, "❌ Permessi insufficienti per ricalcolare gli aggregati"
+        return self.supabase_manager.rebuild_gruppi_aggregati()
     
-    def _calculate_gruppo_statistics(self, gruppo_id: int):
-        """Calcola statistiche per un gruppo specifico"""
-        # Implementazione per calcolare statistiche del gruppo
-        pass
+    def _calculate_gruppo_statistics(self, gruppo_id: int) -> tuple:
+        """Ricostruisce gli aggregati di un gruppo specifico"""
+        if not self._can_rebuild_aggregates():
+            return False, "❌ Permessi insufficienti per ricalcolare gli aggregati"
+        return self.supabase_manager.rebuild_gruppi_aggregati(gruppo_id)
     
     def _show_gruppo_details(self, gruppo: pd.Series):
         """Mostra dettagli completi di un gruppo"""
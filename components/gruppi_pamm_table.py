@@ -9,13 +9,24 @@ import pandas as pd
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 from models import StatoProp, DepositoPAMM, GruppiPAMM, dict_to_gruppi_pamm
-from database.supabase_manager import SupabaseManager
+from database.supabase_manager import get_supabase_manager
+from components.auth_manager import get_auth_manager
+from database.aggregations import group_aggregates
+from config import (
+    GRUPPI_PAMM_STATO_PROP_COLORS, GRUPPI_PAMM_DEPOSITO_COLORS,
+    GRUPPI_PAMM_COMMISSIONI_COLORS, COMMISSIONI_STANDARD
+)
+
+def _css(colors) -> str:
+    """Stile CSS da una coppia (sfondo, testo)"""
+    background, color = colors
+    return f'background-color: {background}; color: {color}'
 
 class GruppiPAMMTable:
     """Componente per visualizzazione tabellare Gruppi PAMM"""
     
     def __init__(self):
-        self.supabase_manager = SupabaseManager()
+        self.supabase_manager = get_supabase_manager()
     
     def render_gruppi_pamm_table(self, data: List[Dict[str, Any]], title: str = "Gruppi PAMM"):
         """Rende la tabella Gruppi PAMM con formattazione Excel-like"""
@@ -133,12 +144,8 @@ class GruppiPAMMTable:
         # Applica colori di sfondo per stato prop
         if 'Stato Prop' in colored_df.columns:
             def color_status(val):
-                if val == 'Svolto':
-                    return 'background-color: #d4edda; color: #155724'  # Verde chiaro
-                elif val == 'Non svolto':
-                    return 'background-color: #f8d7da; color: #721c24'  # Rosso chiaro
-                elif val == 'mancanza saldo':
-                    return 'background-color: #fff3cd; color: #856404'  # Giallo chiaro
+                if val in GRUPPI_PAMM_STATO_PROP_COLORS:
+                    return _css(GRUPPI_PAMM_STATO_PROP_COLORS[val])
                 else:
                     return ''
             
@@ -147,10 +154,7 @@ class GruppiPAMMTable:
         # Applica colori per deposito PAMM
         if 'Deposito PAMM' in colored_df.columns:
             def color_deposito(val):
-                if val == 'Depositata':
-                    return 'background-color: #d1ecf1; color: #0c5460'  # Azzurro chiaro
-                else:
-                    return 'background-color: #f8f9fa; color: #6c757d'  # Grigio chiaro
+                return _css(GRUPPI_PAMM_DEPOSITO_COLORS.get(val, GRUPPI_PAMM_DEPOSITO_COLORS['default']))
             
             colored_df['Deposito PAMM'] = colored_df['Deposito PAMM'].apply(color_deposito)
         
@@ -159,10 +163,10 @@ class GruppiPAMMTable:
             def color_commissioni(val):
                 try:
                     commissione = float(str(val).replace('%', '').replace('€', '').replace(',', ''))
-                    if commissione != 25.0:
-                        return 'background-color: #ffeaa7; color: #d63031'  # Arancione per valori non standard
+                    if commissione != COMMISSIONI_STANDARD:
+                        return _css(GRUPPI_PAMM_COMMISSIONI_COLORS['custom'])  # Arancione per valori non standard
                     else:
-                        return 'background-color: #d4edda; color: #155724'  # Verde per valore standard
+                        return _css(GRUPPI_PAMM_COMMISSIONI_COLORS['standard'])  # Verde per valore standard
                 except:
                     return ''
             
@@ -264,22 +268,18 @@ class GruppiPAMMTable:
             st.warning("Nessun dato disponibile per il riepilogo")
             return
         
-        df = pd.DataFrame(data)
+        # Raggruppa per gruppo (stesso motore di aggregazione della panoramica)
+        aggregates = group_aggregates(pd.DataFrame(data))
         
-        # Raggruppa per gruppo
-        gruppi_summary = df.groupby('nome_gruppo').agg({
-            'nome_cliente': 'count',
-            'stato_prop': lambda x: (x == 'Svolto').sum(),
-            'deposito_pamm': lambda x: (x == 'Depositata').sum(),
-            'importo_cliente': 'sum',
-            'responsabili_gruppo': 'first',
-            'numero_membri_gruppo': 'first'
-        }).reset_index()
-        
-        gruppi_summary.columns = [
-            'Gruppo', 'Totale Clienti', 'Svolti', 'Depositati', 
-            'Importo Totale', 'Responsabili', 'Membri Gruppo'
-        ]
+        gruppi_summary = pd.DataFrame({
+            'Gruppo': aggregates['nome_gruppo'],
+            'Totale Clienti': aggregates['numero_clienti'],
+            'Svolti': aggregates['numero_svolti'],
+            'Depositati': aggregates['numero_depositati'],
+            'Importo Totale': aggregates['totale_importi'],
+            'Responsabili': aggregates['responsabili_gruppo'],
+            'Membri Gruppo': aggregates['numero_membri_gruppo']
+        }).sort_values('Gruppo')
         
         # Calcola percentuali
         gruppi_summary['% Svolti'] = (gruppi_summary['Svolti'] / gruppi_summary['Totale Clienti'] * 100).round(1)
@@ -324,16 +324,15 @@ class GruppiPAMMTable:
                         id_str = cliente.split("(ID: ")[1].split(")")[0]
                         ids.append(int(id_str))
                     
-                    # Aggiorna
-                    success, message = self.supabase_manager.update_stato_prop_bulk(
-                        ids, StatoProp(nuovo_stato)
-                    )
-                    
-                    if success:
-                        st.success(message)
-                        st.rerun()
+                    # Aggiorna (a blocchi, con autore della modifica)
+                    username = self._current_username()
+                    if not username:
+                        st.error("❌ Sessione non valida: effettua il login per le operazioni bulk")
                     else:
-                        st.error(message)
+                        result = self.supabase_manager.bulk_update_clienti(
+                            ids, {'stato_prop': StatoProp(nuovo_stato).value}, username
+                        )
+                        self._render_bulk_result(result)
                 else:
                     st.warning("Seleziona almeno un cliente")
         
@@ -357,18 +356,47 @@ class GruppiPAMMTable:
                     
                     # Aggiorna
                     deposito_enum = DepositoPAMM.DEPOSITATA if nuovo_deposito == "Depositata" else DepositoPAMM.NON_DEPOSITATA
-                    success, message = self.supabase_manager.update_deposito_pamm_bulk(
-                        ids, deposito_enum
-                    )
-                    
-                    if success:
-                        st.success(message)
-                        st.rerun()
+                    username = self._current_username()
+                    if not username:
+                        st.error("❌ Sessione non valida: effettua il login per le operazioni bulk")
                     else:
-                        st.error(message)
+                        result = self.supabase_manager.bulk_update_clienti(
+                            ids, {'deposito_pamm': deposito_enum.value}, username
+                        )
+                        self._render_bulk_result(result)
                 else:
                     st.warning("Seleziona almeno un cliente")
 
+    def _current_username(self) -> Optional[str]:
+        """Utente loggato registrato come autore delle modifiche (None senza sessione valida)"""
+        user = get_auth_manager().get_current_user()
+        return user.get('username') if user else None
+    
+    def _render_bulk_result(self, result):
+        """Mostra l'esito di un'operazione bulk, con il dettaglio dei blocchi non riusciti"""
+        if result.success:
+            st.success(result.message)
+            st.rerun()
+        
+        if result.affected:
+            st.warning(result.message)
+        else:
+            st.error(result.message)
+        
+        with st.expander("📋 Dettaglio blocchi"):
+            st.dataframe(
+                pd.DataFrame([{
+                    'Blocco': chunk.index + 1,
+                    'Clienti': len(chunk.ids),
+                    'Aggiornati': chunk.affected,
+                    'Esito': '✅' if chunk.success else '❌',
+                    'Errore': chunk.error or '',
+                    'ID': ', '.join(str(row_id) for row_id in chunk.ids) if not chunk.success else ''
+                } for chunk in result.chunks]),
+                use_container_width=True,
+                hide_index=True
+            )
+
 def render_gruppi_pamm_page():
     """Rende la pagina completa Gruppi PAMM"""
     
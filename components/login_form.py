@@ -14,7 +14,7 @@ from pathlib import Path
 current_dir = Path(__file__).parent.parent
 sys.path.append(str(current_dir))
 
-from components.auth_manager import AuthManager
+from components.auth_manager import get_auth_manager
 
 def render_login_form() -> Optional[Dict]:
     """
@@ -117,14 +117,18 @@ def render_login_form() -> Optional[Dict]:
                 st.error("❌ Inserisci username e password")
                 return None
             
-            auth_manager = AuthManager()
+            auth_manager = get_auth_manager()
             user_data = auth_manager.login(username, password)
             
             if user_data:
                 st.success(f"✅ Benvenuto, {user_data['first_name']}!")
                 st.rerun()
             else:
-                st.error("❌ Username o password non corretti")
+                retry_after = auth_manager.login_retry_after(username)
+                if retry_after:
+                    st.error(f"🔒 Troppi tentativi falliti. Riprova tra {int(retry_after // 60) + 1} minuti")
+                else:
+                    st.error("❌ Username o password non corretti")
                 return None
         
         # Login demo
@@ -161,7 +165,7 @@ def render_login_form() -> Optional[Dict]:
 
 def render_logout_section():
     """Renderizza la sezione di logout nella sidebar"""
-    auth_manager = AuthManager()
+    auth_manager = get_auth_manager()
     user = auth_manager.get_current_user()
     
     if user:
@@ -184,7 +188,7 @@ def render_logout_section():
 
 def render_auth_guard():
     """Renderizza la guardia di autenticazione"""
-    auth_manager = AuthManager()
+    auth_manager = get_auth_manager()
     
     if not auth_manager.is_authenticated():
         render_login_form()
@@ -194,7 +198,7 @@ def render_auth_guard():
 
 def check_permissions(required_permissions: list = None, required_roles: list = None):
     """Verifica i permessi dell'utente corrente"""
-    auth_manager = AuthManager()
+    auth_manager = get_auth_manager()
     
     if not auth_manager.is_authenticated():
         st.error("🔒 Accesso non autorizzato. Effettua il login per continuare.")
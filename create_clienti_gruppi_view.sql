@@ -0,0 +1,45 @@
+-- Script per creare la vista appiattita clienti + gruppi PAMM
+-- Restituisce le righe già nel formato usato dai componenti (nessuna trasformazione lato Python)
+-- Creato da Ezio Camporeale
+
+-- 1. Vista clienti con informazioni del gruppo
+CREATE OR REPLACE VIEW v_clienti_gruppi_pamm AS
+SELECT 
+    c.id,
+    c.gruppo_pamm_id,
+    COALESCE(g.nome_gruppo, '') AS nome_gruppo,
+    COALESCE(g.manager, '') AS manager,
+    COALESCE(g.broker_id, 0) AS broker_id,
+    COALESCE(g.account_pamm, '') AS account_pamm,
+    COALESCE(g.capitale_totale, 0.0) AS capitale_totale,
+    COALESCE(g.numero_membri_gruppo, 0) AS numero_membri_gruppo,
+    COALESCE(g.responsabili_gruppo, '') AS responsabili_gruppo,
+    COALESCE(g.stato, 'ATTIVO') AS stato,
+    COALESCE(c.nome_cliente, '') AS nome_cliente,
+    COALESCE(c.importo_cliente, 0.0) AS importo_cliente,
+    COALESCE(c.stato_prop, 'Non svolto') AS stato_prop,
+    COALESCE(c.deposito_pamm, '') AS deposito_pamm,
+    COALESCE(c.quota_prop, 1) AS quota_prop,
+    COALESCE(c.ciclo_numero, 0) AS ciclo_numero,
+    COALESCE(c.fase_prop, '') AS fase_prop,
+    COALESCE(c.operazione_numero, '') AS operazione_numero,
+    COALESCE(c.esito_broker, '') AS esito_broker,
+    COALESCE(c.esito_prop, '') AS esito_prop,
+    COALESCE(c.prelievo_prop, 0.0) AS prelievo_prop,
+    COALESCE(c.prelievo_profit, 0.0) AS prelievo_profit,
+    COALESCE(c.commissioni_percentuale, 25.0) AS commissioni_percentuale,
+    COALESCE(c.credenziali_broker, '') AS credenziali_broker,
+    COALESCE(c.credenziali_prop, '') AS credenziali_prop,
+    COALESCE(c.chi_ha_comprato_prop, '') AS chi_ha_comprato_prop,
+    c.data_creazione,
+    c.data_aggiornamento,
+    COALESCE(c.creato_da, '') AS creato_da,
+    COALESCE(c.aggiornato_da, '') AS aggiornato_da
+FROM clienti_gruppi_pamm c
+JOIN gruppi_pamm_gruppi g ON g.id = c.gruppo_pamm_id;
+
+-- 2. Permessi per l'API
+GRANT SELECT ON v_clienti_gruppi_pamm TO anon, authenticated;
+
+-- 3. Verifica
+SELECT COUNT(*) AS righe_vista FROM v_clienti_gruppi_pamm;
@@ -0,0 +1,121 @@
+-- Script per gli aggregati per gruppo dei clienti PAMM mantenuti in modo incrementale
+-- Un trigger applica la differenza di ogni scrittura sui clienti: le liste dei gruppi leggono i totali senza scandire i clienti
+-- Creato da Ezio Camporeale
+
+-- 1. Tabella degli aggregati: una riga per gruppo con almeno un cliente (nessuna riga = tutti zero)
+CREATE TABLE IF NOT EXISTS gruppi_pamm_aggregati (
+    gruppo_pamm_id INTEGER PRIMARY KEY REFERENCES gruppi_pamm_gruppi(id) ON DELETE CASCADE,
+    numero_clienti_attivi INTEGER NOT NULL DEFAULT 0,
+    numero_clienti_svolti INTEGER NOT NULL DEFAULT 0,
+    numero_clienti_depositati INTEGER NOT NULL DEFAULT 0,
+    totale_depositi NUMERIC NOT NULL DEFAULT 0,
+    totale_prelievi_prop NUMERIC NOT NULL DEFAULT 0,
+    totale_prelievi_profit NUMERIC NOT NULL DEFAULT 0,
+    -- Somma delle percentuali: la media è somma / numero_clienti_attivi
+    somma_commissioni_percentuale NUMERIC NOT NULL DEFAULT 0,
+    data_aggiornamento TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- 2. Funzione trigger: sottrae la riga precedente e somma quella nuova
+-- SECURITY DEFINER: i ruoli dell'API scrivono gli aggregati solo attraverso i trigger
+-- search_path fisso: i nomi non qualificati non possono essere risolti su oggetti di un altro schema
+-- La sottrazione non inserisce mai: durante l'eliminazione a cascata di un gruppo la sua riga è già sparita
+CREATE OR REPLACE FUNCTION apply_cliente_aggregato_delta()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE gruppi_pamm_aggregati SET
+            numero_clienti_attivi = numero_clienti_attivi - 1,
+            numero_clienti_svolti = numero_clienti_svolti - CASE WHEN OLD.stato_prop = 'Svolto' THEN 1 ELSE 0 END,
+            numero_clienti_depositati = numero_clienti_depositati - CASE WHEN OLD.deposito_pamm = 'Depositata' THEN 1 ELSE 0 END,
+            totale_depositi = totale_depositi - COALESCE(OLD.importo_cliente, 0),
+            totale_prelievi_prop = totale_prelievi_prop - COALESCE(OLD.prelievo_prop, 0),
+            totale_prelievi_profit = totale_prelievi_profit - COALESCE(OLD.prelievo_profit, 0),
+            somma_commissioni_percentuale = somma_commissioni_percentuale - COALESCE(OLD.commissioni_percentuale, 25),
+            data_aggiornamento = NOW()
+        WHERE gruppo_pamm_id = OLD.gruppo_pamm_id;
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO gruppi_pamm_aggregati AS a (
+            gruppo_pamm_id, numero_clienti_attivi, numero_clienti_svolti, numero_clienti_depositati,
+            totale_depositi, totale_prelievi_prop, totale_prelievi_profit, somma_commissioni_percentuale
+        ) VALUES (
+            NEW.gruppo_pamm_id, 1,
+            CASE WHEN NEW.stato_prop = 'Svolto' THEN 1 ELSE 0 END,
+            CASE WHEN NEW.deposito_pamm = 'Depositata' THEN 1 ELSE 0 END,
+            COALESCE(NEW.importo_cliente, 0), COALESCE(NEW.prelievo_prop, 0),
+            COALESCE(NEW.prelievo_profit, 0), COALESCE(NEW.commissioni_percentuale, 25)
+        )
+        ON CONFLICT (gruppo_pamm_id) DO UPDATE SET
+            numero_clienti_attivi = a.numero_clienti_attivi + EXCLUDED.numero_clienti_attivi,
+            numero_clienti_svolti = a.numero_clienti_svolti + EXCLUDED.numero_clienti_svolti,
+            numero_clienti_depositati = a.numero_clienti_depositati + EXCLUDED.numero_clienti_depositati,
+            totale_depositi = a.totale_depositi + EXCLUDED.totale_depositi,
+            totale_prelievi_prop = a.totale_prelievi_prop + EXCLUDED.totale_prelievi_prop,
+            totale_prelievi_profit = a.totale_prelievi_profit + EXCLUDED.totale_prelievi_profit,
+            somma_commissioni_percentuale = a.somma_commissioni_percentuale + EXCLUDED.somma_commissioni_percentuale,
+            data_aggiornamento = NOW();
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+-- 3. Trigger sui clienti (solo le colonne che entrano negli aggregati)
+DROP TRIGGER IF EXISTS clienti_gruppi_pamm_aggregati ON clienti_gruppi_pamm;
+CREATE TRIGGER clienti_gruppi_pamm_aggregati
+    AFTER INSERT OR DELETE OR UPDATE OF gruppo_pamm_id, stato_prop, deposito_pamm, importo_cliente,
+        prelievo_prop, prelievo_profit, commissioni_percentuale
+    ON clienti_gruppi_pamm
+    FOR EACH ROW EXECUTE FUNCTION apply_cliente_aggregato_delta();
+
+-- 4. Ricostruzione completa (tutti i gruppi o uno solo): restituisce le righe ricalcolate
+-- lock_timeout: se le scritture tengono la tabella la chiamata fallisce in fretta invece di accodarsi
+CREATE OR REPLACE FUNCTION rebuild_gruppi_pamm_aggregati(p_gruppo_id INTEGER DEFAULT NULL)
+RETURNS INTEGER AS $$
+DECLARE
+    v_righe INTEGER;
+BEGIN
+    -- Blocca le scritture concorrenti sugli aggregati fino alla fine della transazione
+    LOCK TABLE gruppi_pamm_aggregati IN EXCLUSIVE MODE;
+
+    DELETE FROM gruppi_pamm_aggregati WHERE p_gruppo_id IS NULL OR gruppo_pamm_id = p_gruppo_id;
+
+    INSERT INTO gruppi_pamm_aggregati (
+        gruppo_pamm_id, numero_clienti_attivi, numero_clienti_svolti, numero_clienti_depositati,
+        totale_depositi, totale_prelievi_prop, totale_prelievi_profit, somma_commissioni_percentuale
+    )
+    SELECT
+        c.gruppo_pamm_id,
+        COUNT(*),
+        COUNT(*) FILTER (WHERE c.stato_prop = 'Svolto'),
+        COUNT(*) FILTER (WHERE c.deposito_pamm = 'Depositata'),
+        COALESCE(SUM(c.importo_cliente), 0),
+        COALESCE(SUM(c.prelievo_prop), 0),
+        COALESCE(SUM(c.prelievo_profit), 0),
+        SUM(COALESCE(c.commissioni_percentuale, 25))
+    FROM clienti_gruppi_pamm c
+    WHERE p_gruppo_id IS NULL OR c.gruppo_pamm_id = p_gruppo_id
+    GROUP BY c.gruppo_pamm_id;
+
+    GET DIAGNOSTICS v_righe = ROW_COUNT;
+    RETURN v_righe;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public SET lock_timeout = '5s';
+
+-- 5. Permessi per l'API
+GRANT SELECT ON gruppi_pamm_aggregati TO anon, authenticated;
+-- L'app usa la chiave anon: il pulsante di ricostruzione è mostrato solo agli admin (permesso 'all')
+REVOKE EXECUTE ON FUNCTION rebuild_gruppi_pamm_aggregati(INTEGER) FROM PUBLIC;
+GRANT EXECUTE ON FUNCTION rebuild_gruppi_pamm_aggregati(INTEGER) TO anon, authenticated;
+
+-- 6. Popolamento iniziale dai clienti esistenti
+SELECT rebuild_gruppi_pamm_aggregati();
+
+-- 7. Verifica (gli aggregati devono coincidere con il calcolo diretto)
+SELECT a.gruppo_pamm_id, a.numero_clienti_attivi, COUNT(c.id) AS clienti_contati
+FROM gruppi_pamm_aggregati a
+LEFT JOIN clienti_gruppi_pamm c ON c.gruppo_pamm_id = a.gruppo_pamm_id
+GROUP BY a.gruppo_pamm_id, a.numero_clienti_attivi
+HAVING a.numero_clienti_attivi <> COUNT(c.id);
@@ -0,0 +1,42 @@
+-- Script per la ricerca testuale indicizzata su clienti e gruppi PAMM
+-- Indici trigram (pg_trgm) per ILIKE '%termine%' e funzione di ricerca con ranking
+-- Richiede la vista v_clienti_gruppi_pamm (create_clienti_gruppi_view.sql)
+-- Creato da Ezio Camporeale
+
+-- 1. Estensione trigram
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- 2. Indici GIN trigram (usati da ILIKE con wildcard iniziale)
+CREATE INDEX IF NOT EXISTS idx_clienti_nome_trgm ON clienti_gruppi_pamm USING gin (nome_cliente gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_gruppi_nome_trgm ON gruppi_pamm_gruppi USING gin (nome_gruppo gin_trgm_ops);
+
+-- 3. Funzione di ricerca: una sola richiesta, risultati ordinati per similarità
+CREATE OR REPLACE FUNCTION search_clienti_gruppi_pamm(search_term TEXT, max_results INTEGER DEFAULT 50)
+RETURNS SETOF v_clienti_gruppi_pamm AS $$
+    WITH pattern AS (
+        SELECT '%' || replace(replace(replace(search_term, '\', '\\'), '%', '\%'), '_', '\_') || '%' AS value
+    ),
+    matches AS (
+        -- UNION invece di OR tra tabelle diverse: ogni ramo usa il proprio indice trigram
+        SELECT c.id
+        FROM clienti_gruppi_pamm c, pattern p
+        WHERE c.nome_cliente ILIKE p.value
+        UNION
+        SELECT c.id
+        FROM gruppi_pamm_gruppi g
+        JOIN clienti_gruppi_pamm c ON c.gruppo_pamm_id = g.id, pattern p
+        WHERE g.nome_gruppo ILIKE p.value
+    )
+    SELECT v.*
+    FROM v_clienti_gruppi_pamm v
+    JOIN matches m ON m.id = v.id
+    ORDER BY GREATEST(similarity(v.nome_cliente, search_term), similarity(v.nome_gruppo, search_term)) DESC,
+             v.nome_gruppo, v.nome_cliente
+    LIMIT max_results;
+$$ LANGUAGE sql STABLE;
+
+-- 4. Permessi per l'API
+GRANT EXECUTE ON FUNCTION search_clienti_gruppi_pamm(TEXT, INTEGER) TO anon, authenticated;
+
+-- 5. Verifica
+SELECT id, nome_gruppo, nome_cliente FROM search_clienti_gruppi_pamm('mario', 10);
@@ -0,0 +1,34 @@
+-- Script per calcolare le statistiche generali direttamente nel database
+-- Un solo round-trip per i KPI della dashboard, restituisce solo interi
+-- Creato da Ezio Camporeale
+
+-- 1. Funzione statistiche generali
+CREATE OR REPLACE FUNCTION get_statistiche_generali()
+RETURNS TABLE (
+    broker_attivi INTEGER,
+    prop_attive INTEGER,
+    wallet_attivi INTEGER,
+    pack_copiatori_attivi INTEGER,
+    gruppi_pamm_attivi INTEGER,
+    incroci_totali INTEGER
+) AS $$
+    SELECT
+        (SELECT COUNT(*) FROM brokers WHERE stato = 'Attivo')::INTEGER,
+        (SELECT COUNT(*) FROM prop_firms WHERE stato = 'Attiva')::INTEGER,
+        (SELECT COUNT(*) FROM wallets WHERE stato = 'Attivo')::INTEGER,
+        (SELECT COUNT(*) FROM pack_copiatori WHERE stato = 'Attivo')::INTEGER,
+        (SELECT COUNT(*) FROM clienti_gruppi_pamm)::INTEGER,
+        (SELECT COUNT(*) FROM incroci)::INTEGER;
+$$ LANGUAGE sql STABLE;
+
+-- 2. Indici sullo stato per i conteggi filtrati
+CREATE INDEX IF NOT EXISTS idx_brokers_stato ON brokers(stato);
+CREATE INDEX IF NOT EXISTS idx_prop_firms_stato ON prop_firms(stato);
+CREATE INDEX IF NOT EXISTS idx_wallets_stato ON wallets(stato);
+CREATE INDEX IF NOT EXISTS idx_pack_copiatori_stato ON pack_copiatori(stato);
+
+-- 3. Permessi per l'API
+GRANT EXECUTE ON FUNCTION get_statistiche_generali() TO anon, authenticated;
+
+-- 4. Verifica
+SELECT * FROM get_statistiche_generali();
@@ -0,0 +1,62 @@
+-- Script per la sincronizzazione incrementale del mirror locale
+-- data_aggiornamento gestita dal server, indici (data_aggiornamento, id) e tombstone per le eliminazioni
+-- Creato da Ezio Camporeale
+
+-- 1. Tabella tombstone: una riga per ogni record eliminato
+CREATE TABLE IF NOT EXISTS sync_tombstones (
+    id BIGSERIAL PRIMARY KEY,
+    table_name VARCHAR(100) NOT NULL,
+    row_id INTEGER NOT NULL,
+    deleted_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_sync_tombstones_deleted_at ON sync_tombstones(deleted_at);
+
+-- 2. Funzione trigger: registra l'eliminazione
+CREATE OR REPLACE FUNCTION record_sync_tombstone()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO sync_tombstones (table_name, row_id) VALUES (TG_TABLE_NAME, OLD.id);
+    RETURN OLD;
+END;
+$$ LANGUAGE plpgsql;
+
+-- 3. Funzione trigger: data_aggiornamento sempre con l'orologio del server
+CREATE OR REPLACE FUNCTION touch_data_aggiornamento()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.data_aggiornamento = NOW();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+-- 4. Trigger e indici sulle tabelle sincronizzate
+DO $$
+DECLARE
+    t TEXT;
+BEGIN
+    FOREACH t IN ARRAY ARRAY['brokers', 'prop_firms', 'wallets', 'pack_copiatori', 'incroci',
+                             'gruppi_pamm_gruppi', 'clienti_gruppi_pamm']
+    LOOP
+        EXECUTE format('UPDATE %I SET data_aggiornamento = NOW() WHERE data_aggiornamento IS NULL', t);
+        EXECUTE format('ALTER TABLE %I ALTER COLUMN data_aggiornamento SET NOT NULL', t);
+        EXECUTE format('CREATE INDEX IF NOT EXISTS %I ON %I (data_aggiornamento, id)', 'idx_' || t || '_sync', t);
+        
+        EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', t || '_touch_aggiornamento', t);
+        EXECUTE format('CREATE TRIGGER %I BEFORE INSERT OR UPDATE ON %I FOR EACH ROW EXECUTE FUNCTION touch_data_aggiornamento()',
+                       t || '_touch_aggiornamento', t);
+        
+        EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', t || '_sync_tombstone', t);
+        EXECUTE format('CREATE TRIGGER %I AFTER DELETE ON %I FOR EACH ROW EXECUTE FUNCTION record_sync_tombstone()',
+                       t || '_sync_tombstone', t);
+    END LOOP;
+END $$;
+
+-- 5. Permessi per l'API
+GRANT SELECT ON sync_tombstones TO anon, authenticated;
+
+-- 6. Pulizia periodica (i mirror più vecchi della retention eseguono una risincronizzazione completa)
+-- DELETE FROM sync_tombstones WHERE deleted_at < NOW() - INTERVAL '30 days';
+
+-- 7. Verifica
+SELECT COUNT(*) AS tombstones FROM sync_tombstones;
@@ -0,0 +1,43 @@
+-- Script per le mutazioni multi-step eseguite in un'unica transazione nel database
+-- Una sola chiamata RPC al posto di più richieste: nessuno stato parziale e un riepilogo dell'impatto
+-- Creato da Ezio Camporeale
+
+-- 1. Vincolo di cascata sui clienti (già presente in create_gruppi_pamm_tables.sql, reso esplicito)
+ALTER TABLE clienti_gruppi_pamm DROP CONSTRAINT IF EXISTS clienti_gruppi_pamm_gruppo_pamm_id_fkey;
+ALTER TABLE clienti_gruppi_pamm
+    ADD CONSTRAINT clienti_gruppi_pamm_gruppo_pamm_id_fkey
+    FOREIGN KEY (gruppo_pamm_id) REFERENCES gruppi_pamm_gruppi(id) ON DELETE CASCADE;
+
+-- 2. Eliminazione di un gruppo PAMM con i suoi clienti
+-- Restituisce il riepilogo calcolato prima dell'eliminazione; nessuna riga se il gruppo non esiste
+CREATE OR REPLACE FUNCTION delete_gruppo_pamm_cascade(p_gruppo_id INTEGER)
+RETURNS TABLE (
+    gruppo_id INTEGER,
+    nome_gruppo VARCHAR,
+    clienti_eliminati INTEGER,
+    importo_eliminato NUMERIC
+) AS $$
+DECLARE
+    v_nome VARCHAR;
+BEGIN
+    -- Blocca il gruppo: inserimenti concorrenti di clienti attendono la fine della transazione
+    SELECT g.nome_gruppo INTO v_nome FROM gruppi_pamm_gruppi g WHERE g.id = p_gruppo_id FOR UPDATE;
+    IF NOT FOUND THEN
+        RETURN;
+    END IF;
+
+    RETURN QUERY
+    SELECT p_gruppo_id, v_nome, COUNT(*)::INTEGER, COALESCE(SUM(c.importo_cliente), 0)::NUMERIC
+    FROM clienti_gruppi_pamm c
+    WHERE c.gruppo_pamm_id = p_gruppo_id;
+
+    -- I clienti sono eliminati dalla cascata (e registrati nei tombstone dai loro trigger)
+    DELETE FROM gruppi_pamm_gruppi WHERE id = p_gruppo_id;
+END;
+$$ LANGUAGE plpgsql;
+
+-- 3. Permessi per l'API
+GRANT EXECUTE ON FUNCTION delete_gruppo_pamm_cascade(INTEGER) TO anon, authenticated;
+
+-- 4. Verifica (funzione installata, nessuna eliminazione)
+SELECT proname FROM pg_proc WHERE proname = 'delete_gruppo_pamm_cascade';
@@ -0,0 +1,89 @@
+"""
+Aggregati per gruppo dei clienti PAMM calcolati con un solo groupby
+Un'unica definizione dei totali per panoramica, riepiloghi, tabella editabile e statistiche dei gruppi
+Creato da Ezio Camporeale
+"""
+
+from typing import Any, Dict, Optional
+import pandas as pd
+
+# Conteggi dei clienti con un valore specifico: nome -> (colonna, valore)
+COUNT_AGGREGATES = {
+    'numero_svolti': ('stato_prop', 'Svolto'),
+    'numero_depositati': ('deposito_pamm', 'Depositata'),
+}
+
+# Somme: nome -> colonna
+SUM_AGGREGATES = {
+    'totale_importi': 'importo_cliente',
+    'totale_prelievi_prop': 'prelievo_prop',
+    'totale_prelievi_profit': 'prelievo_profit',
+}
+# Medie: nome -> (colonna, valore per i mancanti), come il COALESCE di create_gruppi_aggregati.sql
+MEAN_AGGREGATES = {
+    'commissioni_medie': ('commissioni_percentuale', 25.0),
+}
+
+# Colonne del gruppo ripetute su ogni cliente: si prende il primo valore
+GROUP_COLUMNS = ['gruppo_pamm_id', 'nome_gruppo', 'manager', 'stato', 'responsabili_gruppo', 'numero_membri_gruppo']
+
+AGGREGATE_COLUMNS = ['numero_clienti'] + list(COUNT_AGGREGATES) + list(SUM_AGGREGATES) + list(MEAN_AGGREGATES)
+
+# Colonne dei clienti da caricare per calcolare tutti gli aggregati
+SOURCE_COLUMNS = ['gruppo_pamm_id', 'nome_gruppo'] + [column for column, _ in COUNT_AGGREGATES.values()] \
+    + list(SUM_AGGREGATES.values()) + [column for column, _ in MEAN_AGGREGATES.values()]
+
+def group_aggregates(df: pd.DataFrame, by: str = 'gruppo_pamm_id') -> pd.DataFrame:
+    """Totali per gruppo in un solo passaggio; una riga per gruppo nell'ordine di prima apparizione"""
+    # La colonna di raggruppamento non è aggregabile: i clienti si contano con una colonna costante
+    flags = {'_numero_clienti': 1}
+    named = {'numero_clienti': ('_numero_clienti', 'sum')}
+    for name, (column, value) in COUNT_AGGREGATES.items():
+        if column in df.columns:
+            flags[f'_{name}'] = df[column].eq(value)
+            named[name] = (f'_{name}', 'sum')
+    for name, column in SUM_AGGREGATES.items():
+        if column in df.columns:
+            named[name] = (column, 'sum')
+    for name, (column, default) in MEAN_AGGREGATES.items():
+        if column in df.columns:
+            flags[f'_{name}'] = df[column].fillna(default)
+            named[name] = (f'_{name}', 'mean')
+    for column in GROUP_COLUMNS:
+        if column in df.columns and column != by:
+            named[column] = (column, 'first')
+
+    if df.empty:
+        return pd.DataFrame(columns=[by] + list(named))
+
+    result = df.assign(**flags).groupby(by, sort=False).agg(**named).reset_index()
+    for name in ['numero_clienti', *COUNT_AGGREGATES]:
+        if name in result.columns:
+            result[name] = result[name].astype('int64')
+    return result
+
+def summarize(df: pd.DataFrame) -> Dict[str, Any]:
+    """Totali di un insieme di clienti (un gruppo o tutti) con lo stesso calcolo di group_aggregates"""
+    aggregates = group_aggregates(df.assign(_tutti=0), by='_tutti')
+    if aggregates.empty:
+        return empty_aggregate()
+    return aggregates.drop(columns=['_tutti']).iloc[0].to_dict()
+
+def totals_from_aggregates(aggregates: pd.DataFrame) -> Dict[str, Any]:
+    """Totali generali dagli aggregati per gruppo (media delle commissioni pesata sui clienti)"""
+    totals: Dict[str, Any] = {'numero_gruppi': len(aggregates)}
+    for name in ['numero_clienti'] + list(COUNT_AGGREGATES) + list(SUM_AGGREGATES):
+        if name in aggregates.columns:
+            totals[name] = aggregates[name].sum()
+    for name in MEAN_AGGREGATES:
+        if name in aggregates.columns:
+            clienti = aggregates['numero_clienti'].sum()
+            totals[name] = (aggregates[name] * aggregates['numero_clienti']).sum() / clienti if clienti else 0.0
+    return totals
+
+def empty_aggregate(extra: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Aggregato di un gruppo senza clienti"""
+    record = {name: 0 for name in AGGREGATE_COLUMNS}
+    record['commissioni_medie'] = 0.0
+    record.update(extra or {})
+    return record
@@ -0,0 +1,117 @@
+"""
+Motore per le modifiche massive: id divisi in blocchi, blocchi eseguiti in parallelo con un limite
+Ogni blocco è una richiesta indipendente con il proprio esito; le modifiche registrano chi le ha fatte
+Creato da Ezio Camporeale
+"""
+
+import logging
+import contextvars
+from datetime import datetime
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+@dataclass
+class ChunkResult:
+    """Esito di un blocco di id"""
+    index: int
+    ids: List[int]
+    success: bool
+    affected: int = 0
+    error: Optional[str] = None
+    # Id restituiti dal backend: le righe effettivamente modificate
+    matched_ids: List[int] = field(default_factory=list)
+
+@dataclass
+class BulkResult:
+    """Esito complessivo di una modifica massiva"""
+    table: str
+    action: str
+    requested: int
+    chunks: List[ChunkResult] = field(default_factory=list)
+
+    @property
+    def affected(self) -> int:
+        return sum(chunk.affected for chunk in self.chunks)
+
+    @property
+    def failed_ids(self) -> List[int]:
+        return [row_id for chunk in self.chunks if not chunk.success for row_id in chunk.ids]
+
+    @property
+    def missing_ids(self) -> List[int]:
+        """Id di blocchi riusciti che non corrispondevano a nessuna riga (es. eliminati nel frattempo)"""
+        missing = []
+        for chunk in self.chunks:
+            if chunk.success:
+                matched = set(chunk.matched_ids)
+                missing.extend(row_id for row_id in chunk.ids if row_id not in matched)
+        return missing
+
+    @property
+    def success(self) -> bool:
+        return all(chunk.success for chunk in self.chunks)
+
+    @property
+    def message(self) -> str:
+        if self.success:
+            return f"✅ {self.affected} record aggiornati su {self.requested} ({len(self.chunks)} blocchi)"
+        failed = [chunk for chunk in self.chunks if not chunk.success]
+        return (f"⚠️ {self.affected} record aggiornati su {self.requested}: "
+                f"{len(failed)} blocchi su {len(self.chunks)} non riusciti ({len(self.failed_ids)} record)")
+
+class BulkMutationEngine:
+    """Esegue update/delete per id a blocchi sul client PostgREST (Supabase, SQLite o finto)"""
+
+    def __init__(self, client: Any, chunk_size: int = 200, max_concurrency: int = 4):
+        self.client = client
+        self.chunk_size = max(1, chunk_size)
+        self.max_concurrency = max(1, max_concurrency)
+
+    def update(self, table: str, ids: List[int], values: Dict[str, Any],
+               aggiornato_da: Optional[str] = None) -> BulkResult:
+        """Applica gli stessi valori a tutte le righe indicate, con data e autore della modifica"""
+        values = dict(values, data_aggiornamento=datetime.now().isoformat())
+        if aggiornato_da:
+            values['aggiornato_da'] = aggiornato_da
+        result = self._run(table, 'update', ids,
+                           lambda chunk: self.client.table(table).update(values).in_('id', chunk).execute())
+        logging.info(f"✅ Update massivo {table} ({', '.join(values)}) da {aggiornato_da or 'N/A'}: {result.affected}/{result.requested}")
+        return result
+
+    def delete(self, table: str, ids: List[int], aggiornato_da: Optional[str] = None) -> BulkResult:
+        """Elimina le righe indicate"""
+        result = self._run(table, 'delete', ids,
+                           lambda chunk: self.client.table(table).delete().in_('id', chunk).execute())
+        logging.info(f"✅ Eliminazione massiva {table} da {aggiornato_da or 'N/A'}: {result.affected}/{result.requested}")
+        return result
+
+    def _run(self, table: str, action: str, ids: List[int], request: Callable[[List[int]], Any]) -> BulkResult:
+        """Divide gli id in blocchi (liste IN corte nell'URL) e li esegue con al massimo max_concurrency richieste"""
+        unique_ids = list(dict.fromkeys(ids))
+        chunks = [unique_ids[i:i + self.chunk_size] for i in range(0, len(unique_ids), self.chunk_size)]
+        result = BulkResult(table, action, len(unique_ids))
+        if not chunks:
+            return result
+
+        def run_chunk(index: int, chunk: List[int]) -> ChunkResult:
+            try:
+                response = request(chunk)
+                rows = response.data or []
+                return ChunkResult(index, chunk, True, len(rows),
+                                   matched_ids=[row['id'] for row in rows if isinstance(row, dict) and 'id' in row])
+            except Exception as e:
+                logging.error(f"❌ Blocco {index + 1}/{len(chunks)} di {action} su {table} non riuscito: {e}")
+                return ChunkResult(index, chunk, False, error=str(e))
+
+        if len(chunks) == 1:
+            result.chunks = [run_chunk(0, chunks[0])]
+            return result
+
+        workers = min(self.max_concurrency, len(chunks))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bulk-mutation') as executor:
+            # Ogni blocco eredita il contesto del chiamante (metodo attribuito nelle metriche)
+            futures = [executor.submit(contextvars.copy_context().run, run_chunk, index, chunk)
+                       for index, chunk in enumerate(chunks)]
+            result.chunks = [future.result() for future in futures]
+        return result
@@ -0,0 +1,21 @@
+"""
+Codici di errore PostgREST/PostgreSQL condivisi dal data layer
+Distinguono schema non installato (fallback permanente) da errori transitori (rete, timeout, 5xx)
+Creato da Ezio Camporeale
+"""
+
+from typing import Optional
+
+# Codici di errore di una funzione RPC non installata (PostgREST / PostgreSQL)
+MISSING_FUNCTION_CODES = ('PGRST202', '42883')
+UNIQUE_VIOLATION_CODE = '23505'
+# Codici di errore di una tabella o vista non installata (PostgREST / PostgreSQL)
+MISSING_TABLE_CODES = ('PGRST205', '42P01')
+# Codici di errore di una colonna non presente (PostgREST / PostgreSQL)
+MISSING_COLUMN_CODES = ('PGRST204', '42703')
+# Lock non ottenuto entro lock_timeout (PostgreSQL)
+LOCK_NOT_AVAILABLE_CODE = '55P03'
+
+def error_code(error: Exception) -> Optional[str]:
+    """Codice PostgREST/PostgreSQL di un errore (APIError di postgrest-py o SQLiteAPIError)"""
+    return getattr(error, 'code', None)
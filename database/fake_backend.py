@@ -0,0 +1,141 @@
+"""
+Backend PostgREST finto in memoria per test e benchmark riproducibili
+Stesso query builder del client SQLite, con latenza ed errori iniettabili
+Creato da Ezio Camporeale
+"""
+
+import time
+import random
+import sqlite3
+import threading
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+from database.sqlite_client import SQLiteClient, SQLiteQueryBuilder, SQLiteRPC, SQLiteResponse, SQLiteAPIError
+
+class InjectedError(SQLiteAPIError):
+    """Errore simulato dal backend finto"""
+
+class FakeQueryBuilder(SQLiteQueryBuilder):
+    """Query builder che simula il round-trip di rete prima di eseguire"""
+
+    def execute(self) -> SQLiteResponse:
+        self.client.simulate_request(self.table_name, self._action)
+        return super().execute()
+
+class FakeRPC(SQLiteRPC):
+    """Chiamata rpc con round-trip simulato"""
+
+    def execute(self) -> SQLiteResponse:
+        self.client.simulate_request(self.name, 'rpc')
+        return super().execute()
+
+class FakeSupabaseClient(SQLiteClient):
+    """Database in memoria (una connessione serializzata) con la stessa interfaccia del client Supabase"""
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0, seed: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._conn: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.RLock()
+        self._injected: List[Tuple[Optional[str], Optional[str], Exception]] = []
+        self._stats_lock = threading.Lock()
+        self.requests: Counter = Counter()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        super().__init__(':memory:')
+
+    def connection(self) -> sqlite3.Connection:
+        """Unica connessione condivisa: un database :memory: esiste solo nella sua connessione"""
+        if self._conn is None:
+            self._conn = sqlite3.connect(':memory:', check_same_thread=False)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.execute('PRAGMA foreign_keys=ON')
+        return self._conn
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def table(self, name: str) -> FakeQueryBuilder:
+        return FakeQueryBuilder(self, name)
+
+    def rpc(self, name: str, params: Optional[Dict[str, Any]] = None) -> FakeRPC:
+        return FakeRPC(self, name, params)
+
+    # ---------- accesso serializzato ----------
+
+    def query(self, sql: str, params: list, table: str) -> List[Dict[str, Any]]:
+        with self._db_lock:
+            return super().query(sql, params, table)
+
+    def query_value(self, sql: str, params: list) -> Any:
+        with self._db_lock:
+            return super().query_value(sql, params)
+
+    def write(self, statements: List[Tuple[str, list]], table: str) -> List[Dict[str, Any]]:
+        with self._db_lock:
+            return super().write(statements, table)
+
+    def foreign_key(self, table: str, relation: str) -> Tuple[str, str]:
+        with self._db_lock:
+            return super().foreign_key(table, relation)
+
+    # ---------- simulazione ----------
+
+    def seed(self, table: str, rows: List[Dict[str, Any]]) -> int:
+        """Carica righe senza latenza né errori (dati iniziali di test e benchmark)"""
+        if not rows:
+            return 0
+        return len(SQLiteQueryBuilder(self, table).insert(rows).execute().data)
+
+    def inject_error(self, table: Optional[str] = None, action: Optional[str] = None,
+                     times: int = 1, error: Optional[Exception] = None):
+        """Fa fallire le prossime `times` richieste su table/action (None = qualsiasi)"""
+        error = error or InjectedError("Errore simulato dal backend finto", '503')
+        with self._stats_lock:
+            self._injected.extend([(table, action, error)] * times)
+
+    def simulate_request(self, table: str, action: str):
+        """Latenza e fallimenti di un round-trip, poi l'esecuzione vera e propria"""
+        with self._stats_lock:
+            self.requests[(table, action)] += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            error = self._pop_injected(table, action)
+            if error is None and self.error_rate and self._random.random() < self.error_rate:
+                error = InjectedError(f"Errore casuale simulato su {table}", '503')
+            delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+
+        try:
+            # La latenza non tiene il lock: richieste concorrenti si sovrappongono come in rete
+            if delay > 0:
+                time.sleep(delay)
+            if error is not None:
+                raise error
+        finally:
+            with self._stats_lock:
+                self.in_flight -= 1
+
+    def _pop_injected(self, table: str, action: str) -> Optional[Exception]:
+        for index, (target_table, target_action, error) in enumerate(self._injected):
+            if target_table in (None, table) and target_action in (None, action):
+                del self._injected[index]
+                return error
+        return None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Richieste per (tabella, azione) e massimo parallelismo osservato"""
+        with self._stats_lock:
+            return {
+                'requests': sum(self.requests.values()),
+                'by_table': {f'{table}.{action}': count for (table, action), count in sorted(self.requests.items())},
+                'max_in_flight': self.max_in_flight,
+            }
+
+    def reset_stats(self):
+        with self._stats_lock:
+            self.requests.clear()
+            self.max_in_flight = 0
@@ -0,0 +1,281 @@
+"""
+Strumentazione del data layer: latenza, righe e byte di ogni query
+Il client viene avvolto in un proxy che misura ogni execute() e lo attribuisce al metodo del manager
+I byte arrivano dalla risposta HTTP (hook di httpx): nessuna serializzazione aggiuntiva dei dati
+Creato da Ezio Camporeale
+"""
+
+import json
+import time
+import bisect
+import functools
+import threading
+import contextvars
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Metodo pubblico del manager in esecuzione (il più esterno: quello chiamato dalla UI)
+current_method: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar('current_method', default=None)
+# Ultima risposta HTTP ricevuta nel contesto corrente (impostata dall'hook di httpx durante execute())
+last_http_response: contextvars.ContextVar[Any] = contextvars.ContextVar('last_http_response', default=None)
+
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+ROWS_BUCKETS = (0, 1, 10, 50, 100, 500, 1000, 5000)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+FILTER_METHODS = {'eq', 'neq', 'gt', 'gte', 'lt', 'lte', 'like', 'ilike', 'in_', 'is_', 'or_', 'match', 'filter'}
+ACTION_METHODS = {'select', 'insert', 'update', 'upsert', 'delete'}
+
+class Histogram:
+    """Istogramma a bucket fissi (limite superiore incluso) con somma, minimo e massimo"""
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Limite superiore del bucket che contiene il percentile (il massimo per l'ultimo bucket)"""
+        if not self.count:
+            return None
+        target = fraction * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= target:
+                return self.bounds[index] if index < len(self.bounds) else self.max
+        return self.max
+
+    def to_dict(self) -> Dict[str, Any]:
+        labels = [f'<={bound}' for bound in self.bounds] + [f'>{self.bounds[-1]}']
+        return {
+            'count': self.count,
+            'sum': round(self.total, 3),
+            'avg': round(self.total / self.count, 3) if self.count else None,
+            'min': self.min,
+            'max': self.max,
+            'p50': self.percentile(0.5),
+            'p95': self.percentile(0.95),
+            'p99': self.percentile(0.99),
+            'buckets': dict(zip(labels, self.counts)),
+        }
+
+class _Series:
+    """Metriche aggregate di una coppia (metodo, tabella/azione)"""
+
+    def __init__(self):
+        self.errors = 0
+        self.latency_ms = Histogram(LATENCY_BUCKETS_MS)
+        self.rows = Histogram(ROWS_BUCKETS)
+        self.bytes = Histogram(BYTES_BUCKETS)
+
+class QueryMetrics:
+    """Registro thread-safe delle query e delle chiamate ai metodi del manager"""
+
+    def __init__(self, recent_size: int = 200):
+        self._lock = threading.Lock()
+        self._queries: Dict[Tuple[str, str, str], _Series] = {}
+        self._methods: Dict[str, _Series] = {}
+        self.recent: deque = deque(maxlen=recent_size)
+        self.started_at = datetime.now()
+
+    def record_query(self, table: str, action: str, filters: List[str], latency_ms: float,
+                     rows: int, size: int, error: Optional[str] = None):
+        method = current_method.get() or '-'
+        with self._lock:
+            series = self._queries.setdefault((method, table, action), _Series())
+            series.latency_ms.observe(latency_ms)
+            series.rows.observe(rows)
+            series.bytes.observe(size)
+            if error:
+                series.errors += 1
+            self.recent.append({
+                'timestamp': datetime.now().isoformat(timespec='milliseconds'),
+                'method': method, 'table': table, 'action': action, 'filters': filters,
+                'latency_ms': round(latency_ms, 2), 'rows': rows, 'bytes': size, 'error': error,
+            })
+
+    def record_call(self, method: str, latency_ms: float, error: bool):
+        with self._lock:
+            series = self._methods.setdefault(method, _Series())
+            series.latency_ms.observe(latency_ms)
+            if error:
+                series.errors += 1
+
+    def reset(self):
+        with self._lock:
+            self._queries.clear()
+            self._methods.clear()
+            self.recent.clear()
+            self.started_at = datetime.now()
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """Una riga per (metodo, tabella, azione), ordinate per tempo totale"""
+        with self._lock:
+            rows = [{
+                'method': method, 'table': table, 'action': action,
+                'queries': series.latency_ms.count, 'errors': series.errors,
+                'avg_ms': round(series.latency_ms.total / series.latency_ms.count, 2),
+                'p95_ms': series.latency_ms.percentile(0.95),
+                'max_ms': round(series.latency_ms.max, 2),
+                'total_ms': round(series.latency_ms.total, 2),
+                'rows': int(series.rows.total), 'bytes': int(series.bytes.total),
+            } for (method, table, action), series in self._queries.items()]
+        return sorted(rows, key=lambda row: row['total_ms'], reverse=True)
+
+    def export(self) -> Dict[str, Any]:
+        """Snapshot completo con gli istogrammi, serializzabile in JSON"""
+        with self._lock:
+            return {
+                'started_at': self.started_at.isoformat(),
+                'exported_at': datetime.now().isoformat(),
+                'queries': [{
+                    'method': method, 'table': table, 'action': action, 'errors': series.errors,
+                    'latency_ms': series.latency_ms.to_dict(),
+                    'rows': series.rows.to_dict(),
+                    'bytes': series.bytes.to_dict(),
+                } for (method, table, action), series in self._queries.items()],
+                'methods': {
+                    method: {'errors': series.errors, 'latency_ms': series.latency_ms.to_dict()}
+                    for method, series in self._methods.items()
+                },
+                'recent': list(self.recent),
+            }
+
+    def export_json(self) -> str:
+        return json.dumps(self.export(), indent=2, default=str)
+
+class InstrumentedQuery:
+    """Proxy di un request builder: registra azione e colonne filtrate, misura execute()"""
+
+    def __init__(self, builder: Any, metrics: QueryMetrics, table: str,
+                 action: str = 'select', filters: Optional[List[str]] = None, measure_payload: bool = False):
+        self._builder = builder
+        self._metrics = metrics
+        self._table = table
+        self._action = action
+        self._filters = filters or []
+        self._measure_payload = measure_payload
+
+    def __getattr__(self, name: str) -> Any:
+        attribute = getattr(self._builder, name)
+        if not callable(attribute):
+            return attribute
+
+        def call(*args, **kwargs):
+            result = attribute(*args, **kwargs)
+            if not hasattr(result, 'execute'):
+                return result
+            action = name if name in ACTION_METHODS and self._action == 'select' else self._action
+            # Solo il nome della colonna: i valori (e le espressioni di or_) possono contenere dati personali
+            filters = self._filters
+            if name in FILTER_METHODS:
+                filters = filters + ['or' if name == 'or_' or not args else f'{name.rstrip("_")}:{args[0]}']
+            return InstrumentedQuery(result, self._metrics, self._table, action, filters, self._measure_payload)
+        return call
+
+    def execute(self) -> Any:
+        token = last_http_response.set(None)
+        start = time.perf_counter()
+        try:
+            response = self._builder.execute()
+        except Exception as e:
+            self._metrics.record_query(self._table, self._action, self._filters,
+                                       (time.perf_counter() - start) * 1000, 0, _http_size() or 0, type(e).__name__)
+            raise
+        else:
+            latency_ms = (time.perf_counter() - start) * 1000
+            data = getattr(response, 'data', None)
+            rows = len(data) if isinstance(data, list) else int(data is not None)
+            size = _http_size()
+            if size is None:
+                # Backend senza HTTP (SQLite, finto): stima solo se richiesta, costa una serializzazione
+                size = _payload_size(data) if self._measure_payload else 0
+            self._metrics.record_query(self._table, self._action, self._filters, latency_ms, rows, size)
+            return response
+        finally:
+            last_http_response.reset(token)
+
+class InstrumentedClient:
+    """Proxy del client Supabase/SQLite che strumenta table() e rpc()"""
+
+    def __init__(self, client: Any, metrics: QueryMetrics, measure_payload: bool = False):
+        self.wrapped = client
+        self.metrics = metrics
+        self.measure_payload = measure_payload
+
+    def table(self, name: str) -> InstrumentedQuery:
+        return InstrumentedQuery(self.wrapped.table(name), self.metrics, name, measure_payload=self.measure_payload)
+
+    def from_(self, name: str) -> InstrumentedQuery:
+        return self.table(name)
+
+    def rpc(self, name: str, params: Optional[Dict[str, Any]] = None) -> InstrumentedQuery:
+        return InstrumentedQuery(self.wrapped.rpc(name, params or {}), self.metrics, f'rpc:{name}', 'rpc',
+                                 measure_payload=self.measure_payload)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.wrapped, name)
+
+def instrument_methods(cls: type, exclude: Tuple[str, ...] = (), metrics_attribute: str = 'metrics') -> type:
+    """Avvolge i metodi pubblici della classe: misura la chiamata e imposta current_method"""
+    for name, method in list(vars(cls).items()):
+        if name.startswith('_') or name in exclude or not callable(method) or isinstance(method, (staticmethod, classmethod, type)):
+            continue
+        setattr(cls, name, _instrumented(name, method, metrics_attribute))
+    return cls
+
+def _instrumented(name: str, method: Callable, metrics_attribute: str) -> Callable:
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        metrics: Optional[QueryMetrics] = getattr(self, metrics_attribute, None)
+        if metrics is None or current_method.get() is not None:
+            # Chiamata annidata: le query restano attribuite al metodo esterno
+            return method(self, *args, **kwargs)
+
+        token = current_method.set(name)
+        start = time.perf_counter()
+        failed = False
+        try:
+            return method(self, *args, **kwargs)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            metrics.record_call(name, (time.perf_counter() - start) * 1000, failed)
+            current_method.reset(token)
+    return wrapper
+
+def record_http_response(response: Any):
+    """Hook 'response' di httpx: rende la risposta disponibile a execute() per contarne i byte"""
+    last_http_response.set(response)
+
+def _http_size() -> Optional[int]:
+    """Byte della risposta HTTP di execute(): Content-Length, altrimenti i byte scaricati (None senza HTTP)"""
+    response = last_http_response.get()
+    if response is None:
+        return None
+    length = response.headers.get('content-length')
+    if length is not None and length.isdigit():
+        return int(length)
+    return getattr(response, 'num_bytes_downloaded', 0)
+
+def _payload_size(data: Any) -> int:
+    """Dimensione in byte della risposta serializzata in JSON (stima per i backend senza HTTP)"""
+    if data is None:
+        return 0
+    try:
+        return len(json.dumps(data, default=str, separators=(',', ':')).encode('utf-8'))
+    except (TypeError, ValueError):
+        return 0
@@ -0,0 +1,174 @@
+"""
+Cache read-through per le query del SupabaseManager
+Cache TTL + LRU con invalidazione per tabella guidata dalle scritture
+Creato da Ezio Camporeale
+"""
+
+import time
+import logging
+import threading
+import functools
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, Tuple
+from database.singleflight import SingleFlight
+
+class QueryCache:
+    """Cache TTL/LRU thread-safe con chiavi per tabella e parametri della query"""
+
+    def __init__(self, ttl_seconds: float = 60.0, max_entries: int = 256):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[float, Tuple[str, ...], Any]]" = OrderedDict()
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.RLock()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'expired': 0, 'invalidations': 0}
+        # Le miss concorrenti con la stessa chiave condividono un'unica richiesta
+        self.inflight = SingleFlight()
+
+    @staticmethod
+    def make_key(name: str, args: tuple, kwargs: Dict[str, Any]) -> Hashable:
+        """Crea una chiave hashable da nome del metodo e parametri"""
+        return (name, _freeze(args), _freeze(kwargs))
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        """Restituisce (trovato, valore) aggiornando l'ordine LRU"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats['misses'] += 1
+                return False, None
+
+            expires_at, _, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self._stats['expired'] += 1
+                self._stats['misses'] += 1
+                return False, None
+
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+            return True, value
+
+    def set(self, key: Hashable, value: Any, tables: Iterable[str], generations: Dict[str, int] = None):
+        """Salva un valore; scartato se una delle tabelle è stata invalidata durante il caricamento"""
+        tables = tuple(tables)
+        with self._lock:
+            if generations is not None and any(self._generations.get(t, 0) != generations.get(t, 0) for t in tables):
+                return
+
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, tables, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def generations(self, tables: Iterable[str]) -> Dict[str, int]:
+        """Snapshot delle generazioni delle tabelle (incrementate ad ogni invalidazione)"""
+        with self._lock:
+            return {t: self._generations.get(t, 0) for t in tables}
+
+    def generation(self, table: str) -> int:
+        """Generazione corrente di una tabella"""
+        with self._lock:
+            return self._generations.get(table, 0)
+
+    def invalidate(self, *tables: str):
+        """Rimuove tutte le voci che dipendono da almeno una delle tabelle"""
+        with self._lock:
+            for table in tables:
+                self._generations[table] = self._generations.get(table, 0) + 1
+
+            stale_keys = [key for key, (_, deps, _) in self._entries.items() if any(t in deps for t in tables)]
+            for key in stale_keys:
+                del self._entries[key]
+            self._stats['invalidations'] += len(stale_keys)
+
+    def clear(self):
+        """Svuota completamente la cache"""
+        with self._lock:
+            for table in {t for _, deps, _ in self._entries.values() for t in deps}:
+                self._generations[table] = self._generations.get(table, 0) + 1
+            self._stats['invalidations'] += len(self._entries)
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Contatori della cache per il tuning di TTL e dimensione"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+            stats['max_entries'] = self.max_entries
+            stats['ttl_seconds'] = self.ttl_seconds
+            lookups = stats['hits'] + stats['misses']
+            stats['hit_rate'] = round(stats['hits'] / lookups * 100, 2) if lookups else 0.0
+        
+        inflight_stats = self.inflight.get_stats()
+        stats['collapsed'] = inflight_stats['collapsed']
+        stats['backend_calls'] = inflight_stats['executions']
+        stats['in_flight'] = self.inflight.in_flight()
+        return stats
+
+def cached_query(*tables: str):
+    """Decoratore read-through per i metodi get_* del manager (richiede self.query_cache)"""
+    def decorator(method: Callable) -> Callable:
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            cache: QueryCache = self.query_cache
+            key = cache.make_key(method.__name__, args, kwargs)
+
+            found, value = cache.get(key)
+            if found:
+                return _copy_result(value)
+
+            generations = cache.generations(tables)
+            
+            def load():
+                value = method(self, *args, **kwargs)
+                # I metodi restituiscono []/None anche in caso di errore: i risultati vuoti non vengono salvati
+                if _is_cacheable(value):
+                    cache.set(key, value, tables, generations)
+                return value
+            
+            # Le generazioni nella chiave evitano di agganciarsi a una lettura partita prima di una scrittura
+            inflight_key = (key, tuple(sorted(generations.items())))
+            return _copy_result(cache.inflight.do(inflight_key, load))
+        return wrapper
+    return decorator
+
+def invalidates(*tables: str):
+    """Decoratore per i metodi di scrittura: invalida le tabelle coinvolte"""
+    def decorator(method: Callable) -> Callable:
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                self.query_cache.invalidate(*tables)
+                logging.debug(f"🧹 Cache invalidata per {', '.join(tables)}")
+        return wrapper
+    return decorator
+
+def _freeze(value: Any) -> Hashable:
+    """Converte parametri non hashable (liste, dict, set) in tuple"""
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, set):
+        return tuple(sorted(_freeze(v) for v in value))
+    return value
+
+def _is_cacheable(value: Any) -> bool:
+    """Le pagine (righe, cursore) sono salvabili solo se contengono righe"""
+    if isinstance(value, tuple):
+        return bool(value) and bool(value[0])
+    return bool(value)
+
+def _copy_result(value: Any) -> Any:
+    """Copia difensiva: i chiamanti possono modificare le righe senza toccare la cache"""
+    if isinstance(value, tuple):
+        return tuple(_copy_result(v) for v in value)
+    if isinstance(value, list):
+        return [dict(row) if isinstance(row, dict) else row for row in value]
+    if isinstance(value, dict):
+        return dict(value)
+    return value
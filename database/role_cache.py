@@ -0,0 +1,97 @@
+"""
+Cache dei ruoli e dei permessi condivisa da tutte le sessioni del processo
+I permessi sono frozenset già interpretati; la cache si ricarica quando la tabella roles viene invalidata
+Creato da Ezio Camporeale
+"""
+
+import json
+import time
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, Iterable, Optional
+
+ALL_PERMISSIONS = 'all'
+
+@dataclass(frozen=True)
+class RoleInfo:
+    """Ruolo con i permessi pronti per il controllo"""
+    id: int
+    name: str
+    permissions: FrozenSet[str]
+
+    @classmethod
+    def from_row(cls, row: Optional[Dict[str, Any]]) -> Optional['RoleInfo']:
+        """Ruolo da una riga di roles (anche incorporata in users); None se manca"""
+        if not row or row.get('id') is None:
+            return None
+        return cls(row['id'], row.get('name') or 'Unknown', parse_permissions(row.get('permissions')))
+
+    def allows(self, permission: str) -> bool:
+        """Controllo O(1), senza accessi al database"""
+        return permission in self.permissions or ALL_PERMISSIONS in self.permissions
+
+def parse_permissions(raw: Any) -> FrozenSet[str]:
+    """Permessi del ruolo da lista o stringa JSON (come salvati in roles.permissions)"""
+    if isinstance(raw, str):
+        try:
+            raw = json.loads(raw)
+        except ValueError:
+            logging.warning(f"⚠️ Permessi non validi: {raw!r}")
+            return frozenset()
+    if isinstance(raw, (list, tuple, set, frozenset)):
+        return frozenset(str(permission) for permission in raw)
+    return frozenset()
+
+def permissions_allow(permissions: Iterable[str], permission: str) -> bool:
+    """Stesso controllo di RoleInfo.allows per i permessi salvati in sessione"""
+    return permission in permissions or ALL_PERMISSIONS in permissions
+
+class RoleCache:
+    """Ruoli per id, caricati con una sola lettura e ricaricati alla generazione successiva di 'roles'"""
+
+    def __init__(self, supabase_manager, ttl_seconds: float = 300.0):
+        self.supabase_manager = supabase_manager
+        # Il TTL limita la durata di ruoli modificati da un altro processo
+        self.ttl_seconds = ttl_seconds
+        self._roles: Dict[int, RoleInfo] = {}
+        self._generation: Optional[int] = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self, role_id: Optional[int]) -> Optional[RoleInfo]:
+        """Ruolo per id (None se non esiste o se i ruoli non sono leggibili)"""
+        if role_id is None:
+            return None
+        return self._current().get(role_id)
+
+    def get_by_name(self, name: str) -> Optional[RoleInfo]:
+        """Ruolo per nome"""
+        return next((role for role in self._current().values() if role.name == name), None)
+
+    def invalidate(self):
+        """Forza il ricaricamento alla prossima lettura"""
+        with self._lock:
+            self._generation = None
+
+    def _current(self) -> Dict[int, RoleInfo]:
+        generation = self.supabase_manager.query_cache.generation('roles')
+        roles = self._roles
+        if self._generation == generation and time.monotonic() - self._loaded_at < self.ttl_seconds:
+            return roles
+
+        with self._lock:
+            # Un'altra sessione può aver già ricaricato mentre si attendeva il lock
+            if self._generation == generation and time.monotonic() - self._loaded_at < self.ttl_seconds:
+                return self._roles
+
+            rows = self.supabase_manager.get_all_roles()
+            if not rows:
+                # Errore o tabella vuota: si tengono i ruoli precedenti e si ritenta alla prossima lettura
+                return self._roles
+
+            self._roles = {row['id']: RoleInfo.from_row(row) for row in rows}
+            self._generation = generation
+            self._loaded_at = time.monotonic()
+            logging.info(f"✅ Cache ruoli caricata: {len(self._roles)} ruoli")
+            return self._roles
@@ -0,0 +1,93 @@
+"""
+Indice di ricerca locale a n-grammi per clienti e gruppi PAMM
+Usato come fallback quando il backend non è raggiungibile
+Creato da Ezio Camporeale
+"""
+
+import threading
+from typing import List, Dict, Any, Iterable, Set, Tuple
+
+def _ngrams(text: str, n: int) -> Set[str]:
+    """N-grammi di un testo normalizzato (testi più corti di n restituiscono sé stessi)"""
+    if len(text) <= n:
+        return {text} if text else set()
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+def ilike_filter(fields: Tuple[str, ...], term: str) -> str:
+    """Filtro or_ di PostgREST sul termine come sottostringa letterale (con * va verificato con contains_term)"""
+    # \, % e _ escapati per LIKE; * è il jolly di PostgREST e non si può escapare: diventa _ (un carattere)
+    like = term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_').replace('*', '_')
+    # Valore tra virgolette per PostgREST: virgole e parentesi restano letterali
+    quoted = like.replace('\\', '\\\\').replace('"', '\\"')
+    return ','.join(f'{field}.ilike."*{quoted}*"' for field in fields)
+
+def contains_term(row: Dict[str, Any], term: str, fields: Tuple[str, ...]) -> bool:
+    """True se il termine compare letteralmente (senza maiuscole) in almeno un campo"""
+    term = term.lower()
+    return any(term in str(row.get(field) or '').lower() for field in fields)
+
+def match_rank(values: Iterable[str], term: str) -> int:
+    """Rank di un risultato: 0 uguale, 1 prefisso, 2 prefisso di parola, 3 sottostringa, 4 nessun match"""
+    best = 4
+    for value in values:
+        value = (value or '').lower()
+        if value == term:
+            return 0
+        if value.startswith(term):
+            best = min(best, 1)
+        elif any(word.startswith(term) for word in value.split()):
+            best = min(best, 2)
+        elif term in value:
+            best = min(best, 3)
+    return best
+
+def rank_rows(rows: List[Dict[str, Any]], term: str, fields: Tuple[str, ...]) -> List[Dict[str, Any]]:
+    """Ordina le righe per rilevanza rispetto al termine cercato"""
+    term = term.strip().lower()
+    return sorted(rows, key=lambda row: (match_rank((row.get(f) for f in fields), term),
+                                         tuple(str(row.get(f) or '') for f in fields)))
+
+class NGramIndex:
+    """Indice invertito a trigrammi sui campi testuali delle righe"""
+    
+    def __init__(self, fields: Tuple[str, ...], n: int = 3):
+        self.fields = fields
+        self.n = n
+        self._rows: List[Dict[str, Any]] = []
+        self._postings: Dict[str, Set[int]] = {}
+        self._lock = threading.Lock()
+    
+    def __len__(self) -> int:
+        return len(self._rows)
+    
+    def build(self, rows: List[Dict[str, Any]]):
+        """Ricostruisce l'indice dalle righe fornite"""
+        postings: Dict[str, Set[int]] = {}
+        for position, row in enumerate(rows):
+            for field in self.fields:
+                for gram in _ngrams(str(row.get(field) or '').lower(), self.n):
+                    postings.setdefault(gram, set()).add(position)
+        
+        with self._lock:
+            self._rows = [dict(row) for row in rows]
+            self._postings = postings
+    
+    def search(self, term: str, limit: int = 50) -> List[Dict[str, Any]]:
+        """Righe che contengono il termine in uno dei campi, ordinate per rilevanza"""
+        term = term.strip().lower()
+        if not term:
+            return []
+        
+        with self._lock:
+            rows, postings = self._rows, self._postings
+        
+        if len(term) < self.n:
+            # Termine corto: nessun trigramma completo, verifica diretta su tutte le righe
+            candidates = range(len(rows))
+        else:
+            grams = _ngrams(term, self.n)
+            candidates = set.intersection(*(postings.get(gram, set()) for gram in grams))
+        
+        matches = [rows[i] for i in candidates
+                   if any(term in str(rows[i].get(f) or '').lower() for f in self.fields)]
+        return [dict(row) for row in rank_rows(matches, term, self.fields)[:limit]]
@@ -0,0 +1,67 @@
+"""
+Deduplicazione delle letture concorrenti identiche ("singleflight")
+I chiamanti con la stessa chiave attendono un'unica richiesta e ne condividono il risultato
+Creato da Ezio Camporeale
+"""
+
+import threading
+from typing import Any, Callable, Dict, Hashable
+
+class _Call:
+    """Richiesta in corso condivisa tra i chiamanti"""
+    
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: BaseException = None
+        self.waiters = 0
+
+class SingleFlight:
+    """Esegue una sola volta le funzioni con la stessa chiave mentre sono in corso"""
+    
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self._stats = {'calls': 0, 'executions': 0, 'collapsed': 0}
+    
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """Esegue fn() o attende l'esecuzione già in corso per la stessa chiave"""
+        with self._lock:
+            self._stats['calls'] += 1
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self._stats['collapsed'] += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self._stats['executions'] += 1
+                leader = True
+        
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+        
+        try:
+            call.value = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.value
+    
+    def in_flight(self) -> int:
+        """Numero di richieste attualmente in corso"""
+        with self._lock:
+            return len(self._calls)
+    
+    def get_stats(self) -> Dict[str, int]:
+        """Contatori: chiamate totali, esecuzioni reali e chiamate accorpate"""
+        with self._lock:
+            return dict(self._stats)
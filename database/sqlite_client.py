@@ -0,0 +1,554 @@
+"""
+Client SQLite locale con la stessa interfaccia query builder del client Supabase
+Permette al SupabaseManager di funzionare offline (USE_SUPABASE = False)
+Creato da Ezio Camporeale
+"""
+
+import re
+import json
+import math
+import logging
+import sqlite3
+import threading
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+from database.search_index import rank_rows
+
+SCHEMA_PATH = Path(__file__).parent / "sqlite_schema.sql"
+
+_IDENTIFIER = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+_OPERATORS = {'eq': '=', 'neq': '!=', 'gt': '>', 'gte': '>=', 'lt': '<', 'lte': '<='}
+_MAX_PARAMS = 900  # Sotto il limite di variabili per statement delle vecchie versioni di SQLite
+
+class SQLiteAPIError(Exception):
+    """Errore con codice in stile PostgREST/PostgreSQL (es. 23505 per violazione UNIQUE)"""
+
+    def __init__(self, message: str, code: Optional[str] = None):
+        super().__init__(message)
+        self.message = message
+        self.code = code
+
+class SQLiteResponse:
+    """Risposta con gli stessi attributi di quella di postgrest-py"""
+
+    def __init__(self, data: Any, count: Optional[int] = None):
+        self.data = data
+        self.count = count
+
+class SQLiteQueryBuilder:
+    """Sottoinsieme del query builder PostgREST tradotto in SQL parametrizzato"""
+
+    def __init__(self, client: 'SQLiteClient', table: str):
+        self.client = client
+        self.table = _quote(table)
+        self.table_name = table
+        self._action = 'select'
+        self._select = '*'
+        self._count: Optional[str] = None
+        self._head = False
+        self._payload: Any = None
+        self._on_conflict = 'id'
+        self._ignore_duplicates = False
+        self._where: List[Tuple[str, list]] = []
+        self._order: List[str] = []
+        self._limit: Optional[int] = None
+        self._offset: Optional[int] = None
+
+    # ---------- azioni ----------
+
+    def select(self, columns: str = '*', count: Optional[str] = None, head: bool = False) -> 'SQLiteQueryBuilder':
+        self._select = columns or '*'
+        self._count = count
+        self._head = head
+        return self
+
+    def insert(self, rows: Union[Dict[str, Any], List[Dict[str, Any]]]) -> 'SQLiteQueryBuilder':
+        self._action = 'insert'
+        self._payload = rows
+        return self
+
+    def upsert(self, rows: Union[Dict[str, Any], List[Dict[str, Any]]], on_conflict: str = 'id',
+               ignore_duplicates: bool = False) -> 'SQLiteQueryBuilder':
+        self._action = 'upsert'
+        self._payload = rows
+        self._on_conflict = on_conflict or 'id'
+        self._ignore_duplicates = ignore_duplicates
+        return self
+
+    def update(self, values: Dict[str, Any]) -> 'SQLiteQueryBuilder':
+        self._action = 'update'
+        self._payload = values
+        return self
+
+    def delete(self) -> 'SQLiteQueryBuilder':
+        self._action = 'delete'
+        return self
+
+    # ---------- filtri ----------
+
+    def _compare(self, column: str, operator: str, value: Any) -> 'SQLiteQueryBuilder':
+        self._where.append((f'{_quote(column)} {operator} ?', [_encode(value)]))
+        return self
+
+    def eq(self, column: str, value: Any) -> 'SQLiteQueryBuilder':
+        return self._compare(column, '=', value)
+
+    def neq(self, column: str, value: Any) -> 'SQLiteQueryBuilder':
+        return self._compare(column, '!=', value)
+
+    def gt(self, column: str, value: Any) -> 'SQLiteQueryBuilder':
+        return self._compare(column, '>', value)
+
+    def gte(self, column: str, value: Any) -> 'SQLiteQueryBuilder':
+        return self._compare(column, '>=', value)
+
+    def lt(self, column: str, value: Any) -> 'SQLiteQueryBuilder':
+        return self._compare(column, '<', value)
+
+    def lte(self, column: str, value: Any) -> 'SQLiteQueryBuilder':
+        return self._compare(column, '<=', value)
+
+    def ilike(self, column: str, pattern: str) -> 'SQLiteQueryBuilder':
+        # LIKE di SQLite è già case-insensitive (ASCII)
+        self._where.append((f"{_quote(column)} LIKE ? ESCAPE '\\'", [pattern.replace('*', '%')]))
+        return self
+
+    def in_(self, column: str, values: List[Any]) -> 'SQLiteQueryBuilder':
+        values = list(values)
+        if not values:
+            self._where.append(('0', []))
+        else:
+            self._where.append((f'{_quote(column)} IN ({",".join("?" * len(values))})', [_encode(v) for v in values]))
+        return self
+
+    def is_(self, column: str, value: Any) -> 'SQLiteQueryBuilder':
+        keyword = {None: 'NULL', 'null': 'NULL', True: 'TRUE', 'true': 'TRUE', False: 'FALSE', 'false': 'FALSE'}[value]
+        self._where.append((f'{_quote(column)} IS {keyword}', []))
+        return self
+
+    def or_(self, filters: str) -> 'SQLiteQueryBuilder':
+        self._where.append(_parse_logic(filters, 'OR'))
+        return self
+
+    # ---------- ordinamento e limiti ----------
+
+    def order(self, column: str, desc: bool = False) -> 'SQLiteQueryBuilder':
+        # Stesso ordinamento dei NULL di PostgreSQL
+        self._order.append(f'{_quote(column)} {"DESC NULLS FIRST" if desc else "ASC NULLS LAST"}')
+        return self
+
+    def limit(self, size: int) -> 'SQLiteQueryBuilder':
+        self._limit = int(size)
+        return self
+
+    def range(self, start: int, end: int) -> 'SQLiteQueryBuilder':
+        self._offset = int(start)
+        self._limit = int(end) - int(start) + 1
+        return self
+
+    # ---------- esecuzione ----------
+
+    def execute(self) -> SQLiteResponse:
+        try:
+            if self._action == 'select':
+                return self._execute_select()
+            if self._action in ('insert', 'upsert'):
+                return self._execute_insert()
+            return self._execute_write()
+        except sqlite3.Error as e:
+            raise _to_api_error(e) from e
+
+    def _where_sql(self) -> Tuple[str, list]:
+        if not self._where:
+            return '', []
+        params = [p for _, clause_params in self._where for p in clause_params]
+        return ' WHERE ' + ' AND '.join(f'({sql})' for sql, _ in self._where), params
+
+    def _execute_select(self) -> SQLiteResponse:
+        columns, embeds = _parse_select(self._select)
+        for name, inner, _ in embeds:
+            local, remote = self.client.foreign_key(self.table_name, name)
+            if inner:
+                self._where.append((f'{_quote(local)} IN (SELECT {_quote(remote)} FROM {_quote(name)})', []))
+            if columns != ['*'] and local not in columns:
+                columns.append(local)
+        where, params = self._where_sql()
+
+        count = None
+        if self._count:
+            count = self.client.query_value(f'SELECT COUNT(*) FROM {self.table}{where}', params)
+        if self._head:
+            return SQLiteResponse([], count)
+
+        sql = f'SELECT {"*" if columns == ["*"] else ",".join(_quote(c) for c in columns)} FROM {self.table}{where}'
+        if self._order:
+            sql += ' ORDER BY ' + ', '.join(self._order)
+        if self._limit is not None or self._offset is not None:
+            sql += ' LIMIT ? OFFSET ?'
+            params = params + [self._limit if self._limit is not None else -1, self._offset or 0]
+
+        rows = self.client.query(sql, params, self.table_name)
+        for name, _, sub_select in embeds:
+            self._embed(rows, name, sub_select)
+        return SQLiteResponse(rows, count)
+
+    def _embed(self, rows: List[Dict[str, Any]], relation: str, sub_select: str):
+        """Risorsa embedded (es. gruppi_pamm_gruppi!inner(...)) risolta tramite foreign key"""
+        local, remote = self.client.foreign_key(self.table_name, relation)
+        columns, _ = _parse_select(sub_select)
+        keys = list({row[local] for row in rows if row.get(local) is not None})
+
+        related: Dict[Any, Dict[str, Any]] = {}
+        select_columns = '*' if columns == ['*'] else ','.join(_quote(c) for c in dict.fromkeys([remote, *columns]))
+        for start in range(0, len(keys), _MAX_PARAMS):
+            chunk = keys[start:start + _MAX_PARAMS]
+            sql = f'SELECT {select_columns} FROM {_quote(relation)} WHERE {_quote(remote)} IN ({",".join("?" * len(chunk))})'
+            for row in self.client.query(sql, chunk, relation):
+                related[row[remote]] = row
+
+        for row in rows:
+            match = related.get(row.get(local))
+            if match is not None and columns != ['*'] and remote not in columns:
+                match = {k: v for k, v in match.items() if k != remote}
+            row[relation] = match
+
+    def _execute_insert(self) -> SQLiteResponse:
+        rows = self._payload if isinstance(self._payload, list) else [self._payload]
+        conflict = [c.strip() for c in self._on_conflict.split(',')]
+        statements = []
+        for row in rows:
+            columns = list(row.keys())
+            if not columns:
+                statements.append((f'INSERT INTO {self.table} DEFAULT VALUES RETURNING *', []))
+                continue
+
+            sql = (f'INSERT INTO {self.table} ({",".join(_quote(c) for c in columns)}) '
+                   f'VALUES ({",".join("?" * len(columns))})')
+            if self._action == 'upsert':
+                updates = [c for c in columns if c not in conflict]
+                target = ','.join(_quote(c) for c in conflict)
+                if updates and not self._ignore_duplicates:
+                    sql += f' ON CONFLICT ({target}) DO UPDATE SET ' + ','.join(f'{_quote(c)} = excluded.{_quote(c)}' for c in updates)
+                else:
+                    sql += f' ON CONFLICT ({target}) DO NOTHING'
+            statements.append((sql + ' RETURNING *', [_encode(row[c]) for c in columns]))
+
+        return SQLiteResponse(self.client.write(statements, self.table_name))
+
+    def _execute_write(self) -> SQLiteResponse:
+        where, params = self._where_sql()
+        if not where:
+            # Come PostgREST: niente UPDATE/DELETE senza filtri
+            raise SQLiteAPIError(f"{self._action.upper()} requires a WHERE clause", '21000')
+
+        if self._action == 'update':
+            columns = list(self._payload.keys())
+            assignments = ','.join(f'{_quote(c)} = ?' for c in columns)
+            sql = f'UPDATE {self.table} SET {assignments}{where} RETURNING *'
+            params = [_encode(self._payload[c]) for c in columns] + params
+        else:
+            sql = f'DELETE FROM {self.table}{where} RETURNING *'
+
+        return SQLiteResponse(self.client.write([(sql, params)], self.table_name))
+
+class SQLiteRPC:
+    """Chiamata a una funzione del database (implementata in Python per SQLite)"""
+
+    def __init__(self, client: 'SQLiteClient', name: str, params: Optional[Dict[str, Any]]):
+        self.client = client
+        self.name = name
+        self.params = params or {}
+
+    def execute(self) -> SQLiteResponse:
+        handler = getattr(self.client, f'_rpc_{self.name}', None)
+        if handler is None:
+            raise SQLiteAPIError(f"Could not find the function {self.name}", 'PGRST202')
+        try:
+            return SQLiteResponse(handler(**self.params))
+        except sqlite3.Error as e:
+            raise _to_api_error(e) from e
+
+class SQLiteClient:
+    """Database SQLite locale in WAL con una connessione per thread"""
+
+    def __init__(self, path: Union[str, Path], busy_timeout: float = 5.0, cached_statements: int = 256):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.busy_timeout = busy_timeout
+        self.cached_statements = cached_statements
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._columns: Dict[str, Dict[str, str]] = {}
+        self._foreign_keys: Dict[Tuple[str, str], Tuple[str, str]] = {}
+
+        conn = self.connection()
+        # WAL: le letture non vengono bloccate dalla scrittura in corso
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.executescript(SCHEMA_PATH.read_text(encoding='utf-8'))
+        logging.info(f"✅ Database SQLite pronto: {self.path}")
+
+    def connection(self) -> sqlite3.Connection:
+        """Connessione del thread corrente (sqlite3 non condivide le connessioni tra thread)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=self.busy_timeout, cached_statements=self.cached_statements)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA foreign_keys=ON')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def close(self):
+        """Chiude le connessioni di tutti i thread"""
+        with self._lock:
+            for conn in self._connections:
+                try:
+                    conn.close()
+                except sqlite3.Error:
+                    pass
+            self._connections.clear()
+        self._local = threading.local()
+
+    def table(self, name: str) -> SQLiteQueryBuilder:
+        return SQLiteQueryBuilder(self, name)
+
+    def from_(self, name: str) -> SQLiteQueryBuilder:
+        return self.table(name)
+
+    def rpc(self, name: str, params: Optional[Dict[str, Any]] = None) -> SQLiteRPC:
+        return SQLiteRPC(self, name, params)
+
+    # ---------- esecuzione SQL ----------
+
+    def query(self, sql: str, params: list, table: str) -> List[Dict[str, Any]]:
+        """SELECT parametrizzata: righe come dict con i tipi di PostgREST"""
+        cursor = self.connection().execute(sql, params)
+        return [self._decode(table, row) for row in cursor.fetchall()]
+
+    def query_value(self, sql: str, params: list) -> Any:
+        row = self.connection().execute(sql, params).fetchone()
+        return row[0] if row else None
+
+    def write(self, statements: List[Tuple[str, list]], table: str) -> List[Dict[str, Any]]:
+        """Esegue gli statement in un'unica transazione e restituisce le righe RETURNING"""
+        conn = self.connection()
+        rows = []
+        with conn:
+            for sql, params in statements:
+                rows.extend(conn.execute(sql, params).fetchall())
+        return [self._decode(table, row) for row in rows]
+
+    # ---------- schema ----------
+
+    def column_types(self, table: str) -> Dict[str, str]:
+        """Tipi dichiarati delle colonne (per convertire BOOLEAN e JSON)"""
+        types = self._columns.get(table)
+        if types is None:
+            rows = self.connection().execute(f'PRAGMA table_info({_quote(table)})').fetchall()
+            types = {row['name']: (row['type'] or '').upper() for row in rows}
+            self._columns[table] = types
+        return types
+
+    def foreign_key(self, table: str, relation: str) -> Tuple[str, str]:
+        """(colonna locale, colonna remota) della foreign key table -> relation"""
+        key = (table, relation)
+        if key not in self._foreign_keys:
+            for row in self.connection().execute(f'PRAGMA foreign_key_list({_quote(table)})').fetchall():
+                if row['table'] == relation:
+                    self._foreign_keys[key] = (row['from'], row['to'] or 'id')
+                    break
+            else:
+                raise SQLiteAPIError(f"Could not find a relationship between '{table}' and '{relation}'", 'PGRST200')
+        return self._foreign_keys[key]
+
+    def _decode(self, table: str, row: sqlite3.Row) -> Dict[str, Any]:
+        types = self.column_types(table)
+        data = dict(row)
+        for column, value in data.items():
+            if value is None:
+                continue
+            declared = types.get(column, '')
+            if declared == 'BOOLEAN':
+                data[column] = bool(value)
+            elif declared == 'JSON' and isinstance(value, str):
+                try:
+                    data[column] = json.loads(value)
+                except ValueError:
+                    pass
+        return data
+
+    # ---------- funzioni (equivalenti delle funzioni SQL di Supabase) ----------
+
+    def _rpc_get_statistiche_generali(self) -> List[Dict[str, Any]]:
+        """Stessi conteggi di create_statistiche_function.sql"""
+        sql = """
+            SELECT
+                (SELECT COUNT(*) FROM brokers WHERE stato = 'Attivo') AS broker_attivi,
+                (SELECT COUNT(*) FROM prop_firms WHERE stato = 'Attiva') AS prop_attive,
+                (SELECT COUNT(*) FROM wallets WHERE stato = 'Attivo') AS wallet_attivi,
+                (SELECT COUNT(*) FROM pack_copiatori WHERE stato = 'Attivo') AS pack_copiatori_attivi,
+                (SELECT COUNT(*) FROM clienti_gruppi_pamm) AS gruppi_pamm_attivi,
+                (SELECT COUNT(*) FROM incroci) AS incroci_totali
+        """
+        return self.query(sql, [], 'v_statistiche')
+
+    def _rpc_search_clienti_gruppi_pamm(self, search_term: str, max_results: int = 50) -> List[Dict[str, Any]]:
+        """Ricerca di create_search_indexes.sql: LIKE sui due nomi, ranking per n-grammi"""
+        pattern = '%' + search_term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+        sql = ("SELECT * FROM v_clienti_gruppi_pamm "
+               "WHERE nome_cliente LIKE ? ESCAPE '\\' OR nome_gruppo LIKE ? ESCAPE '\\'")
+        rows = self.query(sql, [pattern, pattern], 'v_clienti_gruppi_pamm')
+        return rank_rows(rows, search_term, ('nome_cliente', 'nome_gruppo'))[:max_results]
+
+    def _rpc_delete_gruppo_pamm_cascade(self, p_gruppo_id: int) -> List[Dict[str, Any]]:
+        """Funzione di create_transactional_functions.sql: riepilogo ed eliminazione nella stessa transazione"""
+        summary = (
+            "SELECT g.id AS gruppo_id, g.nome_gruppo, "
+            "(SELECT COUNT(*) FROM clienti_gruppi_pamm WHERE gruppo_pamm_id = g.id) AS clienti_eliminati, "
+            "(SELECT COALESCE(SUM(importo_cliente), 0) FROM clienti_gruppi_pamm WHERE gruppo_pamm_id = g.id) AS importo_eliminato "
+            "FROM gruppi_pamm_gruppi g WHERE g.id = ?"
+        )
+        # I clienti sono eliminati dalla cascata ON DELETE CASCADE (foreign_keys=ON)
+        return self.write([(summary, [p_gruppo_id]),
+                           ("DELETE FROM gruppi_pamm_gruppi WHERE id = ?", [p_gruppo_id])], 'v_delete_gruppo_pamm')
+
+    def _rpc_rebuild_gruppi_pamm_aggregati(self, p_gruppo_id: Optional[int] = None) -> int:
+        """Funzione di create_gruppi_aggregati.sql: ricalcola gli aggregati dai clienti (tutti o un gruppo)"""
+        scope = "WHERE ? IS NULL OR gruppo_pamm_id = ?"
+        rebuild = (
+            "INSERT INTO gruppi_pamm_aggregati (gruppo_pamm_id, numero_clienti_attivi, numero_clienti_svolti, "
+            "numero_clienti_depositati, totale_depositi, totale_prelievi_prop, totale_prelievi_profit, "
+            "somma_commissioni_percentuale) "
+            "SELECT gruppo_pamm_id, COUNT(*), SUM(stato_prop = 'Svolto'), SUM(deposito_pamm = 'Depositata'), "
+            "COALESCE(SUM(importo_cliente), 0), COALESCE(SUM(prelievo_prop), 0), "
+            "COALESCE(SUM(prelievo_profit), 0), SUM(COALESCE(commissioni_percentuale, 25.0)) "
+            f"FROM clienti_gruppi_pamm {scope} GROUP BY gruppo_pamm_id "
+            "RETURNING gruppo_pamm_id"
+        )
+        rows = self.write([(f"DELETE FROM gruppi_pamm_aggregati {scope}", [p_gruppo_id, p_gruppo_id]),
+                           (rebuild, [p_gruppo_id, p_gruppo_id])], 'gruppi_pamm_aggregati')
+        return len(rows)
+
+def _quote(identifier: str) -> str:
+    """Quota un nome di tabella/colonna (i valori passano sempre come parametri)"""
+    identifier = identifier.strip()
+    if not _IDENTIFIER.match(identifier):
+        raise SQLiteAPIError(f"Identificatore non valido: {identifier!r}", '42601')
+    return f'"{identifier}"'
+
+def _encode(value: Any) -> Any:
+    """Converte un valore Python nel tipo salvato da SQLite"""
+    if value is None or isinstance(value, (str, int, bytes)):
+        return value
+    if isinstance(value, float):
+        return None if math.isnan(value) else value
+    if isinstance(value, Enum):
+        return _encode(value.value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (list, tuple, dict)):
+        return json.dumps(value)
+    if hasattr(value, 'item'):
+        # Scalari numpy/pandas
+        return _encode(value.item())
+    return str(value)
+
+def _split_top_level(text: str) -> List[str]:
+    """Divide per virgola ignorando parentesi e stringhe tra virgolette"""
+    parts, depth, quoted, escaped, current = [], 0, False, False, []
+    for char in text:
+        if escaped:
+            escaped = False
+        elif char == '\\' and quoted:
+            escaped = True
+        elif char == '"':
+            quoted = not quoted
+        elif not quoted and char == '(':
+            depth += 1
+        elif not quoted and char == ')':
+            depth -= 1
+        elif not quoted and depth == 0 and char == ',':
+            parts.append(''.join(current).strip())
+            current = []
+            continue
+        current.append(char)
+    if current:
+        parts.append(''.join(current).strip())
+    return [part for part in parts if part]
+
+def _unquote(value: str) -> str:
+    if len(value) >= 2 and value[0] == value[-1] == '"':
+        return re.sub(r'\\(.)', r'\1', value[1:-1])
+    return value
+
+def _parse_logic(expression: str, joiner: str) -> Tuple[str, list]:
+    """Traduce un filtro logico PostgREST (es. 'a.eq.1,and(b.gt.2,c.ilike.*x*)') in SQL"""
+    clauses, params = [], []
+    for part in _split_top_level(expression):
+        for prefix, nested_joiner in (('and(', 'AND'), ('or(', 'OR')):
+            if part.startswith(prefix) and part.endswith(')'):
+                sql, nested_params = _parse_logic(part[len(prefix):-1], nested_joiner)
+                break
+        else:
+            sql, nested_params = _parse_condition(part)
+        clauses.append(f'({sql})')
+        params.extend(nested_params)
+    return f' {joiner} '.join(clauses) or '1', params
+
+def _parse_condition(condition: str) -> Tuple[str, list]:
+    """Singola condizione colonna.operatore.valore"""
+    try:
+        column, operator, value = condition.split('.', 2)
+    except ValueError:
+        raise SQLiteAPIError(f"Filtro non valido: {condition!r}", 'PGRST100')
+
+    column = _quote(column)
+    value = _unquote(value)
+    if operator in _OPERATORS:
+        return f'{column} {_OPERATORS[operator]} ?', [value]
+    if operator in ('like', 'ilike'):
+        return f"{column} LIKE ? ESCAPE '\\'", [value.replace('*', '%')]
+    if operator == 'is':
+        return f'{column} IS {value.upper()}' if value.lower() in ('null', 'true', 'false') else '0', []
+    if operator == 'in':
+        values = [_unquote(v) for v in _split_top_level(value.strip('()'))]
+        return (f'{column} IN ({",".join("?" * len(values))})', values) if values else ('0', [])
+    raise SQLiteAPIError(f"Operatore non supportato: {operator}", 'PGRST100')
+
+def _parse_select(select: str) -> Tuple[List[str], List[Tuple[str, bool, str]]]:
+    """Colonne e risorse embedded di una select PostgREST"""
+    columns, embeds = [], []
+    for item in _split_top_level(' '.join(select.split())):
+        if '(' in item and item.endswith(')'):
+            name, sub_select = item[:-1].split('(', 1)
+            name, _, hint = name.strip().partition('!')
+            embeds.append((name, hint == 'inner', sub_select))
+        elif item == '*':
+            columns = ['*']
+        elif columns != ['*']:
+            columns.append(item)
+    return columns or ['*'], embeds
+
+def _to_api_error(error: sqlite3.Error) -> SQLiteAPIError:
+    """Mappa gli errori SQLite sui codici PostgreSQL usati da Supabase"""
+    message = str(error)
+    if isinstance(error, sqlite3.IntegrityError):
+        if 'UNIQUE' in message:
+            return SQLiteAPIError(f"duplicate key value violates unique constraint: {message}", '23505')
+        if 'FOREIGN KEY' in message:
+            return SQLiteAPIError(f"violates foreign key constraint: {message}", '23503')
+        if 'NOT NULL' in message:
+            return SQLiteAPIError(f"violates not-null constraint: {message}", '23502')
+    if 'no such table' in message:
+        return SQLiteAPIError(message, '42P01')
+    if 'no such column' in message or 'has no column named' in message:
+        return SQLiteAPIError(message, 'PGRST204')
+    return SQLiteAPIError(message)
@@ -0,0 +1,420 @@
+-- Schema SQLite locale per Dashboard Matematico Prop/Broker
+-- Stesse tabelle e colonne di Supabase, usato quando USE_SUPABASE = False
+-- Creato da Ezio Camporeale
+
+-- ==================== TABELLE AUTENTICAZIONE ====================
+
+CREATE TABLE IF NOT EXISTS roles (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL UNIQUE,
+    description TEXT,
+    permissions JSON DEFAULT '[]',
+    created_at TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now')),
+    updated_at TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now'))
+);
+
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    username TEXT NOT NULL UNIQUE,
+    email TEXT NOT NULL UNIQUE,
+    password_hash TEXT NOT NULL,
+    first_name TEXT,
+    last_name TEXT,
+    phone TEXT,
+    role_id INTEGER REFERENCES roles(id),
+    is_active BOOLEAN DEFAULT 1,
+    is_admin BOOLEAN DEFAULT 0,
+    notes TEXT,
+    last_login TEXT,
+    created_by INTEGER,
+    created_at TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now')),
+    updated_at TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now')),
+    data_creazione TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now')),
+    data_aggiornamento TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now'))
+);
+
+-- ==================== TABELLE BUSINESS ====================
+
+CREATE TABLE IF NOT EXISTS brokers (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    nome_broker TEXT NOT NULL,
+    tipo_broker TEXT,
+    regolamentazione TEXT,
+    paese TEXT,
+    sito_web TEXT,
+    spread_minimo REAL,
+    commissioni REAL,
+    leverage_massimo INTEGER,
+    deposito_minimo REAL,
+    valute_supportate TEXT,
+    piattaforme TEXT,
+    stato TEXT DEFAULT 'Attivo',
+    note TEXT,
+    data_creazione TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now')),
+    data_aggiornamento TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now')),
+    creato_da TEXT,
+    aggiornato_da TEXT
+);
+
+CREATE TABLE IF NOT EXISTS prop_firms (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    nome_prop TEXT NOT NULL,
+    tipo_prop TEXT,
+    capitale_iniziale REAL,
+    drawdown_massimo REAL,
+    profit_target REAL,
+    regole_trading TEXT,
+    restrizioni_orarie TEXT,
+    strumenti_permessi TEXT,
+    broker_associati TEXT,
+    commissioni REAL,
+    fee_mensile REAL,
+    stato TEXT DEFAULT 'Attiva',
+    note TEXT,
+    data_creazione TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now')),
+    data_aggiornamento TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now')),
+    creato_da TEXT,
+    aggiornato_da TEXT
+);
+
+CREATE TABLE IF NOT EXISTS wallets (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    indirizzo_wallet TEXT NOT NULL,
+    tipo_wallet TEXT,
+    nome_wallet TEXT,
+    saldo_attuale REAL,
+    valuta TEXT,
+    exchange TEXT,
+    chiave_privata TEXT,
+    frase_seed TEXT,
+    stato TEXT DEFAULT 'Attivo',
+    note TEXT,
+    data_creazione TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now')),
+    data_aggiornamento TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now')),
+    creato_da TEXT,
+    aggiornato_da TEXT
+);
+
+CREATE TABLE IF NOT EXISTS pack_copiatori (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    numero_pack TEXT NOT NULL,
+    broker_id INTEGER REFERENCES brokers(id),
+    account_number TEXT,
+    password_account TEXT,
+    server_broker TEXT,
+    tipo_account TEXT,
+    capitale_iniziale REAL,
+    saldo_attuale REAL,
+    profit_loss REAL,
+    drawdown_massimo REAL,
+    stato TEXT DEFAULT 'Attivo',
+    note TEXT,
+    data_creazione TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now')),
+    data_aggiornamento TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now')),
+    creato_da TEXT,
+    aggiornato_da TEXT
+);
+
+-- Tabella legacy (un cliente per riga) con le colonne aggiunte da extend_gruppi_pamm_table.sql
+CREATE TABLE IF NOT EXISTS gruppi_pamm (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    nome_gruppo TEXT NOT NULL,
+    manager TEXT,
+    broker_id INTEGER REFERENCES brokers(id),
+    account_pamm TEXT,
+    capitale_totale REAL,
+    numero_partecipanti INTEGER DEFAULT 0,
+    performance_totale REAL,
+    performance_mensile REAL,
+    drawdown_massimo REAL,
+    commissioni_manager REAL,
+    commissioni_broker REAL,
+    stato TEXT DEFAULT 'Attivo',
+    note TEXT,
+    nome_cliente TEXT DEFAULT '',
+    importo_cliente REAL DEFAULT 0.0,
+    stato_prop TEXT DEFAULT 'Non svolto',
+    deposito_pamm TEXT DEFAULT '',
+    quota_prop INTEGER DEFAULT 1,
+    ciclo_numero INTEGER DEFAULT 0,
+    fase_prop TEXT DEFAULT '',
+    operazione_numero INTEGER DEFAULT 0,
+    esito_broker TEXT DEFAULT '',
+    esito_prop TEXT DEFAULT '',
+    prelievo_prop REAL DEFAULT 0.0,
+    prelievo_profit REAL DEFAULT 0.0,
+    commissioni_percentuale REAL DEFAULT 25.0,
+    credenziali_broker TEXT DEFAULT '',
+    credenziali_prop TEXT DEFAULT '',
+    chi_ha_comprato_prop TEXT DEFAULT '',
+    responsabili_gruppo TEXT DEFAULT '',
+    numero_membri_gruppo INTEGER DEFAULT 0,
+    data_creazione TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now')),
+    data_aggiornamento TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now')),
+    creato_da TEXT,
+    aggiornato_da TEXT
+);
+
+CREATE TABLE IF NOT EXISTS gruppi_pamm_gruppi (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    nome_gruppo TEXT NOT NULL,
+    manager TEXT NOT NULL,
+    broker_id INTEGER NOT NULL REFERENCES brokers(id),
+    account_pamm TEXT NOT NULL,
+    capitale_totale REAL DEFAULT 0.0,
+    numero_membri_gruppo INTEGER DEFAULT 0,
+    responsabili_gruppo TEXT,
+    stato TEXT DEFAULT 'ATTIVO',
+    note TEXT,
+    data_creazione TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now')),
+    data_aggiornamento TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now')),
+    creato_da TEXT,
+    aggiornato_da TEXT,
+    UNIQUE(nome_gruppo, broker_id)
+);
+
+CREATE TABLE IF NOT EXISTS clienti_gruppi_pamm (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    gruppo_pamm_id INTEGER NOT NULL REFERENCES gruppi_pamm_gruppi(id) ON DELETE CASCADE,
+    nome_cliente TEXT NOT NULL,
+    importo_cliente REAL DEFAULT 0.0,
+    stato_prop TEXT DEFAULT 'Non svolto',
+    deposito_pamm TEXT DEFAULT '',
+    quota_prop INTEGER DEFAULT 1,
+    ciclo_numero INTEGER DEFAULT 0,
+    fase_prop TEXT,
+    operazione_numero TEXT,
+    esito_broker TEXT,
+    esito_prop TEXT,
+    prelievo_prop REAL DEFAULT 0.0,
+    prelievo_profit REAL DEFAULT 0.0,
+    commissioni_percentuale REAL DEFAULT 25.0,
+    credenziali_broker TEXT,
+    credenziali_prop TEXT,
+    chi_ha_comprato_prop TEXT,
+    data_creazione TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now')),
+    data_aggiornamento TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now')),
+    creato_da TEXT,
+    aggiornato_da TEXT,
+    UNIQUE(gruppo_pamm_id, nome_cliente)
+);
+
+-- Aggregati per gruppo mantenuti dai trigger (come create_gruppi_aggregati.sql)
+CREATE TABLE IF NOT EXISTS gruppi_pamm_aggregati (
+    gruppo_pamm_id INTEGER PRIMARY KEY REFERENCES gruppi_pamm_gruppi(id) ON DELETE CASCADE,
+    numero_clienti_attivi INTEGER NOT NULL DEFAULT 0,
+    numero_clienti_svolti INTEGER NOT NULL DEFAULT 0,
+    numero_clienti_depositati INTEGER NOT NULL DEFAULT 0,
+    totale_depositi REAL NOT NULL DEFAULT 0.0,
+    totale_prelievi_prop REAL NOT NULL DEFAULT 0.0,
+    totale_prelievi_profit REAL NOT NULL DEFAULT 0.0,
+    somma_commissioni_percentuale REAL NOT NULL DEFAULT 0.0,
+    data_aggiornamento TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now'))
+);
+
+CREATE TABLE IF NOT EXISTS incroci (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    nome_incrocio TEXT NOT NULL,
+    broker_id INTEGER REFERENCES brokers(id),
+    prop_id INTEGER REFERENCES prop_firms(id),
+    wallet_id INTEGER REFERENCES wallets(id),
+    gruppo_pamm_id INTEGER,
+    pack_copiatore_id INTEGER REFERENCES pack_copiatori(id),
+    tipo_incrocio TEXT,
+    descrizione TEXT,
+    performance_totale REAL,
+    rischio_totale REAL,
+    stato TEXT DEFAULT 'Attivo',
+    note TEXT,
+    data_creazione TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now')),
+    data_aggiornamento TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now')),
+    creato_da TEXT,
+    aggiornato_da TEXT
+);
+
+CREATE TABLE IF NOT EXISTS transazioni_wallet (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    wallet_id INTEGER REFERENCES wallets(id),
+    tipo_transazione TEXT,
+    importo REAL,
+    valuta TEXT,
+    indirizzo_destinazione TEXT,
+    hash_transazione TEXT,
+    fee_transazione REAL,
+    stato TEXT DEFAULT 'Pending',
+    note TEXT,
+    data_transazione TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now')),
+    data_creazione TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now')),
+    creato_da TEXT
+);
+
+CREATE TABLE IF NOT EXISTS performance_history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    entita_tipo TEXT,
+    entita_id INTEGER,
+    data_performance TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now')),
+    valore_iniziale REAL,
+    valore_finale REAL,
+    profit_loss REAL,
+    percentuale_variazione REAL,
+    drawdown REAL,
+    note TEXT,
+    data_creazione TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now')),
+    creato_da TEXT
+);
+
+-- ==================== INDICI ====================
+
+CREATE INDEX IF NOT EXISTS idx_brokers_stato ON brokers(stato);
+CREATE INDEX IF NOT EXISTS idx_prop_firms_stato ON prop_firms(stato);
+CREATE INDEX IF NOT EXISTS idx_wallets_stato ON wallets(stato);
+CREATE INDEX IF NOT EXISTS idx_pack_copiatori_stato ON pack_copiatori(stato);
+CREATE INDEX IF NOT EXISTS idx_gruppi_pamm_stato_prop ON gruppi_pamm(stato_prop);
+CREATE INDEX IF NOT EXISTS idx_gruppi_pamm_nome_gruppo ON gruppi_pamm(nome_gruppo);
+CREATE INDEX IF NOT EXISTS idx_incroci_stato ON incroci(stato);
+CREATE INDEX IF NOT EXISTS idx_users_role_id ON users(role_id);
+CREATE INDEX IF NOT EXISTS idx_gruppi_stato ON gruppi_pamm_gruppi(stato);
+CREATE INDEX IF NOT EXISTS idx_clienti_nome ON clienti_gruppi_pamm(nome_cliente);
+CREATE INDEX IF NOT EXISTS idx_transazioni_wallet_wallet_id ON transazioni_wallet(wallet_id);
+CREATE INDEX IF NOT EXISTS idx_performance_history_entita ON performance_history(entita_tipo, entita_id);
+
+-- Cursori keyset (data_aggiornamento, id) usati da _fetch_page
+CREATE INDEX IF NOT EXISTS idx_brokers_sync ON brokers(data_aggiornamento, id);
+CREATE INDEX IF NOT EXISTS idx_prop_firms_sync ON prop_firms(data_aggiornamento, id);
+CREATE INDEX IF NOT EXISTS idx_wallets_sync ON wallets(data_aggiornamento, id);
+CREATE INDEX IF NOT EXISTS idx_pack_copiatori_sync ON pack_copiatori(data_aggiornamento, id);
+CREATE INDEX IF NOT EXISTS idx_incroci_sync ON incroci(data_aggiornamento, id);
+CREATE INDEX IF NOT EXISTS idx_gruppi_pamm_gruppi_sync ON gruppi_pamm_gruppi(data_aggiornamento, id);
+CREATE INDEX IF NOT EXISTS idx_clienti_gruppi_pamm_sync ON clienti_gruppi_pamm(data_aggiornamento, id);
+
+-- ==================== VISTE ====================
+
+-- Stessa vista di create_clienti_gruppi_view.sql
+CREATE VIEW IF NOT EXISTS v_clienti_gruppi_pamm AS
+SELECT
+    c.id,
+    c.gruppo_pamm_id,
+    COALESCE(g.nome_gruppo, '') AS nome_gruppo,
+    COALESCE(g.manager, '') AS manager,
+    COALESCE(g.broker_id, 0) AS broker_id,
+    COALESCE(g.account_pamm, '') AS account_pamm,
+    COALESCE(g.capitale_totale, 0.0) AS capitale_totale,
+    COALESCE(g.numero_membri_gruppo, 0) AS numero_membri_gruppo,
+    COALESCE(g.responsabili_gruppo, '') AS responsabili_gruppo,
+    COALESCE(g.stato, 'ATTIVO') AS stato,
+    COALESCE(c.nome_cliente, '') AS nome_cliente,
+    COALESCE(c.importo_cliente, 0.0) AS importo_cliente,
+    COALESCE(c.stato_prop, 'Non svolto') AS stato_prop,
+    COALESCE(c.deposito_pamm, '') AS deposito_pamm,
+    COALESCE(c.quota_prop, 1) AS quota_prop,
+    COALESCE(c.ciclo_numero, 0) AS ciclo_numero,
+    COALESCE(c.fase_prop, '') AS fase_prop,
+    COALESCE(c.operazione_numero, '') AS operazione_numero,
+    COALESCE(c.esito_broker, '') AS esito_broker,
+    COALESCE(c.esito_prop, '') AS esito_prop,
+    COALESCE(c.prelievo_prop, 0.0) AS prelievo_prop,
+    COALESCE(c.prelievo_profit, 0.0) AS prelievo_profit,
+    COALESCE(c.commissioni_percentuale, 25.0) AS commissioni_percentuale,
+    COALESCE(c.credenziali_broker, '') AS credenziali_broker,
+    COALESCE(c.credenziali_prop, '') AS credenziali_prop,
+    COALESCE(c.chi_ha_comprato_prop, '') AS chi_ha_comprato_prop,
+    c.data_creazione,
+    c.data_aggiornamento,
+    COALESCE(c.creato_da, '') AS creato_da,
+    COALESCE(c.aggiornato_da, '') AS aggiornato_da
+FROM clienti_gruppi_pamm c
+JOIN gruppi_pamm_gruppi g ON g.id = c.gruppo_pamm_id;
+
+-- ==================== TRIGGER ====================
+
+-- Aggregati per gruppo: ogni scrittura sui clienti applica solo la propria differenza
+CREATE TRIGGER IF NOT EXISTS clienti_gruppi_pamm_aggregati_insert
+AFTER INSERT ON clienti_gruppi_pamm
+BEGIN
+    INSERT INTO gruppi_pamm_aggregati (
+        gruppo_pamm_id, numero_clienti_attivi, numero_clienti_svolti, numero_clienti_depositati,
+        totale_depositi, totale_prelievi_prop, totale_prelievi_profit, somma_commissioni_percentuale
+    ) VALUES (
+        NEW.gruppo_pamm_id, 1, NEW.stato_prop = 'Svolto', NEW.deposito_pamm = 'Depositata',
+        COALESCE(NEW.importo_cliente, 0), COALESCE(NEW.prelievo_prop, 0),
+        COALESCE(NEW.prelievo_profit, 0), COALESCE(NEW.commissioni_percentuale, 25.0)
+    )
+    ON CONFLICT (gruppo_pamm_id) DO UPDATE SET
+        numero_clienti_attivi = numero_clienti_attivi + excluded.numero_clienti_attivi,
+        numero_clienti_svolti = numero_clienti_svolti + excluded.numero_clienti_svolti,
+        numero_clienti_depositati = numero_clienti_depositati + excluded.numero_clienti_depositati,
+        totale_depositi = totale_depositi + excluded.totale_depositi,
+        totale_prelievi_prop = totale_prelievi_prop + excluded.totale_prelievi_prop,
+        totale_prelievi_profit = totale_prelievi_profit + excluded.totale_prelievi_profit,
+        somma_commissioni_percentuale = somma_commissioni_percentuale + excluded.somma_commissioni_percentuale,
+        data_aggiornamento = excluded.data_aggiornamento;
+END;
+
+CREATE TRIGGER IF NOT EXISTS clienti_gruppi_pamm_aggregati_delete
+AFTER DELETE ON clienti_gruppi_pamm
+BEGIN
+    UPDATE gruppi_pamm_aggregati SET
+        numero_clienti_attivi = numero_clienti_attivi - 1,
+        numero_clienti_svolti = numero_clienti_svolti - (OLD.stato_prop = 'Svolto'),
+        numero_clienti_depositati = numero_clienti_depositati - (OLD.deposito_pamm = 'Depositata'),
+        totale_depositi = totale_depositi - COALESCE(OLD.importo_cliente, 0),
+        totale_prelievi_prop = totale_prelievi_prop - COALESCE(OLD.prelievo_prop, 0),
+        totale_prelievi_profit = totale_prelievi_profit - COALESCE(OLD.prelievo_profit, 0),
+        somma_commissioni_percentuale = somma_commissioni_percentuale - COALESCE(OLD.commissioni_percentuale, 25.0),
+        data_aggiornamento = strftime('%Y-%m-%dT%H:%M:%f', 'now')
+    WHERE gruppo_pamm_id = OLD.gruppo_pamm_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS clienti_gruppi_pamm_aggregati_update
+AFTER UPDATE OF gruppo_pamm_id, stato_prop, deposito_pamm, importo_cliente,
+    prelievo_prop, prelievo_profit, commissioni_percentuale ON clienti_gruppi_pamm
+BEGIN
+    UPDATE gruppi_pamm_aggregati SET
+        numero_clienti_attivi = numero_clienti_attivi - 1,
+        numero_clienti_svolti = numero_clienti_svolti - (OLD.stato_prop = 'Svolto'),
+        numero_clienti_depositati = numero_clienti_depositati - (OLD.deposito_pamm = 'Depositata'),
+        totale_depositi = totale_depositi - COALESCE(OLD.importo_cliente, 0),
+        totale_prelievi_prop = totale_prelievi_prop - COALESCE(OLD.prelievo_prop, 0),
+        totale_prelievi_profit = totale_prelievi_profit - COALESCE(OLD.prelievo_profit, 0),
+        somma_commissioni_percentuale = somma_commissioni_percentuale - COALESCE(OLD.commissioni_percentuale, 25.0),
+        data_aggiornamento = strftime('%Y-%m-%dT%H:%M:%f', 'now')
+    WHERE gruppo_pamm_id = OLD.gruppo_pamm_id;
+    INSERT INTO gruppi_pamm_aggregati (
+        gruppo_pamm_id, numero_clienti_attivi, numero_clienti_svolti, numero_clienti_depositati,
+        totale_depositi, totale_prelievi_prop, totale_prelievi_profit, somma_commissioni_percentuale
+    ) VALUES (
+        NEW.gruppo_pamm_id, 1, NEW.stato_prop = 'Svolto', NEW.deposito_pamm = 'Depositata',
+        COALESCE(NEW.importo_cliente, 0), COALESCE(NEW.prelievo_prop, 0),
+        COALESCE(NEW.prelievo_profit, 0), COALESCE(NEW.commissioni_percentuale, 25.0)
+    )
+    ON CONFLICT (gruppo_pamm_id) DO UPDATE SET
+        numero_clienti_attivi = numero_clienti_attivi + excluded.numero_clienti_attivi,
+        numero_clienti_svolti = numero_clienti_svolti + excluded.numero_clienti_svolti,
+        numero_clienti_depositati = numero_clienti_depositati + excluded.numero_clienti_depositati,
+        totale_depositi = totale_depositi + excluded.totale_depositi,
+        totale_prelievi_prop = totale_prelievi_prop + excluded.totale_prelievi_prop,
+        totale_prelievi_profit = totale_prelievi_profit + excluded.totale_prelievi_profit,
+        somma_commissioni_percentuale = somma_commissioni_percentuale + excluded.somma_commissioni_percentuale,
+        data_aggiornamento = excluded.data_aggiornamento;
+END;
+
+-- ==================== DATI DI DEFAULT ====================
+
+INSERT OR IGNORE INTO roles (name, description, permissions) VALUES
+('Admin', 'Amministratore completo del sistema', '["all"]'),
+('Manager', 'Manager con permessi di gestione completa', '["manage_brokers", "manage_props", "manage_wallets", "manage_packs", "manage_pamm", "manage_incroci", "view_reports"]'),
+('Trader', 'Trader con permessi di trading', '["view_brokers", "view_props", "manage_wallets", "view_packs", "view_pamm", "view_incroci"]'),
+('Copiatore', 'Copiatore con permessi limitati', '["view_brokers", "view_props", "manage_packs", "view_wallets"]'),
+('PAMM Manager', 'Manager PAMM con permessi specifici', '["view_brokers", "manage_pamm", "view_wallets", "view_incroci"]'),
+('Viewer', 'Visualizzatore con permessi limitati', '["view_brokers", "view_props", "view_wallets", "view_packs", "view_pamm", "view_incroci"]');
+
+-- Aggregati dei clienti presenti prima dei trigger
+INSERT OR IGNORE INTO gruppi_pamm_aggregati (
+    gruppo_pamm_id, numero_clienti_attivi, numero_clienti_svolti, numero_clienti_depositati,
+    totale_depositi, totale_prelievi_prop, totale_prelievi_profit, somma_commissioni_percentuale
+)
+SELECT gruppo_pamm_id, COUNT(*), SUM(stato_prop = 'Svolto'), SUM(deposito_pamm = 'Depositata'),
+       COALESCE(SUM(importo_cliente), 0), COALESCE(SUM(prelievo_prop), 0),
+       COALESCE(SUM(prelievo_profit), 0), SUM(COALESCE(commissioni_percentuale, 25.0))
+FROM clienti_gruppi_pamm
+GROUP BY gruppo_pamm_id;
@@ -0,0 +1,200 @@
+"""
+Sincronizzazione incrementale delle tabelle in un mirror locale
+Ad ogni refresh scarica solo le righe modificate dopo l'high-water mark e applica i tombstone
+Entro l'intervallo minimo il mirror si usa senza refresh, salvo scritture del manager sulla tabella
+Creato da Ezio Camporeale
+"""
+
+import time
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from database.error_codes import MISSING_TABLE_CODES, MISSING_COLUMN_CODES, error_code
+
+class TableMirror:
+    """Copia locale di una tabella con high-water mark su (data_aggiornamento, id)"""
+    
+    def __init__(self, table: str):
+        self.table = table
+        self.rows: Dict[int, Dict[str, Any]] = {}
+        self.high_water: Optional[Tuple[str, int]] = None
+        self.synced = False
+        # Istante (monotonic) e generazione della tabella nella cache delle query all'ultimo refresh
+        self.last_sync: Optional[float] = None
+        self.generation: Optional[int] = None
+        self.lock = threading.Lock()
+        # Righe ordinate per id, ricostruite solo dopo una modifica del mirror
+        self._ordered: Optional[List[Dict[str, Any]]] = None
+    
+    def ordered_rows(self) -> List[Dict[str, Any]]:
+        """Righe ordinate per id (lista condivisa: da non modificare)"""
+        if self._ordered is None:
+            self._ordered = [self.rows[row_id] for row_id in sorted(self.rows)]
+        return self._ordered
+    
+    def clear(self):
+        """Svuota il mirror"""
+        self.rows = {}
+        self.high_water = None
+        self.synced = False
+        self._ordered = None
+    
+    def remove(self, row_id: int) -> bool:
+        """Rimuove una riga eliminata; True se era presente"""
+        if self.rows.pop(row_id, None) is None:
+            return False
+        self._ordered = None
+        return True
+    
+    def apply(self, rows: List[Dict[str, Any]]):
+        """Inserisce o sostituisce le righe e avanza l'high-water mark"""
+        if rows:
+            self._ordered = None
+        for row in rows:
+            self.rows[row['id']] = row
+            cursor = (row.get('data_aggiornamento') or '', row['id'])
+            if self.high_water is None or cursor > self.high_water:
+                self.high_water = cursor
+
+class SyncEngine:
+    """Mantiene un mirror locale delle tabelle con refresh delta"""
+    
+    TOMBSTONES_TABLE = 'sync_tombstones'
+    
+    def __init__(self, manager, tables: List[str], overlap_seconds: float = 5.0, min_interval_seconds: float = 0.0,
+                 generation: Optional[Callable[[str], int]] = None):
+        self.manager = manager
+        self.mirrors = {table: TableMirror(table) for table in tables}
+        self.overlap_seconds = overlap_seconds
+        self.min_interval_seconds = min_interval_seconds
+        # Generazione della tabella nella cache delle query: cambia ad ogni scrittura del manager
+        self.generation = generation
+        self.enabled = True
+        self._tombstone_cursor: Optional[int] = None
+        self._tombstone_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {'full_syncs': 0, 'delta_syncs': 0, 'skipped_syncs': 0, 'rows_pulled': 0, 'rows_deleted': 0, 'errors': 0}
+    
+    def rows(self, table: str, refresh: bool = True) -> Optional[List[Dict[str, Any]]]:
+        """Righe del mirror ordinate per id (None se il mirror non è utilizzabile); la lista non va modificata"""
+        mirror = self.mirrors.get(table)
+        if mirror is None or not self.enabled:
+            return None
+        if refresh and not self.refresh(table):
+            return None
+        with mirror.lock:
+            return mirror.ordered_rows()
+    
+    def refresh(self, table: str, force: bool = False) -> bool:
+        """Allinea il mirror: caricamento completo la prima volta, poi solo le modifiche (saltato se ancora fresco)"""
+        mirror = self.mirrors[table]
+        # Letta prima del refresh: una scrittura concorrente forza il refresh successivo
+        generation = self.generation(table) if self.generation is not None else None
+        if not force and self._is_fresh(mirror, generation):
+            self._count('skipped_syncs')
+            return True
+        try:
+            self._ensure_tombstone_cursor()
+            with mirror.lock:
+                if not force and self._is_fresh(mirror, generation):
+                    # Un'altra sessione ha appena completato il refresh
+                    self._count('skipped_syncs')
+                    return True
+                full = not mirror.synced
+                pulled = self._pull_full(mirror) if full else self._pull_delta(mirror)
+                mirror.last_sync = time.monotonic()
+                mirror.generation = generation
+            self._count('full_syncs' if full else 'delta_syncs')
+            self._count('rows_pulled', pulled)
+            self._apply_tombstones()
+            return True
+        except Exception as e:
+            self._count('errors')
+            if error_code(e) in MISSING_TABLE_CODES + MISSING_COLUMN_CODES:
+                # Schema di sincronizzazione non installato: si torna alle letture dirette
+                self.enabled = False
+                logging.warning(f"⚠️ Mirror locale disattivato ({table}): {e}")
+            elif mirror.synced:
+                logging.warning(f"⚠️ Refresh delta di {table} fallito, uso il mirror esistente: {e}")
+            else:
+                # Errore transitorio al primo caricamento: lettura diretta, si riprova al prossimo refresh
+                logging.warning(f"⚠️ Caricamento del mirror {table} fallito, uso la lettura diretta: {e}")
+            return mirror.synced and self.enabled
+    
+    def _is_fresh(self, mirror: TableMirror, generation: Optional[int]) -> bool:
+        """Mirror sincronizzato entro l'intervallo minimo e senza scritture del manager da allora"""
+        return (mirror.synced and mirror.last_sync is not None and mirror.generation == generation
+                and time.monotonic() - mirror.last_sync < self.min_interval_seconds)
+    
+    def _count(self, name: str, amount: int = 1):
+        """Aggiorna un contatore (refresh concorrenti da più sessioni)"""
+        with self._stats_lock:
+            self._stats[name] += amount
+    
+    def _pull_full(self, mirror: TableMirror) -> int:
+        """Caricamento completo della tabella"""
+        mirror.clear()
+        rows = list(self.manager.iter_table(mirror.table, order_by='data_aggiornamento'))
+        mirror.apply(rows)
+        mirror.synced = True
+        logging.info(f"✅ Mirror {mirror.table}: caricamento completo di {len(rows)} righe")
+        return len(rows)
+    
+    def _pull_delta(self, mirror: TableMirror) -> int:
+        """Righe modificate dopo l'high-water mark (con una finestra di sovrapposizione)"""
+        if mirror.high_water is None:
+            return self._pull_full(mirror)
+        
+        # Le transazioni concorrenti possono confermare righe con timestamp appena precedenti
+        since = self._minus_overlap(mirror.high_water[0])
+        rows = list(self.manager.iter_table(mirror.table, order_by='data_aggiornamento', after=(since, 0)))
+        mirror.apply(rows)
+        return len(rows)
+    
+    def _minus_overlap(self, timestamp: str) -> str:
+        """Sottrae la finestra di sovrapposizione da un timestamp ISO"""
+        try:
+            return (datetime.fromisoformat(timestamp) - timedelta(seconds=self.overlap_seconds)).isoformat()
+        except ValueError:
+            return timestamp
+    
+    def _ensure_tombstone_cursor(self):
+        """Alla prima sincronizzazione parte dall'ultimo tombstone esistente"""
+        with self._tombstone_lock:
+            if self._tombstone_cursor is not None:
+                return
+            result = self.manager.supabase.table(self.TOMBSTONES_TABLE).select('id').order('id', desc=True).limit(1).execute()
+            self._tombstone_cursor = result.data[0]['id'] if result.data else 0
+    
+    def _apply_tombstones(self):
+        """Rimuove dai mirror le righe eliminate dopo l'ultimo tombstone letto"""
+        with self._tombstone_lock:
+            tombstones = list(self.manager.iter_table(self.TOMBSTONES_TABLE, after=self._tombstone_cursor))
+            for tombstone in tombstones:
+                mirror = self.mirrors.get(tombstone['table_name'])
+                if mirror is not None:
+                    with mirror.lock:
+                        if mirror.remove(tombstone['row_id']):
+                            self._count('rows_deleted')
+                self._tombstone_cursor = tombstone['id']
+    
+    def reset(self):
+        """Svuota i mirror: il prossimo refresh esegue un caricamento completo"""
+        for mirror in self.mirrors.values():
+            with mirror.lock:
+                mirror.clear()
+        with self._tombstone_lock:
+            self._tombstone_cursor = None
+        self.enabled = True
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Contatori di sincronizzazione e dimensione dei mirror"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['enabled'] = self.enabled
+        stats['tables'] = {
+            table: {'rows': len(mirror.rows), 'synced': mirror.synced, 'high_water': mirror.high_water[0] if mirror.high_water else None}
+            for table, mirror in self.mirrors.items()
+        }
+        return stats
@@ -0,0 +1,78 @@
+"""
+Trasformatori colonnari per le righe clienti + gruppi PAMM
+Un'unica definizione di colonne, default e dtype per tutte le query
+Creato da Ezio Camporeale
+"""
+
+from typing import List, Dict, Any, Optional
+import pandas as pd
+
+# Colonne della vista v_clienti_gruppi_pamm: (nome, dtype, default)
+CLIENTI_GRUPPI_COLUMNS = [
+    ('id', 'int64', 0),
+    ('gruppo_pamm_id', 'int64', 0),
+    ('nome_gruppo', 'object', ''),
+    ('manager', 'object', ''),
+    ('broker_id', 'int64', 0),
+    ('account_pamm', 'object', ''),
+    ('capitale_totale', 'float64', 0.0),
+    ('numero_membri_gruppo', 'int64', 0),
+    ('responsabili_gruppo', 'object', ''),
+    ('stato', 'object', 'ATTIVO'),
+    ('nome_cliente', 'object', ''),
+    ('importo_cliente', 'float64', 0.0),
+    ('stato_prop', 'object', 'Non svolto'),
+    ('deposito_pamm', 'object', ''),
+    ('quota_prop', 'int64', 1),
+    ('ciclo_numero', 'int64', 0),
+    ('fase_prop', 'object', ''),
+    ('operazione_numero', 'object', ''),
+    ('esito_broker', 'object', ''),
+    ('esito_prop', 'object', ''),
+    ('prelievo_prop', 'float64', 0.0),
+    ('prelievo_profit', 'float64', 0.0),
+    ('commissioni_percentuale', 'float64', 25.0),
+    ('credenziali_broker', 'object', ''),
+    ('credenziali_prop', 'object', ''),
+    ('chi_ha_comprato_prop', 'object', ''),
+    ('data_creazione', 'object', ''),
+    ('data_aggiornamento', 'object', ''),
+    ('creato_da', 'object', ''),
+    ('aggiornato_da', 'object', ''),
+]
+
+CLIENTI_GRUPPI_COLUMN_NAMES = [name for name, _, _ in CLIENTI_GRUPPI_COLUMNS]
+DATE_COLUMNS = ['data_creazione', 'data_aggiornamento']
+
+# Prefisso delle colonne del gruppo nella join embedded di PostgREST
+EMBEDDED_GRUPPO_PREFIX = 'gruppi_pamm_gruppi.'
+
+def normalize_clienti_gruppi(rows: List[Dict[str, Any]], columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """Crea il DataFrame colonnare con default e dtype (accetta righe della vista o della join embedded)"""
+    spec = [c for c in CLIENTI_GRUPPI_COLUMNS if not columns or c[0] == 'id' or c[0] in columns]
+    if not rows:
+        return pd.DataFrame({name: pd.Series(dtype=dtype) for name, dtype, _ in spec})
+    
+    df = pd.json_normalize(rows) if isinstance(rows[0].get('gruppi_pamm_gruppi'), dict) else pd.DataFrame.from_records(rows)
+    
+    # Appiattisce la join embedded: l'id del gruppo è già in gruppo_pamm_id
+    embedded = [c for c in df.columns if c.startswith(EMBEDDED_GRUPPO_PREFIX)]
+    if embedded:
+        df = df.drop(columns=[EMBEDDED_GRUPPO_PREFIX + 'id'], errors='ignore')
+        df = df.rename(columns={c: c[len(EMBEDDED_GRUPPO_PREFIX):] for c in embedded})
+    
+    df = df.reindex(columns=[name for name, _, _ in spec])
+    df = df.fillna({name: default for name, _, default in spec})
+    return df.astype({name: dtype for name, dtype, _ in spec})
+
+def clienti_gruppi_to_dataframe(rows: List[Dict[str, Any]], columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """DataFrame pronto per l'analisi: come normalize_clienti_gruppi ma con le date convertite"""
+    df = normalize_clienti_gruppi(rows, columns)
+    for column in DATE_COLUMNS:
+        if column in df.columns:
+            df[column] = pd.to_datetime(df[column].replace('', None), errors='coerce', utc=True)
+    return df
+
+def clienti_gruppi_to_records(rows: List[Dict[str, Any]], columns: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """Righe normalizzate come lista di dict (formato restituito dai metodi get_*)"""
+    return normalize_clienti_gruppi(rows, columns).to_dict('records')
@@ -0,0 +1,99 @@
+"""
+Coda write-behind per scritture non urgenti (es. ultimo login)
+Le scritture vengono accodate, unite per chiave e inviate a lotti da un thread in background
+Creato da Ezio Camporeale
+"""
+
+import atexit
+import logging
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+
+class WriteBehindQueue:
+    """Accoda valori per chiave (l'ultimo vince) e li passa a flush_fn ogni flush_interval secondi"""
+
+    def __init__(self, flush_fn: Callable[[Dict[Hashable, Any]], None], flush_interval: float = 5.0,
+                 max_batch: int = 100, name: str = 'write-behind'):
+        self.flush_fn = flush_fn
+        self.flush_interval = flush_interval
+        self.max_batch = max(1, max_batch)
+        self.name = name
+        self._pending: Dict[Hashable, Any] = {}
+        self._lock = threading.Lock()
+        # Serializza i flush: thread in background e flush() espliciti non si sovrappongono
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+        self._stats = {'submitted': 0, 'coalesced': 0, 'flushed': 0, 'batches': 0, 'errors': 0}
+
+    def submit(self, key: Hashable, value: Any):
+        """Accoda una scrittura; se la chiave è già in coda il valore viene sostituito"""
+        with self._lock:
+            if self._closed:
+                raise RuntimeError(f"Coda {self.name} chiusa")
+            self._stats['submitted'] += 1
+            if key in self._pending:
+                self._stats['coalesced'] += 1
+            self._pending[key] = value
+            full = len(self._pending) >= self.max_batch
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+                # Le scritture ancora in coda all'uscita del processo non vanno perse
+                atexit.register(self.close)
+        if full:
+            self._wakeup.set()
+
+    def flush(self) -> int:
+        """Invia subito le scritture in coda; restituisce quante ne sono state inviate"""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+            if not batch:
+                return 0
+            try:
+                self.flush_fn(batch)
+            except Exception as e:
+                logging.error(f"❌ Errore flush coda {self.name} ({len(batch)} scritture): {e}")
+                with self._lock:
+                    self._stats['errors'] += 1
+                    # Le scritture non riuscite tornano in coda, senza sovrascrivere quelle più recenti
+                    for key, value in batch.items():
+                        self._pending.setdefault(key, value)
+                return 0
+            with self._lock:
+                self._stats['flushed'] += len(batch)
+                self._stats['batches'] += 1
+            return len(batch)
+
+    def pending(self) -> int:
+        """Scritture in attesa"""
+        with self._lock:
+            return len(self._pending)
+
+    def close(self, timeout: float = 5.0):
+        """Ferma il thread dopo l'ultimo flush"""
+        with self._lock:
+            self._closed = True
+            thread = self._thread
+        self._wakeup.set()
+        if thread is not None:
+            thread.join(timeout)
+        self.flush()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Contatori della coda"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['pending'] = len(self._pending)
+            return stats
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+            with self._lock:
+                if self._closed:
+                    return
@@ -207,7 +207,7 @@ class GruppoPAMM:
     creato_da: str = ""
     aggiornato_da: str = ""
     
-    # Calcoli automatici (verranno calcolati dinamicamente)
+    # Calcoli automatici (mantenuti dai trigger in gruppi_pamm_aggregati, vedi create_gruppi_aggregati.sql)
     totale_depositi: float = 0.0
     totale_prelievi_prop: float = 0.0
     totale_prelievi_profit: float = 0.0
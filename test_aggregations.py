@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Test per gli aggregati per gruppo dei clienti PAMM
+Verifica un solo groupby contro il calcolo gruppo per gruppo, totali generali e colonne mancanti
+Creato da Ezio Camporeale
+"""
+
+import sys
+import time
+from pathlib import Path
+
+# Aggiungi il percorso della directory corrente al path di Python
+current_dir = Path(__file__).parent
+sys.path.append(str(current_dir))
+
+import pandas as pd
+from database.transformers import clienti_gruppi_to_dataframe
+from database.aggregations import group_aggregates, summarize, totals_from_aggregates
+
+def _clienti(gruppi: int = 3, clienti_per_gruppo: int = 4):
+    rows = []
+    for g in range(1, gruppi + 1):
+        for c in range(clienti_per_gruppo):
+            rows.append({
+                'id': g * 100 + c,
+                'gruppo_pamm_id': g,
+                'nome_gruppo': f'Gruppo {g}',
+                'manager': f'manager {g}',
+                'nome_cliente': f'CLIENTE {g}-{c}',
+                'importo_cliente': 100.0 * (c + 1),
+                'stato_prop': 'Svolto' if c % 2 == 0 else 'Non svolto',
+                'deposito_pamm': 'Depositata' if c == 0 else '',
+                'prelievo_prop': 10.0,
+                'prelievo_profit': 5.0 * c,
+                'commissioni_percentuale': 25.0 if c else 30.0,
+            })
+    return clienti_gruppi_to_dataframe(rows)
+
+def test_matches_per_group_masks():
+    """Lo stesso risultato del vecchio calcolo con una maschera per gruppo"""
+    df = _clienti()
+    aggregates = group_aggregates(df).set_index('gruppo_pamm_id')
+
+    for gruppo_id in df['gruppo_pamm_id'].unique():
+        gruppo = df[df['gruppo_pamm_id'] == gruppo_id]
+        row = aggregates.loc[gruppo_id]
+        assert row['numero_clienti'] == len(gruppo)
+        assert row['numero_svolti'] == len(gruppo[gruppo['stato_prop'] == 'Svolto'])
+        assert row['numero_depositati'] == len(gruppo[gruppo['deposito_pamm'] == 'Depositata'])
+        assert row['totale_importi'] == gruppo['importo_cliente'].sum()
+        assert row['totale_prelievi_profit'] == gruppo['prelievo_profit'].sum()
+        assert row['commissioni_medie'] == gruppo['commissioni_percentuale'].mean()
+        assert row['nome_gruppo'] == gruppo['nome_gruppo'].iloc[0]
+    print("✅ Aggregati uguali al calcolo per gruppo")
+
+def test_totals_and_summary():
+    """Totali generali pesati e riepilogo di un insieme di clienti"""
+    df = _clienti()
+    totals = totals_from_aggregates(group_aggregates(df))
+    summary = summarize(df)
+
+    assert totals['numero_gruppi'] == 3 and totals['numero_clienti'] == 12
+    assert totals['totale_importi'] == df['importo_cliente'].sum() == summary['totale_importi']
+    assert abs(totals['commissioni_medie'] - df['commissioni_percentuale'].mean()) < 1e-9
+    assert summary['numero_svolti'] == 6 and summary['numero_depositati'] == 3
+    print("✅ Totali generali corretti")
+
+def test_missing_commission_defaults():
+    """Commissioni mancanti contate come 25%, come negli aggregati SQL"""
+    df = pd.DataFrame([{'gruppo_pamm_id': 1, 'commissioni_percentuale': 30.0},
+                       {'gruppo_pamm_id': 1, 'commissioni_percentuale': None}])
+    assert group_aggregates(df).iloc[0]['commissioni_medie'] == 27.5
+    assert summarize(df)['commissioni_medie'] == 27.5
+    print("✅ Commissioni mancanti con il default")
+
+def test_missing_columns_and_empty():
+    """Colonne assenti saltate, DataFrame vuoto senza errori"""
+    df = pd.DataFrame([{'nome_gruppo': 'A', 'stato_prop': 'Svolto'}, {'nome_gruppo': 'A', 'stato_prop': ''}])
+    aggregates = group_aggregates(df, by='nome_gruppo')
+    assert list(aggregates.columns) == ['nome_gruppo', 'numero_clienti', 'numero_svolti']
+    assert aggregates.iloc[0]['numero_svolti'] == 1
+
+    empty = _clienti(gruppi=0)
+    assert group_aggregates(empty).empty
+    assert summarize(empty)['numero_clienti'] == 0
+    print("✅ Colonne mancanti e dati vuoti gestiti")
+
+def benchmark(gruppi: int = 200, clienti_per_gruppo: int = 50):
+    """Un groupby contro una maschera per gruppo"""
+    df = _clienti(gruppi, clienti_per_gruppo)
+
+    start = time.perf_counter()
+    for gruppo_id in df['gruppo_pamm_id'].unique():
+        gruppo = df[df['gruppo_pamm_id'] == gruppo_id]
+        len(gruppo[gruppo['stato_prop'] == 'Svolto'])
+        gruppo['importo_cliente'].sum()
+    masks = time.perf_counter() - start
+
+    start = time.perf_counter()
+    group_aggregates(df)
+    groupby = time.perf_counter() - start
+    print(f"\n📊 {gruppi} gruppi x {clienti_per_gruppo} clienti: maschere {masks * 1000:.1f} ms, groupby {groupby * 1000:.1f} ms")
+
+if __name__ == "__main__":
+    print("📊 Test Aggregati Gruppi")
+    print("=" * 40)
+
+    try:
+        test_matches_per_group_masks()
+        test_totals_and_summary()
+        test_missing_commission_defaults()
+        test_missing_columns_and_empty()
+        benchmark()
+        print("\n🎉 Tutti i test degli aggregati completati con successo!")
+    except AssertionError as e:
+        print(f"\n❌ Test fallito: {e}")
+        import traceback
+        traceback.print_exc()
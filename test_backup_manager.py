@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Test per i backup compressi e incrementali
+Verifica snapshot completo, incrementale su data_aggiornamento, ripristino con eliminazioni e retention
+Creato da Ezio Camporeale
+"""
+
+import sys
+import gzip
+import json
+import tempfile
+from pathlib import Path
+from datetime import datetime, timedelta
+
+# Aggiungi il percorso della directory corrente al path di Python
+current_dir = Path(__file__).parent
+sys.path.append(str(current_dir))
+
+from database.fake_backend import FakeSupabaseClient
+from utils.backup_manager import BackupManager, MANIFEST_NAME
+
+class FakeManager:
+    """Manager minimale con la stessa paginazione keyset del SupabaseManager"""
+
+    def __init__(self, client):
+        self.supabase = client
+        self.resyncs = 0
+
+    def iter_table(self, table, order_by='id', page_size=None, after=None):
+        page_size = page_size or 1000
+        while True:
+            query = self.supabase.table(table).select('*')
+            if order_by == 'id':
+                if after is not None:
+                    query = query.gt('id', after)
+                query = query.order('id')
+            else:
+                if after is not None:
+                    value, last_id = after
+                    query = query.or_(f'{order_by}.gt."{value}",and({order_by}.eq."{value}",id.gt.{last_id})')
+                query = query.order(order_by).order('id')
+            rows = query.limit(page_size).execute().data
+            yield from rows
+            if len(rows) < page_size:
+                return
+            after = rows[-1]['id'] if order_by == 'id' else (rows[-1][order_by], rows[-1]['id'])
+
+    def resync_mirror(self):
+        self.resyncs += 1
+
+def _seeded_manager() -> FakeManager:
+    """Un broker, un gruppo e dieci clienti con data_aggiornamento distinte; tombstone installati"""
+    client = FakeSupabaseClient()
+    client.connection().execute(
+        'CREATE TABLE sync_tombstones (id INTEGER PRIMARY KEY AUTOINCREMENT, table_name TEXT NOT NULL, '
+        'row_id INTEGER NOT NULL, deleted_at TEXT)'
+    )
+    client.seed('brokers', [{'id': 1, 'nome_broker': 'IC Markets'}])
+    client.seed('gruppi_pamm_gruppi', [{'id': 1, 'nome_gruppo': 'Gruppo 1', 'manager': 'frank', 'broker_id': 1, 'account_pamm': 'PAMM001'}])
+    client.seed('clienti_gruppi_pamm', [
+        {'id': i, 'gruppo_pamm_id': 1, 'nome_cliente': f'CLIENTE {i} [{1000 + i}]',
+         'data_aggiornamento': f'2025-01-{i:02d}T00:00:00'}
+        for i in range(1, 11)
+    ])
+    return FakeManager(client)
+
+def _count(manager, table) -> int:
+    return len(manager.supabase.table(table).select('id').execute().data)
+
+def test_full_and_incremental_backup():
+    """Il completo salva tutto, l'incrementale solo le righe cambiate e le eliminazioni"""
+    manager = _seeded_manager()
+    with tempfile.TemporaryDirectory() as backups_dir:
+        backups = BackupManager(manager, backups_dir, page_size=3)
+
+        success, message = backups.create_full_backup()
+        assert success, message
+        full = backups.list_backups()[-1]
+        assert full['type'] == 'full' and full['tables']['clienti_gruppi_pamm']['rows'] == 10
+        assert full['tables']['clienti_gruppi_pamm']['high_water'] == ['2025-01-10T00:00:00', 10]
+
+        path = Path(backups_dir) / full['id'] / full['tables']['clienti_gruppi_pamm']['file']
+        with gzip.open(path, 'rt', encoding='utf-8') as file:
+            assert json.loads(file.readline())['nome_cliente'] == 'CLIENTE 1 [1001]'
+
+        manager.supabase.table('clienti_gruppi_pamm').update(
+            {'esito_prop': 'OK', 'data_aggiornamento': '2025-02-01T00:00:00'}
+        ).eq('id', 1).execute()
+        manager.supabase.table('clienti_gruppi_pamm').delete().eq('id', 2).execute()
+        manager.supabase.table('sync_tombstones').insert({'table_name': 'clienti_gruppi_pamm', 'row_id': 2}).execute()
+
+        success, message = backups.create_incremental_backup()
+        assert success, message
+        incremental = backups.list_backups()[-1]
+        assert incremental['type'] == 'incremental' and incremental['parent'] == full['id']
+        # Riga modificata + ultima riga del completo (finestra di sovrapposizione)
+        assert incremental['tables']['clienti_gruppi_pamm']['rows'] == 2
+        assert incremental['tables']['sync_tombstones']['rows'] == 1
+        print("✅ Backup completo e incrementale corretti")
+
+def test_restore_chain():
+    """Il ripristino applica completo + incrementali e riapplica le eliminazioni"""
+    manager = _seeded_manager()
+    with tempfile.TemporaryDirectory() as backups_dir:
+        backups = BackupManager(manager, backups_dir)
+        backups.create_full_backup()
+        manager.supabase.table('clienti_gruppi_pamm').update(
+            {'esito_prop': 'OK', 'data_aggiornamento': '2025-02-01T00:00:00'}
+        ).eq('id', 1).execute()
+        manager.supabase.table('clienti_gruppi_pamm').delete().eq('id', 2).execute()
+        manager.supabase.table('sync_tombstones').insert({'table_name': 'clienti_gruppi_pamm', 'row_id': 2}).execute()
+        backups.create_incremental_backup()
+
+        # Perdita dati
+        manager.supabase.table('clienti_gruppi_pamm').delete().gt('id', 0).execute()
+        assert _count(manager, 'clienti_gruppi_pamm') == 0
+
+        success, message = backups.restore_backup(backups.list_backups()[-1]['id'], chunk_size=4)
+        assert success, message
+        assert _count(manager, 'clienti_gruppi_pamm') == 9
+        restored = manager.supabase.table('clienti_gruppi_pamm').select('esito_prop').eq('id', 1).execute().data
+        assert restored[0]['esito_prop'] == 'OK'
+        assert manager.resyncs == 1
+        print("✅ Ripristino della catena corretto")
+
+def test_corrupted_backup_not_restored():
+    """Un file alterato blocca il ripristino prima di qualsiasi scrittura"""
+    manager = _seeded_manager()
+    with tempfile.TemporaryDirectory() as backups_dir:
+        backups = BackupManager(manager, backups_dir)
+        backups.create_full_backup()
+        full = backups.list_backups()[-1]
+        path = Path(backups_dir) / full['id'] / full['tables']['brokers']['file']
+        path.write_bytes(b'corrotto')
+
+        success, message = backups.restore_backup(full['id'])
+        assert not success and 'corrotto' in message
+        print("✅ Verifica integrità corretta")
+
+def test_retention():
+    """La retention conserva l'ultima catena ed elimina backup vecchi e interrotti"""
+    manager = _seeded_manager()
+    with tempfile.TemporaryDirectory() as backups_dir:
+        backups = BackupManager(manager, backups_dir, retention_days=30)
+        backups.create_full_backup()
+        backups.create_incremental_backup()
+        (Path(backups_dir) / '20000101_000000_full').mkdir()  # Backup interrotto, senza manifest
+
+        removed, _ = backups.prune_backups(now=datetime.now() + timedelta(days=60))
+        assert removed == 1 and len(backups.list_backups()) == 2
+
+        backups.create_full_backup()
+        latest = backups.list_backups()[-1]['id']
+        removed, _ = backups.prune_backups(now=datetime.now() + timedelta(days=60))
+        assert removed == 2
+        assert [manifest['id'] for manifest in backups.list_backups()] == [latest]
+        assert (Path(backups_dir) / latest / MANIFEST_NAME).exists()
+        print("✅ Retention corretta")
+
+if __name__ == "__main__":
+    print("💾 Test Backup")
+    print("=" * 40)
+
+    try:
+        test_full_and_incremental_backup()
+        test_restore_chain()
+        test_corrupted_backup_not_restored()
+        test_retention()
+        print("\n🎉 Tutti i test dei backup completati con successo!")
+    except AssertionError as e:
+        print(f"\n❌ Test fallito: {e}")
+        import traceback
+        traceback.print_exc()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Test per il motore delle modifiche massive
+Verifica divisione in blocchi, parallelismo limitato, esito per blocco e autore della modifica
+Creato da Ezio Camporeale
+"""
+
+import sys
+from pathlib import Path
+
+# Aggiungi il percorso della directory corrente al path di Python
+current_dir = Path(__file__).parent
+sys.path.append(str(current_dir))
+
+from database.fake_backend import FakeSupabaseClient
+from database.bulk_operations import BulkMutationEngine
+
+def _seeded_client(clienti: int = 25, latency: float = 0.0) -> FakeSupabaseClient:
+    """Un broker, un gruppo e `clienti` clienti"""
+    client = FakeSupabaseClient(latency=latency)
+    client.seed('brokers', [{'id': 1, 'nome_broker': 'IC Markets'}])
+    client.seed('gruppi_pamm_gruppi', [{'id': 1, 'nome_gruppo': 'Gruppo 1', 'manager': 'frank', 'broker_id': 1, 'account_pamm': 'PAMM001'}])
+    client.seed('clienti_gruppi_pamm', [
+        {'id': i, 'gruppo_pamm_id': 1, 'nome_cliente': f'CLIENTE {i} [{1000 + i}]', 'stato_prop': 'Non svolto'}
+        for i in range(1, clienti + 1)
+    ])
+    client.reset_stats()
+    return client
+
+def test_update_in_chunks():
+    """Gli id sono divisi in blocchi e ogni riga registra autore e data della modifica"""
+    client = _seeded_client(latency=0.02)
+    engine = BulkMutationEngine(client, chunk_size=4, max_concurrency=3)
+
+    ids = list(range(1, 24)) + [1, 2]  # Duplicati ignorati
+    result = engine.update('clienti_gruppi_pamm', ids, {'stato_prop': 'Svolto'}, aggiornato_da='frank')
+
+    assert result.success, result.message
+    assert result.requested == 23 and result.affected == 23
+    assert len(result.chunks) == 6 and max(len(chunk.ids) for chunk in result.chunks) == 4
+    assert [chunk.index for chunk in result.chunks] == list(range(6))
+
+    stats = client.get_stats()
+    assert stats['by_table']['clienti_gruppi_pamm.update'] == 6
+    assert 1 < stats['max_in_flight'] <= 3
+
+    rows = client.table('clienti_gruppi_pamm').select('id, stato_prop, aggiornato_da, data_aggiornamento').order('id').execute().data
+    updated = [row for row in rows if row['stato_prop'] == 'Svolto']
+    assert [row['id'] for row in updated] == list(range(1, 24))
+    assert all(row['aggiornato_da'] == 'frank' and row['data_aggiornamento'] for row in updated)
+    assert rows[-1]['stato_prop'] == 'Non svolto' and rows[-1]['aggiornato_da'] is None
+    print("✅ Update a blocchi corretto")
+
+def test_partial_failure():
+    """Un blocco non riuscito non blocca gli altri ed è riportato con i suoi id"""
+    client = _seeded_client(clienti=10)
+    engine = BulkMutationEngine(client, chunk_size=5, max_concurrency=1)
+    client.inject_error('clienti_gruppi_pamm', 'update')
+
+    result = engine.update('clienti_gruppi_pamm', list(range(1, 11)), {'deposito_pamm': 'Depositata'}, aggiornato_da='frank')
+
+    assert not result.success
+    assert result.affected == 5 and result.failed_ids == [1, 2, 3, 4, 5]
+    assert result.chunks[0].error and result.chunks[1].success
+    assert '1 blocchi su 2' in result.message
+    print("✅ Fallimento parziale riportato per blocco")
+
+def test_missing_ids():
+    """Gli id senza riga (eliminati nel frattempo) non sono reinseriti e sono riportati"""
+    client = _seeded_client(clienti=6)
+    client.table('clienti_gruppi_pamm').delete().eq('id', 4).execute()
+    engine = BulkMutationEngine(client, chunk_size=3)
+
+    result = engine.update('clienti_gruppi_pamm', [1, 4, 6, 99], {'quota_prop': 2}, aggiornato_da='frank')
+
+    assert result.success and result.affected == 2
+    assert result.missing_ids == [4, 99]
+    assert len(client.table('clienti_gruppi_pamm').select('id').execute().data) == 5
+    print("✅ Id senza riga riportati")
+
+def test_empty_selection():
+    """Nessun id: nessuna richiesta"""
+    client = _seeded_client(clienti=1)
+    result = BulkMutationEngine(client).update('clienti_gruppi_pamm', [], {'stato_prop': 'Svolto'})
+
+    assert result.success and result.requested == 0 and not result.chunks
+    assert client.get_stats()['requests'] == 0
+    print("✅ Selezione vuota corretta")
+
+if __name__ == "__main__":
+    print("⚡ Test Operazioni Bulk")
+    print("=" * 40)
+
+    try:
+        test_update_in_chunks()
+        test_partial_failure()
+        test_missing_ids()
+        test_empty_selection()
+        print("\n🎉 Tutti i test delle operazioni bulk completati con successo!")
+    except AssertionError as e:
+        print(f"\n❌ Test fallito: {e}")
+        import traceback
+        traceback.print_exc()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Test per il diff della griglia editabile e la paginazione dei gruppi grandi
+Verifica modifiche per id, valori equivalenti ignorati, modifiche in attesa e limiti delle pagine
+Creato da Ezio Camporeale
+"""
+
+import sys
+import time
+from pathlib import Path
+
+# Aggiungi il percorso della directory corrente al path di Python
+current_dir = Path(__file__).parent
+sys.path.append(str(current_dir))
+
+from utils.editor_diff import diff_rows, apply_changes, page_bounds, normalize_cell
+
+FIELDS = ['deposito_pamm', 'quota_prop', 'fase_prop', 'prelievo_prop']
+
+def _rows(n: int = 3):
+    return [{'id': i, 'nome_cliente': f'CLIENTE {i}', 'deposito_pamm': '', 'quota_prop': 1,
+             'fase_prop': None, 'prelievo_prop': 0.0} for i in range(1, n + 1)]
+
+def test_diff_only_changed_cells():
+    """Solo le celle cambiate compaiono, per id e non per posizione"""
+    original = _rows()
+    edited = [dict(row) for row in reversed(original)]
+    edited[0]['deposito_pamm'] = 'Depositata'
+    edited[2]['prelievo_prop'] = 150.5
+    # Il cliente non è tra i campi confrontati
+    edited[1]['nome_cliente'] = 'ALTRO'
+
+    assert diff_rows(original, edited, FIELDS) == {3: {'deposito_pamm': 'Depositata'}, 1: {'prelievo_prop': 150.5}}
+    assert diff_rows(original, original, FIELDS) == {}
+    print("✅ Diff per id corretto")
+
+def test_equivalent_values_ignored():
+    """None, NaN e stringa vuota coincidono; 1 e 1.0 pure"""
+    original = _rows(1)
+    edited = [{'id': 1.0, 'deposito_pamm': None, 'quota_prop': 1.0, 'fase_prop': '', 'prelievo_prop': float('nan')}]
+    assert diff_rows(original, edited, FIELDS) == {1: {'prelievo_prop': None}}
+
+    edited[0]['prelievo_prop'] = 0
+    assert diff_rows(original, edited, FIELDS) == {}
+    assert normalize_cell(None) == normalize_cell(float('nan')) == normalize_cell('')
+    assert normalize_cell(True) is True
+    print("✅ Valori equivalenti ignorati")
+
+def test_apply_pending_changes():
+    """Le modifiche in attesa si applicano a copie delle righe"""
+    original = _rows(2)
+    shown = apply_changes(original, {2: {'fase_prop': '1 fase'}})
+    assert shown[1]['fase_prop'] == '1 fase' and original[1]['fase_prop'] is None
+    assert shown[0] is original[0]
+
+    # Una griglia ricreata con le modifiche in attesa restituisce le stesse modifiche
+    assert diff_rows(original, shown, FIELDS) == {2: {'fase_prop': '1 fase'}}
+    print("✅ Modifiche in attesa applicate")
+
+def test_page_bounds():
+    """Pagine complete, ultima pagina parziale e pagine fuori intervallo"""
+    assert page_bounds(250, 1, 100) == (0, 100, 3)
+    assert page_bounds(250, 3, 100) == (200, 250, 3)
+    assert page_bounds(250, 9, 100) == (200, 250, 3)
+    assert page_bounds(250, 0, 100) == (0, 100, 3)
+    assert page_bounds(0, 1, 100) == (0, 0, 1)
+    assert page_bounds(40, 1, 0) == (0, 40, 1)
+    print("✅ Limiti delle pagine corretti")
+
+def benchmark(clienti: int = 500, campi: int = 13):
+    """Widget creati a ogni rerun: una griglia per gruppo contro un widget per cella"""
+    widget_per_cella = clienti * (campi + 1)
+    pagine = page_bounds(clienti, 1, 100)[2]
+
+    original = _rows(clienti)
+    edited = [dict(row) for row in original]
+    for row in edited[::50]:
+        row['quota_prop'] = 2
+    start = time.perf_counter()
+    changes = diff_rows(original, edited, FIELDS)
+    elapsed = time.perf_counter() - start
+    print(f"\n📊 {clienti} clienti: {widget_per_cella} widget prima, 1 griglia ({pagine} pagine da 100) ora; "
+          f"diff di {len(changes)} modifiche in {elapsed * 1000:.2f} ms")
+
+if __name__ == "__main__":
+    print("📝 Test Griglia Editabile")
+    print("=" * 40)
+
+    try:
+        test_diff_only_changed_cells()
+        test_equivalent_values_ignored()
+        test_apply_pending_changes()
+        test_page_bounds()
+        benchmark()
+        print("\n🎉 Tutti i test della griglia editabile completati con successo!")
+    except AssertionError as e:
+        print(f"\n❌ Test fallito: {e}")
+        import traceback
+        traceback.print_exc()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Test per l'esportazione Excel dei gruppi PAMM
+Verifica un foglio per gruppo, layout a 14 colonne, colori e lettura a pagine
+Creato da Ezio Camporeale
+"""
+
+import sys
+from io import BytesIO
+from pathlib import Path
+
+# Aggiungi il percorso della directory corrente al path di Python
+current_dir = Path(__file__).parent
+sys.path.append(str(current_dir))
+
+from openpyxl import load_workbook
+from config import GRUPPI_PAMM_STATO_PROP_COLORS, GRUPPI_PAMM_DEPOSITO_COLORS, GRUPPI_PAMM_COMMISSIONI_COLORS
+from utils.excel_importer import EXCEL_COLUMN_MAP
+from utils.excel_exporter import ExcelExporter, sheet_title
+
+class FakeManager:
+    """Restituisce gruppi e clienti come generatori, come gli iteratori del SupabaseManager"""
+
+    def __init__(self, clienti_per_gruppo: int = 3):
+        self.gruppi = [{'id': 1, 'nome_gruppo': 'Gruppo 1'}, {'id': 2, 'nome_gruppo': 'Gruppo: 2/B'}]
+        self.clienti_per_gruppo = clienti_per_gruppo
+        self.calls = []
+
+    def iter_gruppi_pamm_gruppi(self, page_size=None):
+        yield from self.gruppi
+
+    def iter_clienti_gruppi(self, gruppo_id=None, order_by='id', page_size=None, columns=None):
+        self.calls.append((gruppo_id, page_size, columns))
+        for i in range(self.clienti_per_gruppo):
+            yield {
+                'nome_cliente': f'CLIENTE {gruppo_id}-{i} [1000]',
+                'stato_prop': 'Svolto' if i == 0 else 'Non svolto',
+                'deposito_pamm': 'Depositata' if i == 0 else '',
+                'quota_prop': 1, 'ciclo_numero': 2, 'fase_prop': '1 fase',
+                'commissioni_percentuale': 25.0 if i == 0 else 30.0,
+                'prelievo_prop': 150.5, 'prelievo_profit': None,
+            }
+
+def fill(cell) -> str:
+    return '#' + cell.fill.fgColor.rgb[-6:].lower()
+
+def test_sheet_titles():
+    """Nomi dei fogli validi e univoci"""
+    used = set()
+    assert sheet_title('Gruppo: 2/B', used) == 'Gruppo_ 2_B'
+    assert sheet_title('gruppo_ 2_b', used) == 'gruppo_ 2_b (2)'
+    assert len(sheet_title('X' * 40, used)) == 31
+    print("✅ Nomi fogli corretti")
+
+def test_export_layout_and_colors():
+    """Un foglio per gruppo con le 14 intestazioni e i colori della tabella"""
+    manager = FakeManager()
+    output = BytesIO()
+
+    report = ExcelExporter(manager, page_size=2).export_workbook(output)
+
+    assert not report.errors, report.errors
+    assert report.sheets == 2 and report.rows == 6
+    assert all(page_size == 2 for _, page_size, _ in manager.calls)
+
+    workbook = load_workbook(BytesIO(output.getvalue()))
+    assert workbook.sheetnames == ['Gruppo 1', 'Gruppo_ 2_B']
+    sheet = workbook['Gruppo 1']
+    assert [cell.value for cell in sheet[1]] == list(EXCEL_COLUMN_MAP.keys())
+    assert sheet.max_row == 4
+
+    assert fill(sheet['A2']) == GRUPPI_PAMM_STATO_PROP_COLORS['Svolto'][0]
+    assert fill(sheet['A3']) == GRUPPI_PAMM_STATO_PROP_COLORS['Non svolto'][0]
+    assert fill(sheet['B2']) == GRUPPI_PAMM_DEPOSITO_COLORS['Depositata'][0]
+    assert fill(sheet['B3']) == GRUPPI_PAMM_DEPOSITO_COLORS['default'][0]
+    assert fill(sheet['K2']) == GRUPPI_PAMM_COMMISSIONI_COLORS['standard'][0]
+    assert fill(sheet['K3']) == GRUPPI_PAMM_COMMISSIONI_COLORS['custom'][0]
+    assert sheet['I2'].value == 150.5 and sheet['J2'].value is None
+    print("✅ Layout e colori corretti")
+
+def test_export_without_groups():
+    """Nessun gruppo: il workbook resta valido e vuoto"""
+    manager = FakeManager()
+    output = BytesIO()
+
+    report = ExcelExporter(manager).export_workbook(output, gruppi=[])
+
+    assert report.sheets == 0 and report.rows == 0 and not report.errors
+    assert manager.calls == []
+    print("✅ Esportazione senza gruppi corretta")
+
+if __name__ == "__main__":
+    print("📤 Test Esportazione Excel")
+    print("=" * 40)
+
+    try:
+        test_sheet_titles()
+        test_export_layout_and_colors()
+        test_export_without_groups()
+        print("\n🎉 Tutti i test dell'esportazione Excel completati con successo!")
+    except AssertionError as e:
+        print(f"\n❌ Test fallito: {e}")
+        import traceback
+        traceback.print_exc()
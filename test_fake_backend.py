@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Test e benchmark del backend PostgREST finto in memoria
+Verifica latenza simulata, errori iniettati e misura il data layer senza rete
+Creato da Ezio Camporeale
+"""
+
+import sys
+import time
+import threading
+from pathlib import Path
+
+# Aggiungi il percorso della directory corrente al path di Python
+current_dir = Path(__file__).parent
+sys.path.append(str(current_dir))
+
+from database.fake_backend import FakeSupabaseClient, InjectedError
+
+def _seeded_client(**kwargs) -> FakeSupabaseClient:
+    """Backend finto con un broker, due gruppi e cento clienti"""
+    client = FakeSupabaseClient(**kwargs)
+    client.seed('brokers', [{'id': 1, 'nome_broker': 'IC Markets', 'stato': 'Attivo'}])
+    client.seed('gruppi_pamm_gruppi', [
+        {'id': 1, 'nome_gruppo': 'Gruppo 1', 'manager': 'frank', 'broker_id': 1, 'account_pamm': 'PAMM001'},
+        {'id': 2, 'nome_gruppo': 'Gruppo 2', 'manager': 'mario', 'broker_id': 1, 'account_pamm': 'PAMM002'},
+    ])
+    client.seed('clienti_gruppi_pamm', [
+        {'gruppo_pamm_id': 1 + i % 2, 'nome_cliente': f'CLIENTE {i} [{1000 + i}]', 'importo_cliente': 1000.0 + i}
+        for i in range(100)
+    ])
+    return client
+
+def test_query_builder_subset():
+    """select/insert/update/delete, eq, in_, ilike, limit ed embedding"""
+    client = _seeded_client()
+
+    rows = client.table('clienti_gruppi_pamm').select('id, nome_cliente').in_('gruppo_pamm_id', [2]).limit(5).execute().data
+    assert len(rows) == 5
+
+    found = client.table('clienti_gruppi_pamm').select('*').ilike('nome_cliente', '%cliente 42 %').execute().data
+    assert [row['importo_cliente'] for row in found] == [1042.0]
+
+    embedded = client.table('clienti_gruppi_pamm').select('id, gruppi_pamm_gruppi!inner(nome_gruppo)').eq('id', 1).execute().data
+    assert embedded[0]['gruppi_pamm_gruppi'] == {'nome_gruppo': 'Gruppo 1'}
+
+    client.table('brokers').insert({'nome_broker': 'Pepperstone'}).execute()
+    client.table('brokers').update({'stato': 'Inattivo'}).eq('nome_broker', 'Pepperstone').execute()
+    client.table('brokers').delete().eq('stato', 'Inattivo').execute()
+    assert len(client.table('brokers').select('id').execute().data) == 1
+    print("✅ Sottoinsieme del query builder corretto")
+
+def test_latency_overlaps():
+    """La latenza simulata si sovrappone tra thread come in rete"""
+    client = _seeded_client(latency=0.05)
+    threads = [threading.Thread(target=lambda: client.table('brokers').select('*').execute()) for _ in range(8)]
+
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    stats = client.get_stats()
+    assert elapsed < 0.05 * 4, f"Richieste serializzate: {elapsed:.3f}s"
+    assert stats['requests'] == 8 and stats['by_table'] == {'brokers.select': 8}
+    assert stats['max_in_flight'] > 1
+    print(f"✅ Latenza simulata corretta (8 richieste in {elapsed * 1000:.0f} ms)")
+
+def test_injected_errors():
+    """Gli errori iniettati colpiscono solo la tabella/azione indicata"""
+    client = _seeded_client()
+    client.inject_error(table='brokers', action='update', times=1)
+
+    assert client.table('brokers').select('*').execute().data
+    try:
+        client.table('brokers').update({'stato': 'Inattivo'}).eq('id', 1).execute()
+        assert False, "Errore non sollevato"
+    except InjectedError as e:
+        assert e.code == '503'
+    assert client.table('brokers').select('stato').eq('id', 1).execute().data[0]['stato'] == 'Attivo'
+    print("✅ Errori iniettati corretti")
+
+def test_error_rate_is_deterministic():
+    """Con lo stesso seed gli errori casuali cadono sulle stesse richieste"""
+    def failures(seed: int):
+        client = _seeded_client(error_rate=0.3, seed=seed)
+        outcome = []
+        for _ in range(20):
+            try:
+                client.table('brokers').select('id').execute()
+                outcome.append(False)
+            except InjectedError:
+                outcome.append(True)
+        return outcome
+
+    assert failures(7) == failures(7)
+    assert any(failures(7))
+    print("✅ Errori casuali riproducibili")
+
+def run_manager_benchmark():
+    """Benchmark del SupabaseManager sul backend finto (richiede le dipendenze dell'app)"""
+    try:
+        from database.supabase_manager import SupabaseManager
+    except ImportError as e:
+        print(f"⚠️ Benchmark del manager saltato, dipendenze mancanti: {e}")
+        return
+
+    client = _seeded_client(latency=0.02)
+    manager = SupabaseManager(client=client)
+
+    def measure(label, call):
+        client.reset_stats()
+        start = time.perf_counter()
+        call()
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"   {label:<40} {elapsed:8.1f} ms  {client.get_stats()['requests']:3d} richieste")
+
+    print("\n⏱️ Benchmark data layer (latenza simulata 20 ms)")
+    measure("get_gruppi_pamm (freddo)", manager.get_gruppi_pamm)
+    measure("get_gruppi_pamm (cache)", manager.get_gruppi_pamm)
+    measure("get_statistiche_generali", manager.get_statistiche_generali)
+    manager.invalidate_cache()
+    measure("fetch_many (3 letture in parallelo)", lambda: manager.fetch_many(
+        brokers=manager.get_brokers, props=manager.get_props, stats=manager.get_statistiche_generali))
+    measure("search_gruppi_pamm('cliente 4')", lambda: manager.search_gruppi_pamm('cliente 4'))
+    manager.close()
+
+if __name__ == "__main__":
+    print("🧪 Test Backend Finto")
+    print("=" * 40)
+
+    try:
+        test_query_builder_subset()
+        test_latency_overlaps()
+        test_injected_errors()
+        test_error_rate_is_deterministic()
+        print("\n🎉 Tutti i test del backend finto completati con successo!")
+        run_manager_benchmark()
+    except AssertionError as e:
+        print(f"\n❌ Test fallito: {e}")
+        import traceback
+        traceback.print_exc()
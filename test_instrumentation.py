@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Test per la strumentazione del data layer
+Verifica istogrammi, attribuzione delle query al metodo e export JSON
+Creato da Ezio Camporeale
+"""
+
+import sys
+import json
+from pathlib import Path
+
+# Aggiungi il percorso della directory corrente al path di Python
+current_dir = Path(__file__).parent
+sys.path.append(str(current_dir))
+
+from database.fake_backend import FakeSupabaseClient
+from database.instrumentation import (
+    Histogram, QueryMetrics, InstrumentedClient, InstrumentedQuery, instrument_methods, record_http_response
+)
+
+class FakeManager:
+    """Manager minimale con le stesse convenzioni del SupabaseManager"""
+
+    def __init__(self):
+        self.metrics = QueryMetrics(recent_size=5)
+        # Backend senza HTTP: byte stimati dalla serializzazione dei dati
+        self.supabase = InstrumentedClient(FakeSupabaseClient(), self.metrics, measure_payload=True)
+        self.supabase.seed('brokers', [{'nome_broker': f'Broker {i}', 'stato': 'Attivo'} for i in range(10)])
+
+    def get_brokers(self):
+        return self.get_brokers_attivi()
+
+    def get_brokers_attivi(self):
+        return self.supabase.table('brokers').select('*').eq('stato', 'Attivo').execute().data
+
+    def search(self, term: str):
+        return self.supabase.table('brokers').select('id').or_(f'nome_broker.ilike."*{term}*"').execute().data
+
+instrument_methods(FakeManager)
+
+def test_histogram():
+    """Bucket, percentili e statistiche dell'istogramma"""
+    histogram = Histogram((10, 100))
+    for value in (1, 5, 50, 500):
+        histogram.observe(value)
+
+    data = histogram.to_dict()
+    assert data['buckets'] == {'<=10': 2, '<=100': 1, '>100': 1}
+    assert data['p50'] == 10 and data['p99'] == 500
+    assert data['min'] == 1 and data['max'] == 500
+    print("✅ Istogramma corretto")
+
+def test_queries_attributed_to_outer_method():
+    """Le query delle chiamate annidate sono attribuite al metodo chiamato dalla UI"""
+    manager = FakeManager()
+    manager.get_brokers()
+
+    summary = manager.metrics.summary()
+    assert [(row['method'], row['table'], row['action']) for row in summary] == [('get_brokers', 'brokers', 'select')]
+    assert summary[0]['rows'] == 10 and summary[0]['bytes'] > 0
+    assert list(manager.metrics.export()['methods']) == ['get_brokers']
+    print("✅ Attribuzione al metodo corretta")
+
+def test_filters_without_values():
+    """Nei filtri registrati compaiono solo le colonne, mai i valori cercati"""
+    manager = FakeManager()
+    manager.get_brokers()
+    manager.search('segreto')
+
+    filters = [query['filters'] for query in manager.metrics.recent]
+    assert filters == [['eq:stato'], ['or']]
+    assert 'segreto' not in manager.metrics.export_json()
+    print("✅ Filtri senza valori corretti")
+
+def test_errors_and_export():
+    """Le query fallite sono contate e l'export è JSON valido"""
+    manager = FakeManager()
+    manager.supabase.inject_error(table='brokers')
+    try:
+        manager.get_brokers()
+        assert False, "Errore non propagato"
+    except Exception:
+        pass
+
+    exported = json.loads(manager.metrics.export_json())
+    assert exported['queries'][0]['errors'] == 1
+    assert exported['methods']['get_brokers']['errors'] == 1
+    assert exported['recent'][0]['error'] == 'InjectedError'
+    print("✅ Errori ed export corretti")
+
+class HTTPResponse:
+    """Risposta httpx minimale: header e byte scaricati"""
+
+    def __init__(self, headers, num_bytes_downloaded=0):
+        self.headers = headers
+        self.num_bytes_downloaded = num_bytes_downloaded
+
+class HTTPBuilder:
+    """Request builder che riceve la risposta tramite l'hook di httpx, come il client PostgREST"""
+
+    def __init__(self, response, data):
+        self.response = response
+        self.data = data
+
+    def execute(self):
+        record_http_response(self.response)
+        return type('Response', (), {'data': self.data})()
+
+def test_http_response_size():
+    """Con HTTP i byte vengono dalla risposta (Content-Length o byte scaricati), senza stime"""
+    metrics = QueryMetrics()
+    rows = [{'id': i} for i in range(3)]
+    for response in (HTTPResponse({'content-length': '1234'}), HTTPResponse({}, num_bytes_downloaded=567)):
+        InstrumentedQuery(HTTPBuilder(response, rows), metrics, 'brokers', measure_payload=True).execute()
+    assert [query['bytes'] for query in metrics.recent] == [1234, 567]
+
+    # Senza HTTP e senza stima richiesta: nessuna serializzazione, zero byte
+    client = FakeSupabaseClient()
+    client.seed('brokers', [{'nome_broker': 'IC Markets'}])
+    InstrumentedClient(client, metrics).table('brokers').select('*').execute()
+    assert metrics.recent[-1]['bytes'] == 0 and metrics.recent[-1]['rows'] == 1
+    print("✅ Byte dalla risposta HTTP corretti")
+
+if __name__ == "__main__":
+    print("📈 Test Strumentazione Data Layer")
+    print("=" * 40)
+
+    try:
+        test_histogram()
+        test_queries_attributed_to_outer_method()
+        test_filters_without_values()
+        test_errors_and_export()
+        test_http_response_size()
+        print("\n🎉 Tutti i test della strumentazione completati con successo!")
+    except AssertionError as e:
+        print(f"\n❌ Test fallito: {e}")
+        import traceback
+        traceback.print_exc()
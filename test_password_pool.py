@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Test e benchmark del pool per le password e del limitatore dei tentativi di login
+pbkdf2 sostituisce bcrypt (stesso profilo: CPU-bound e rilascia il GIL)
+Creato da Ezio Camporeale
+"""
+
+import os
+import sys
+import time
+import hashlib
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+# Aggiungi il percorso della directory corrente al path di Python
+current_dir = Path(__file__).parent
+sys.path.append(str(current_dir))
+
+from utils.password_pool import PasswordWorkerPool, PasswordPoolBusy, LoginAttemptLimiter
+
+def slow_check(password: str, expected: bytes) -> bool:
+    """Verifica CPU-bound con costo simile a bcrypt"""
+    return hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), b'salt', 20000) == expected
+
+EXPECTED = hashlib.pbkdf2_hmac('sha256', b'password', b'salt', 20000)
+
+def test_pool_results_and_stats():
+    """Il pool restituisce i risultati e conta le operazioni completate"""
+    pool = PasswordWorkerPool(max_workers=2, max_queue=8)
+    assert pool.run(slow_check, 'password', EXPECTED)
+    assert not pool.run(slow_check, 'sbagliata', EXPECTED)
+
+    try:
+        pool.run(int, 'non un numero')
+        assert False, "Eccezione non propagata"
+    except ValueError:
+        pass
+
+    stats = pool.get_stats()
+    assert stats['completed'] == 3 and stats['errors'] == 1 and stats['queue_depth'] == 0
+    pool.shutdown()
+    print("✅ Risultati e metriche del pool corretti")
+
+def test_queue_limit():
+    """Con la coda piena le nuove richieste vengono rifiutate subito"""
+    pool = PasswordWorkerPool(max_workers=1, max_queue=2)
+    release = threading.Event()
+    started = threading.Event()
+
+    def blocking():
+        started.set()
+        release.wait(5)
+        return True
+
+    with ThreadPoolExecutor(max_workers=3) as callers:
+        running = callers.submit(pool.run, blocking)
+        assert started.wait(2)
+        queued = [callers.submit(pool.run, blocking) for _ in range(2)]
+        while pool.queue_depth() < 2:
+            time.sleep(0.001)
+
+        try:
+            pool.run(blocking)
+            assert False, "Coda piena non segnalata"
+        except PasswordPoolBusy:
+            pass
+
+        release.set()
+        assert running.result() and all(future.result() for future in queued)
+
+    stats = pool.get_stats()
+    assert stats['rejected'] == 1 and stats['max_queue_depth'] == 2
+    pool.shutdown()
+    print("✅ Limite della coda corretto")
+
+def test_timeout_is_busy():
+    """Un risultato oltre il timeout si segnala come sovraccarico, non come errore della funzione"""
+    pool = PasswordWorkerPool(max_workers=1, max_queue=2, timeout=0.05)
+    release = threading.Event()
+
+    try:
+        pool.run(release.wait, 5)
+        assert False, "Timeout non segnalato"
+    except PasswordPoolBusy:
+        pass
+    release.set()
+
+    stats = pool.get_stats()
+    assert stats['timeouts'] == 1 and stats['errors'] == 0
+    pool.shutdown()
+    print("✅ Timeout segnalato come sovraccarico")
+
+def test_attempt_limiter():
+    """Blocco dopo max_attempts fallimenti nella finestra, sblocco dopo il lockout"""
+    limiter = LoginAttemptLimiter(max_attempts=3, window_seconds=60, lockout_seconds=120)
+
+    limiter.record_failure('Frank', now=0)
+    limiter.record_failure('frank', now=10)
+    assert limiter.check('frank', now=11) == 0
+    limiter.record_failure('frank ', now=20)
+    assert limiter.check('FRANK', now=21) == 119
+    assert limiter.check('altro', now=21) == 0
+    assert limiter.retry_after('frank', now=141) == 0
+
+    # Fallimenti fuori finestra non contano
+    limiter.record_failure('anna', now=0)
+    limiter.record_failure('anna', now=100)
+    limiter.record_failure('anna', now=110)
+    assert limiter.retry_after('anna', now=111) == 0
+
+    # Un login riuscito azzera i fallimenti
+    limiter.record_success('anna')
+    limiter.record_failure('anna', now=120)
+    assert limiter.retry_after('anna', now=121) == 0
+
+    stats = limiter.get_stats()
+    assert stats['lockouts'] == 1 and stats['blocked'] == 1
+    print("✅ Limitatore dei tentativi corretto")
+
+def benchmark_concurrent_logins(logins: int = 48, callers: int = 16):
+    """Login concorrenti: throughput con il pool e latenza di un rerun leggero nel frattempo"""
+    print(f"\n📊 Benchmark: {logins} login da {callers} sessioni concorrenti")
+    workers = os.cpu_count() or 2
+
+    for label, run in (
+        ("Script thread", lambda: slow_check('password', EXPECTED)),
+        (f"Pool ({workers} worker)", None),
+    ):
+        pool = PasswordWorkerPool(max_workers=workers, max_queue=logins) if run is None else None
+        call = run or (lambda: pool.run(slow_check, 'password', EXPECTED))
+        rerun_latencies = []
+        done = threading.Event()
+
+        def rerun_probe():
+            # Simula un rerun di un'altra sessione: lavoro Python breve
+            while not done.is_set():
+                start = time.perf_counter()
+                sum(range(2000))
+                rerun_latencies.append((time.perf_counter() - start) * 1000)
+                time.sleep(0.005)
+
+        probe = threading.Thread(target=rerun_probe)
+        probe.start()
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=callers) as sessions:
+            results = list(sessions.map(lambda _: call(), range(logins)))
+        elapsed = time.perf_counter() - start
+        done.set()
+        probe.join()
+
+        assert all(results)
+        worst = max(rerun_latencies) if rerun_latencies else 0.0
+        print(f"   {label:<20} {logins / elapsed:7.1f} login/s   rerun peggiore {worst:6.2f} ms")
+        if pool is not None:
+            stats = pool.get_stats()
+            print(f"   {'':<20} coda massima {stats['max_queue_depth']}, attesa media {stats['avg_wait_ms']:.1f} ms")
+            pool.shutdown()
+
+if __name__ == "__main__":
+    print("🔐 Test Pool Password")
+    print("=" * 40)
+
+    try:
+        test_pool_results_and_stats()
+        test_queue_limit()
+        test_timeout_is_busy()
+        test_attempt_limiter()
+        benchmark_concurrent_logins()
+        print("\n🎉 Tutti i test del pool password completati con successo!")
+    except AssertionError as e:
+        print(f"\n❌ Test fallito: {e}")
+        import traceback
+        traceback.print_exc()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Test per la cache delle query del SupabaseManager
+Verifica TTL, eviction LRU, invalidazione per tabella e contatori
+Creato da Ezio Camporeale
+"""
+
+import sys
+import time
+from pathlib import Path
+
+# Aggiungi il percorso della directory corrente al path di Python
+current_dir = Path(__file__).parent
+sys.path.append(str(current_dir))
+
+from database.query_cache import QueryCache, cached_query, invalidates
+
+class FakeManager:
+    """Manager minimale che conta le chiamate al 'database'"""
+
+    def __init__(self, ttl_seconds: float = 60.0, max_entries: int = 256):
+        self.query_cache = QueryCache(ttl_seconds, max_entries)
+        self.calls = 0
+        self.brokers = [{'id': 1, 'nome_broker': 'IC Markets', 'stato': 'Attivo'}]
+
+    @cached_query('brokers')
+    def get_brokers(self, active_only: bool = False):
+        self.calls += 1
+        return [dict(b) for b in self.brokers]
+
+    @cached_query('clienti_gruppi_pamm', 'gruppi_pamm_gruppi')
+    def get_clienti(self, columns=None):
+        self.calls += 1
+        return [{'id': 1, 'columns': columns}]
+
+    @invalidates('brokers')
+    def add_broker(self, broker):
+        self.brokers.append(broker)
+        return True, "ok"
+
+def test_hit_and_miss():
+    """Seconda chiamata servita dalla cache, parametri diversi = chiave diversa"""
+    manager = FakeManager()
+    manager.get_brokers()
+    manager.get_brokers()
+    manager.get_brokers(active_only=True)
+
+    stats = manager.query_cache.get_stats()
+    assert manager.calls == 2
+    assert stats['hits'] == 1
+    assert stats['misses'] == 2
+    print("✅ Hit/miss corretti")
+
+def test_write_invalidates_table():
+    """Le scritture invalidano solo la tabella coinvolta"""
+    manager = FakeManager()
+    manager.get_brokers()
+    manager.get_clienti(columns=['id', 'nome_cliente'])
+    manager.add_broker({'id': 2, 'nome_broker': 'Pepperstone'})
+
+    assert len(manager.get_brokers()) == 2
+    manager.get_clienti(columns=['id', 'nome_cliente'])
+    assert manager.calls == 3
+    print("✅ Invalidazione per tabella corretta")
+
+def test_ttl_expiry():
+    """Le voci scadute vengono ricaricate"""
+    manager = FakeManager(ttl_seconds=0.05)
+    manager.get_brokers()
+    time.sleep(0.1)
+    manager.get_brokers()
+
+    assert manager.calls == 2
+    assert manager.query_cache.get_stats()['expired'] == 1
+    print("✅ Scadenza TTL corretta")
+
+def test_lru_eviction():
+    """Oltre max_entries viene rimossa la voce usata meno di recente"""
+    cache = QueryCache(ttl_seconds=60, max_entries=2)
+    cache.set('a', [1], ['t'])
+    cache.set('b', [2], ['t'])
+    cache.get('a')
+    cache.set('c', [3], ['t'])
+
+    assert cache.get('b') == (False, None)
+    assert cache.get('a') == (True, [1])
+    assert cache.get_stats()['evictions'] == 1
+    print("✅ Eviction LRU corretta")
+
+def test_stale_load_discarded():
+    """Un caricamento concorrente ad una invalidazione non viene salvato"""
+    cache = QueryCache()
+    generations = cache.generations(['brokers'])
+    cache.invalidate('brokers')
+    cache.set('k', [1], ['brokers'], generations)
+
+    assert cache.get('k') == (False, None)
+    print("✅ Caricamento obsoleto scartato")
+
+def test_results_are_copies():
+    """Modificare il risultato non altera la cache"""
+    manager = FakeManager()
+    manager.get_brokers()[0]['nome_broker'] = 'Modificato'
+
+    assert manager.get_brokers()[0]['nome_broker'] == 'IC Markets'
+    print("✅ Copie difensive corrette")
+
+if __name__ == "__main__":
+    print("🗄️ Test Cache Query")
+    print("=" * 40)
+
+    try:
+        test_hit_and_miss()
+        test_write_invalidates_table()
+        test_ttl_expiry()
+        test_lru_eviction()
+        test_stale_load_discarded()
+        test_results_are_copies()
+        print("\n🎉 Tutti i test della cache completati con successo!")
+    except AssertionError as e:
+        print(f"\n❌ Test fallito: {e}")
+        import traceback
+        traceback.print_exc()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Test per la cache dei ruoli e dei permessi
+Verifica una sola lettura dei ruoli, permessi come frozenset e ricaricamento dopo le scritture sui ruoli
+Creato da Ezio Camporeale
+"""
+
+import sys
+from pathlib import Path
+
+# Aggiungi il percorso della directory corrente al path di Python
+current_dir = Path(__file__).parent
+sys.path.append(str(current_dir))
+
+from database.query_cache import QueryCache, cached_query, invalidates
+from database.role_cache import RoleCache, parse_permissions, permissions_allow
+
+class FakeManager:
+    """Ruoli in memoria con gli stessi decoratori di cache del SupabaseManager"""
+
+    def __init__(self):
+        self.query_cache = QueryCache()
+        self.roles = [
+            {'id': 1, 'name': 'Admin', 'permissions': '["all"]'},
+            {'id': 2, 'name': 'Manager', 'permissions': ['read', 'write']},
+            {'id': 3, 'name': 'Viewer', 'permissions': None},
+        ]
+        self.reads = 0
+        self.role_cache = RoleCache(self)
+
+    @cached_query('roles')
+    def get_all_roles(self):
+        self.reads += 1
+        return [dict(role) for role in self.roles]
+
+    @invalidates('roles')
+    def update_role(self, role_id, role_data):
+        for role in self.roles:
+            if role['id'] == role_id:
+                role.update(role_data)
+        return True, "✅ Ruolo aggiornato con successo"
+
+def test_parse_permissions():
+    """Permessi da stringa JSON, lista o valori non validi"""
+    assert parse_permissions('["read", "write"]') == frozenset({'read', 'write'})
+    assert parse_permissions(['all']) == frozenset({'all'})
+    assert parse_permissions('non json') == frozenset()
+    assert parse_permissions(None) == frozenset()
+    assert permissions_allow(frozenset({'all'}), 'delete')
+    print("✅ Interpretazione permessi corretta")
+
+def test_single_read_for_all_lookups():
+    """Molti controlli di permesso costano una sola lettura dei ruoli"""
+    manager = FakeManager()
+    cache = manager.role_cache
+
+    for _ in range(100):
+        assert cache.get(1).allows('delete')
+        assert cache.get(2).allows('write') and not cache.get(2).allows('delete')
+        assert not cache.get(3).allows('read')
+    assert cache.get(99) is None and cache.get(None) is None
+    assert cache.get_by_name('Manager').id == 2
+    assert isinstance(cache.get(2).permissions, frozenset)
+    assert manager.reads == 1
+    print("✅ Una sola lettura dei ruoli")
+
+def test_reload_after_role_update():
+    """Le scritture sui ruoli invalidano la cache: i nuovi permessi valgono subito"""
+    manager = FakeManager()
+    assert not manager.role_cache.get(2).allows('delete')
+
+    manager.update_role(2, {'name': 'Supervisor', 'permissions': '["read", "delete"]'})
+
+    role = manager.role_cache.get(2)
+    assert role.name == 'Supervisor' and role.allows('delete') and not role.allows('write')
+    assert manager.reads == 2
+    print("✅ Ricaricamento dopo modifica ruolo corretto")
+
+def test_keeps_roles_when_read_fails():
+    """Una lettura fallita (lista vuota) non cancella i ruoli già caricati"""
+    manager = FakeManager()
+    assert manager.role_cache.get(1).name == 'Admin'
+
+    manager.roles = []
+    manager.query_cache.invalidate('roles')
+
+    assert manager.role_cache.get(1).name == 'Admin'
+    print("✅ Ruoli mantenuti in caso di errore")
+
+if __name__ == "__main__":
+    print("🔐 Test Cache Ruoli")
+    print("=" * 40)
+
+    try:
+        test_parse_permissions()
+        test_single_read_for_all_lookups()
+        test_reload_after_role_update()
+        test_keeps_roles_when_read_fails()
+        print("\n🎉 Tutti i test della cache ruoli completati con successo!")
+    except AssertionError as e:
+        print(f"\n❌ Test fallito: {e}")
+        import traceback
+        traceback.print_exc()
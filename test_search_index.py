@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Test per l'indice di ricerca locale a trigrammi
+Verifica match per sottostringa, ranking e termini corti
+Creato da Ezio Camporeale
+"""
+
+import sys
+from pathlib import Path
+
+# Aggiungi il percorso della directory corrente al path di Python
+current_dir = Path(__file__).parent
+sys.path.append(str(current_dir))
+
+from database.fake_backend import FakeSupabaseClient
+from database.search_index import NGramIndex, rank_rows, ilike_filter, contains_term
+
+ROWS = [
+    {'id': 1, 'nome_gruppo': 'Gruppo 1', 'nome_cliente': 'MANUEL CARINI [4000]'},
+    {'id': 2, 'nome_gruppo': 'Gruppo 2', 'nome_cliente': 'MARIO MAZZA 2 [2000]'},
+    {'id': 3, 'nome_gruppo': 'Gruppo 2', 'nome_cliente': 'VITO ZONNO [801]'},
+    {'id': 4, 'nome_gruppo': 'Gruppo 3', 'nome_cliente': 'PAOLA PIRAS [1000]'},
+    {'id': 5, 'nome_gruppo': 'Gruppo 3', 'nome_cliente': 'MIRKO MINATI RIZZI [1876]'},
+]
+
+FIELDS = ('nome_cliente', 'nome_gruppo')
+
+def test_substring_search():
+    """Trova i clienti per sottostringa, senza distinzione maiuscole"""
+    index = NGramIndex(FIELDS)
+    index.build(ROWS)
+
+    ids = [row['id'] for row in index.search('carini')]
+    assert ids == [1]
+    ids = [row['id'] for row in index.search('gruppo 2')]
+    assert sorted(ids) == [2, 3]
+    print("✅ Ricerca per sottostringa corretta")
+
+def test_ranking():
+    """I prefissi di parola precedono i match interni"""
+    index = NGramIndex(FIELDS)
+    index.build(ROWS)
+
+    ids = [row['id'] for row in index.search('ri')]
+    assert ids[0] == 5
+    assert set(ids) == {1, 2, 5}
+    print("✅ Ranking corretto")
+
+def test_limit_and_empty():
+    """Limite risultati e termine vuoto"""
+    index = NGramIndex(FIELDS)
+    index.build(ROWS)
+
+    assert len(index.search('gruppo', limit=2)) == 2
+    assert index.search('   ') == []
+    assert index.search('inesistente') == []
+    print("✅ Limite e casi limite corretti")
+
+def test_rank_rows():
+    """Ordinamento dei risultati del backend"""
+    ranked = rank_rows(list(reversed(ROWS)), 'mario', FIELDS)
+    assert ranked[0]['id'] == 2
+    print("✅ rank_rows corretto")
+
+def test_literal_ilike_filter():
+    """%, _, \\ e * del termine sono letterali nel filtro PostgREST (backend finto)"""
+    client = FakeSupabaseClient()
+    client.seed('brokers', [{'id': 1, 'nome_broker': 'IC Markets'}])
+    client.seed('gruppi_pamm_gruppi', [{'id': 1, 'nome_gruppo': 'Gruppo 1', 'manager': 'frank', 'broker_id': 1, 'account_pamm': 'PAMM001'}])
+    nomi = ['AB_CD', 'ABXCD', '50% OFF', 'A\\B"C', 'A*B', 'AXB', 'AXXB']
+    client.seed('clienti_gruppi_pamm', [{'id': i, 'gruppo_pamm_id': 1, 'nome_cliente': nome} for i, nome in enumerate(nomi, 1)])
+
+    def search(term):
+        rows = client.table('v_clienti_gruppi_pamm').select('*').or_(ilike_filter(FIELDS, term)).execute().data
+        return sorted(row['nome_cliente'] for row in rows if contains_term(row, term, FIELDS))
+
+    assert search('b_c') == ['AB_CD']
+    assert search('0%') == ['50% OFF']
+    assert search('\\b"') == ['A\\B"C']
+    # * non è un jolly: il filtro lo allarga a un carattere, contains_term tiene solo il match letterale
+    assert search('a*b') == ['A*B']
+    print("✅ Filtro ILIKE letterale corretto")
+
+if __name__ == "__main__":
+    print("🔍 Test Indice di Ricerca Locale")
+    print("=" * 40)
+
+    try:
+        test_substring_search()
+        test_ranking()
+        test_limit_and_empty()
+        test_rank_rows()
+        test_literal_ilike_filter()
+        print("\n🎉 Tutti i test della ricerca completati con successo!")
+    except AssertionError as e:
+        print(f"\n❌ Test fallito: {e}")
+        import traceback
+        traceback.print_exc()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Test per la deduplicazione delle letture concorrenti (singleflight)
+Verifica accorpamento delle chiamate, propagazione errori e integrazione con la cache
+Creato da Ezio Camporeale
+"""
+
+import sys
+import time
+import threading
+from pathlib import Path
+
+# Aggiungi il percorso della directory corrente al path di Python
+current_dir = Path(__file__).parent
+sys.path.append(str(current_dir))
+
+from database.singleflight import SingleFlight
+from database.query_cache import QueryCache, cached_query, invalidates
+
+def _run_concurrently(target, count: int):
+    """Avvia count thread sulla stessa funzione e restituisce i risultati"""
+    results = [None] * count
+    barrier = threading.Barrier(count)
+
+    def worker(i):
+        barrier.wait()
+        try:
+            results[i] = target()
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+def test_collapse():
+    """Dieci chiamate concorrenti = una sola esecuzione"""
+    flight = SingleFlight()
+    executions = []
+
+    def slow_query():
+        executions.append(1)
+        time.sleep(0.2)
+        return [{'id': 1}]
+
+    results = _run_concurrently(lambda: flight.do('brokers', slow_query), 10)
+    stats = flight.get_stats()
+
+    assert len(executions) == 1
+    assert all(r == [{'id': 1}] for r in results)
+    assert stats['calls'] == 10
+    assert stats['collapsed'] == 9
+    assert flight.in_flight() == 0
+    print("✅ Chiamate concorrenti accorpate")
+
+def test_error_shared():
+    """L'errore della richiesta viene propagato a tutti i chiamanti in attesa"""
+    flight = SingleFlight()
+
+    def failing_query():
+        time.sleep(0.1)
+        raise RuntimeError("timeout")
+
+    results = _run_concurrently(lambda: flight.do('k', failing_query), 5)
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert flight.in_flight() == 0
+    print("✅ Errori propagati ai chiamanti in attesa")
+
+class FakeManager:
+    """Manager minimale con una query lenta"""
+
+    def __init__(self):
+        self.query_cache = QueryCache()
+        self.calls = 0
+
+    @cached_query('brokers')
+    def get_brokers(self):
+        self.calls += 1
+        time.sleep(0.2)
+        return [{'id': 1, 'nome_broker': 'IC Markets'}]
+
+    @invalidates('brokers')
+    def add_broker(self):
+        return True, "ok"
+
+def test_cached_query_integration():
+    """Le miss concorrenti della cache producono una sola query"""
+    manager = FakeManager()
+    results = _run_concurrently(manager.get_brokers, 8)
+
+    assert manager.calls == 1
+    assert all(r == [{'id': 1, 'nome_broker': 'IC Markets'}] for r in results)
+    # Ogni chiamante riceve una copia indipendente
+    assert len({id(r) for r in results}) == 8
+    assert manager.query_cache.get_stats()['collapsed'] == 7
+    print("✅ Integrazione con la cache corretta")
+
+def test_write_not_joined():
+    """Una lettura dopo una scrittura non si aggancia a quella partita prima"""
+    manager = FakeManager()
+    first = threading.Thread(target=manager.get_brokers)
+    first.start()
+    time.sleep(0.05)
+    manager.add_broker()
+    manager.get_brokers()
+    first.join()
+
+    assert manager.calls == 2
+    print("✅ Letture dopo una scrittura non accorpate")
+
+if __name__ == "__main__":
+    print("🛫 Test Singleflight")
+    print("=" * 40)
+
+    try:
+        test_collapse()
+        test_error_shared()
+        test_cached_query_integration()
+        test_write_not_joined()
+        print("\n🎉 Tutti i test singleflight completati con successo!")
+    except AssertionError as e:
+        print(f"\n❌ Test fallito: {e}")
+        import traceback
+        traceback.print_exc()
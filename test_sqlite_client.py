@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Test per il backend SQLite locale
+Verifica query builder, paginazione keyset, join embedded, upsert ed errori
+Creato da Ezio Camporeale
+"""
+
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+# Aggiungi il percorso della directory corrente al path di Python
+current_dir = Path(__file__).parent
+sys.path.append(str(current_dir))
+
+from database.sqlite_client import SQLiteClient, SQLiteAPIError
+
+def _new_client() -> SQLiteClient:
+    """Database vuoto in una directory temporanea"""
+    return SQLiteClient(Path(tempfile.mkdtemp()) / "test.db")
+
+def _seed(client: SQLiteClient):
+    client.table('brokers').insert({'id': 1, 'nome_broker': 'IC Markets'}).execute()
+    client.table('gruppi_pamm_gruppi').insert([
+        {'nome_gruppo': 'Gruppo 1', 'manager': 'frank', 'broker_id': 1, 'account_pamm': 'PAMM001'},
+        {'nome_gruppo': 'Gruppo 2', 'manager': 'mario', 'broker_id': 1, 'account_pamm': 'PAMM002'},
+    ]).execute()
+    client.table('clienti_gruppi_pamm').insert([
+        {'gruppo_pamm_id': 1, 'nome_cliente': 'MANUEL CARINI [4000]', 'importo_cliente': 4000.0},
+        {'gruppo_pamm_id': 2, 'nome_cliente': 'MARIO MAZZA [2000]', 'importo_cliente': 2000.0},
+        {'gruppo_pamm_id': 2, 'nome_cliente': 'VITO ZONNO [801]', 'importo_cliente': 801.0},
+    ]).execute()
+
+def test_crud_roundtrip():
+    """Insert, select filtrata, update e delete restituiscono le righe come PostgREST"""
+    client = _new_client()
+    inserted = client.table('brokers').insert({'nome_broker': 'Pepperstone', 'stato': 'Attivo'}).execute().data
+    broker_id = inserted[0]['id']
+
+    updated = client.table('brokers').update({'stato': 'Inattivo'}).eq('id', broker_id).execute().data
+    assert updated[0]['stato'] == 'Inattivo'
+    assert client.table('brokers').select('id', count='exact', head=True).eq('stato', 'Attivo').execute().count == 0
+
+    deleted = client.table('brokers').delete().eq('id', broker_id).execute().data
+    assert [row['id'] for row in deleted] == [broker_id]
+    assert client.table('brokers').select('*').execute().data == []
+    print("✅ CRUD corretto")
+
+def test_keyset_or_filter():
+    """Il filtro OR del cursore composto di _fetch_page viene tradotto correttamente"""
+    client = _new_client()
+    _seed(client)
+    client.table('clienti_gruppi_pamm').update({'data_aggiornamento': '2024-01-01T00:00:00'}).gt('id', 0).execute()
+
+    rows = client.table('clienti_gruppi_pamm').select('id,nome_cliente').or_(
+        'data_aggiornamento.gt."2024-01-01T00:00:00",and(data_aggiornamento.eq."2024-01-01T00:00:00",id.gt.1)'
+    ).order('data_aggiornamento').order('id').limit(10).execute().data
+
+    assert [row['id'] for row in rows] == [2, 3]
+    assert set(rows[0].keys()) == {'id', 'nome_cliente'}
+    print("✅ Cursore composto corretto")
+
+def test_embedded_and_view():
+    """Join embedded !inner e vista appiattita restituiscono gli stessi clienti"""
+    client = _new_client()
+    _seed(client)
+
+    embedded = client.table('clienti_gruppi_pamm').select('*, gruppi_pamm_gruppi!inner(id, nome_gruppo)').eq(
+        'gruppo_pamm_id', 2).order('id').execute().data
+    view = client.table('v_clienti_gruppi_pamm').select('*').eq('gruppo_pamm_id', 2).order('id').execute().data
+
+    assert [row['gruppi_pamm_gruppi']['nome_gruppo'] for row in embedded] == ['Gruppo 2', 'Gruppo 2']
+    assert [row['id'] for row in embedded] == [row['id'] for row in view]
+    assert view[0]['commissioni_percentuale'] == 25.0
+    print("✅ Embedding e vista corretti")
+
+def test_upsert_and_unique_error():
+    """Upsert su id aggiorna, insert duplicato solleva il codice 23505"""
+    client = _new_client()
+    _seed(client)
+
+    client.table('clienti_gruppi_pamm').upsert([
+        {'id': 1, 'gruppo_pamm_id': 1, 'nome_cliente': 'MANUEL CARINI [4000]', 'stato_prop': 'Svolto'},
+    ], on_conflict='id').execute()
+    row = client.table('clienti_gruppi_pamm').select('stato_prop').eq('id', 1).execute().data[0]
+    assert row['stato_prop'] == 'Svolto'
+
+    try:
+        client.table('clienti_gruppi_pamm').insert({'gruppo_pamm_id': 1, 'nome_cliente': 'MANUEL CARINI [4000]'}).execute()
+        assert False, "Inserimento duplicato accettato"
+    except SQLiteAPIError as e:
+        assert e.code == '23505'
+    print("✅ Upsert e vincoli UNIQUE corretti")
+
+def test_rpc_and_types():
+    """Funzioni locali, booleani e JSON tornano con i tipi di PostgREST"""
+    client = _new_client()
+    _seed(client)
+
+    stats = client.rpc('get_statistiche_generali').execute().data[0]
+    assert stats['gruppi_pamm_attivi'] == 3
+
+    found = client.rpc('search_clienti_gruppi_pamm', {'search_term': 'mario', 'max_results': 10}).execute().data
+    assert found[0]['nome_cliente'] == 'MARIO MAZZA [2000]'
+
+    roles = client.table('roles').select('*').eq('name', 'Admin').execute().data
+    assert roles[0]['permissions'] == ['all']
+
+    user = client.table('users').insert({'username': 'demo', 'email': 'demo@x.it', 'password_hash': 'x', 'role_id': 1}).execute().data[0]
+    assert user['is_active'] is True and user['is_admin'] is False
+    print("✅ RPC e tipi corretti")
+
+def test_cascade_delete_rpc():
+    """Eliminazione del gruppo con i clienti in una transazione, con riepilogo dell'impatto"""
+    client = _new_client()
+    _seed(client)
+
+    summary = client.rpc('delete_gruppo_pamm_cascade', {'p_gruppo_id': 2}).execute().data
+    assert summary == [{'gruppo_id': 2, 'nome_gruppo': 'Gruppo 2', 'clienti_eliminati': 2, 'importo_eliminato': 2801.0}]
+    assert [row['gruppo_pamm_id'] for row in client.table('clienti_gruppi_pamm').select('gruppo_pamm_id').execute().data] == [1]
+
+    # Gruppo inesistente: nessuna riga e nessuna modifica
+    assert client.rpc('delete_gruppo_pamm_cascade', {'p_gruppo_id': 2}).execute().data == []
+
+    assert len(client.table('gruppi_pamm_gruppi').select('id').execute().data) == 1
+    print("✅ Eliminazione a cascata transazionale corretta")
+
+def _aggregati(client: SQLiteClient) -> dict:
+    rows = client.table('gruppi_pamm_aggregati').select('*').order('gruppo_pamm_id').execute().data
+    return {row['gruppo_pamm_id']: (row['numero_clienti_attivi'], row['numero_clienti_svolti'], row['totale_depositi'])
+            for row in rows}
+
+def test_gruppi_aggregati_triggers():
+    """Gli aggregati per gruppo seguono ogni scrittura sui clienti e si ricostruiscono dai clienti"""
+    client = _new_client()
+    _seed(client)
+    assert _aggregati(client) == {1: (1, 0, 4000.0), 2: (2, 0, 2801.0)}
+
+    client.table('clienti_gruppi_pamm').update({'stato_prop': 'Svolto', 'importo_cliente': 2500.0}).eq('nome_cliente', 'MARIO MAZZA [2000]').execute()
+    assert _aggregati(client)[2] == (2, 1, 3301.0)
+
+    # Spostamento di gruppo: sottratto dal vecchio, sommato al nuovo
+    client.table('clienti_gruppi_pamm').update({'gruppo_pamm_id': 1}).eq('nome_cliente', 'VITO ZONNO [801]').execute()
+    assert _aggregati(client) == {1: (2, 0, 4801.0), 2: (1, 1, 2500.0)}
+
+    # Colonne che non entrano negli aggregati non toccano la tabella
+    client.table('clienti_gruppi_pamm').update({'fase_prop': 'Fase 1'}).eq('gruppo_pamm_id', 1).execute()
+    assert _aggregati(client)[1] == (2, 0, 4801.0)
+    client.table('clienti_gruppi_pamm').delete().eq('nome_cliente', 'MANUEL CARINI [4000]').execute()
+    assert _aggregati(client)[1] == (1, 0, 801.0)
+
+    # Eliminazione del gruppo: la riga degli aggregati segue la cascata
+    client.rpc('delete_gruppo_pamm_cascade', {'p_gruppo_id': 2}).execute()
+    assert list(_aggregati(client)) == [1]
+
+    # Ricostruzione dopo valori corrotti
+    client.write([("UPDATE gruppi_pamm_aggregati SET numero_clienti_attivi = 99, totale_depositi = 0", [])], 'gruppi_pamm_aggregati')
+    assert client.rpc('rebuild_gruppi_pamm_aggregati', {'p_gruppo_id': 1}).execute().data == 1
+    assert _aggregati(client) == {1: (1, 0, 801.0)}
+    assert client.rpc('rebuild_gruppi_pamm_aggregati', {}).execute().data == 1
+
+    # Un database con clienti ma senza aggregati viene completato all'apertura
+    client.write([("DELETE FROM gruppi_pamm_aggregati", [])], 'gruppi_pamm_aggregati')
+    reopened = SQLiteClient(client.path)
+    assert _aggregati(reopened) == {1: (1, 0, 801.0)}
+    reopened.close()
+    client.close()
+    print("✅ Aggregati per gruppo incrementali corretti")
+
+def test_thread_connections():
+    """Ogni thread usa la propria connessione sullo stesso database"""
+    client = _new_client()
+    _seed(client)
+    counts = []
+
+    def worker():
+        counts.append(len(client.table('clienti_gruppi_pamm').select('id').execute().data))
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert counts == [3, 3, 3, 3]
+    client.close()
+    print("✅ Connessioni per thread corrette")
+
+if __name__ == "__main__":
+    print("🗃️ Test Backend SQLite")
+    print("=" * 40)
+
+    try:
+        test_crud_roundtrip()
+        test_keyset_or_filter()
+        test_embedded_and_view()
+        test_upsert_and_unique_error()
+        test_rpc_and_types()
+        test_cascade_delete_rpc()
+        test_gruppi_aggregati_triggers()
+        test_thread_connections()
+        print("\n🎉 Tutti i test del backend SQLite completati con successo!")
+    except AssertionError as e:
+        print(f"\n❌ Test fallito: {e}")
+        import traceback
+        traceback.print_exc()
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Test per il mirror locale con sincronizzazione delta sul backend finto
+Verifica high-water mark, finestra di sovrapposizione, tombstone e ritorno alle letture dirette
+Creato da Ezio Camporeale
+"""
+
+import sys
+import threading
+from pathlib import Path
+
+# Aggiungi il percorso della directory corrente al path di Python
+current_dir = Path(__file__).parent
+sys.path.append(str(current_dir))
+
+from database.fake_backend import FakeSupabaseClient, InjectedError
+from database.sync_engine import SyncEngine
+
+TABLE = 'clienti_gruppi_pamm'
+
+class FakeManager:
+    """Manager minimale con la stessa paginazione keyset del SupabaseManager"""
+
+    def __init__(self, client):
+        self.supabase = client
+
+    def iter_table(self, table, order_by='id', page_size=None, after=None):
+        page_size = page_size or 1000
+        while True:
+            query = self.supabase.table(table).select('*')
+            if order_by == 'id':
+                if after is not None:
+                    query = query.gt('id', after)
+                query = query.order('id')
+            else:
+                if after is not None:
+                    value, last_id = after
+                    query = query.or_(f'{order_by}.gt."{value}",and({order_by}.eq."{value}",id.gt.{last_id})')
+                query = query.order(order_by).order('id')
+            rows = query.limit(page_size).execute().data
+            yield from rows
+            if len(rows) < page_size:
+                return
+            after = rows[-1]['id'] if order_by == 'id' else (rows[-1][order_by], rows[-1]['id'])
+
+def _client(tombstones: bool = True) -> FakeSupabaseClient:
+    """Un gruppo e dieci clienti con data_aggiornamento distinte; tombstone installati se richiesto"""
+    client = FakeSupabaseClient()
+    if tombstones:
+        client.connection().execute(
+            'CREATE TABLE sync_tombstones (id INTEGER PRIMARY KEY AUTOINCREMENT, table_name TEXT NOT NULL, '
+            'row_id INTEGER NOT NULL, deleted_at TEXT)'
+        )
+    client.seed('brokers', [{'id': 1, 'nome_broker': 'IC Markets'}])
+    client.seed('gruppi_pamm_gruppi', [{'id': 1, 'nome_gruppo': 'Gruppo 1', 'manager': 'frank', 'broker_id': 1, 'account_pamm': 'PAMM001'}])
+    client.seed(TABLE, [
+        {'id': i, 'gruppo_pamm_id': 1, 'nome_cliente': f'CLIENTE {i}', 'data_aggiornamento': f'2025-01-{i:02d}T00:00:00'}
+        for i in range(1, 11)
+    ])
+    return client
+
+def _engine(client) -> SyncEngine:
+    return SyncEngine(FakeManager(client), [TABLE], overlap_seconds=5.0)
+
+def _add_cliente(client, row_id: int, timestamp: str):
+    client.table(TABLE).insert({'id': row_id, 'gruppo_pamm_id': 1, 'nome_cliente': f'CLIENTE {row_id}',
+                                'data_aggiornamento': timestamp}).execute()
+
+def test_full_then_delta():
+    """Primo refresh completo, poi solo le righe oltre l'high-water mark"""
+    client = _client()
+    engine = _engine(client)
+
+    assert [row['id'] for row in engine.rows(TABLE)] == list(range(1, 11))
+    assert engine.mirrors[TABLE].high_water == ('2025-01-10T00:00:00', 10)
+
+    client.table(TABLE).update({'nome_cliente': 'NUOVO', 'data_aggiornamento': '2025-01-11T00:00:00'}).eq('id', 3).execute()
+    rows = {row['id']: row for row in engine.rows(TABLE)}
+    assert rows[3]['nome_cliente'] == 'NUOVO' and len(rows) == 10
+    assert engine.mirrors[TABLE].high_water == ('2025-01-11T00:00:00', 3)
+
+    stats = engine.get_stats()
+    # Il delta rilegge solo la riga modificata e quella nella finestra di sovrapposizione
+    assert stats['full_syncs'] == 1 and stats['delta_syncs'] == 1 and stats['rows_pulled'] == 12
+    print("✅ High-water mark e refresh delta corretti")
+
+def test_overlap_window():
+    """Righe confermate in ritardo con timestamp appena precedenti vengono recuperate, quelle più vecchie no"""
+    client = _client()
+    engine = _engine(client)
+    engine.rows(TABLE)
+
+    # 3 secondi prima dell'high-water mark: dentro la finestra di 5 secondi
+    _add_cliente(client, 11, '2025-01-09T23:59:57')
+    # Un giorno prima: fuori dalla finestra (solo un caricamento completo la vedrebbe)
+    _add_cliente(client, 12, '2025-01-09T00:00:00')
+
+    ids = [row['id'] for row in engine.rows(TABLE)]
+    assert 11 in ids and 12 not in ids
+    # L'high-water mark non arretra per le righe della finestra
+    assert engine.mirrors[TABLE].high_water == ('2025-01-10T00:00:00', 10)
+
+    engine.reset()
+    assert 12 in [row['id'] for row in engine.rows(TABLE)]
+    print("✅ Finestra di sovrapposizione corretta")
+
+def test_tombstones():
+    """Le eliminazioni registrate dopo il primo caricamento tolgono le righe dal mirror"""
+    client = _client()
+    # Tombstone precedente al primo caricamento: già riflesso nei dati, non va riapplicato
+    client.table('sync_tombstones').insert({'table_name': TABLE, 'row_id': 99}).execute()
+    engine = _engine(client)
+    assert len(engine.rows(TABLE)) == 10
+
+    client.table(TABLE).delete().eq('id', 4).execute()
+    client.table('sync_tombstones').insert([{'table_name': TABLE, 'row_id': 4},
+                                            {'table_name': 'brokers', 'row_id': 1}]).execute()
+
+    ids = [row['id'] for row in engine.rows(TABLE)]
+    assert 4 not in ids and len(ids) == 9
+    assert engine.get_stats()['rows_deleted'] == 1
+    print("✅ Tombstone applicati")
+
+def test_missing_schema_disables_mirror():
+    """Senza sync_tombstones il mirror si disattiva e si torna alle letture dirette"""
+    client = _client(tombstones=False)
+    engine = _engine(client)
+
+    assert engine.rows(TABLE) is None
+    assert not engine.enabled
+    assert engine.rows(TABLE) is None
+    print("✅ Ritorno alle letture dirette senza schema di sincronizzazione")
+
+def test_transient_error_keeps_mirror():
+    """Un errore di rete non disattiva il mirror: lettura diretta al primo caricamento, mirror esistente dopo"""
+    client = _client()
+    engine = _engine(client)
+
+    client.inject_error(table=TABLE, action='select', times=1)
+    assert engine.rows(TABLE) is None
+    assert engine.enabled
+
+    assert len(engine.rows(TABLE)) == 10
+
+    client.inject_error(table=TABLE, action='select', times=1, error=InjectedError("timeout", '504'))
+    assert len(engine.rows(TABLE)) == 10
+    assert engine.enabled and engine.get_stats()['errors'] == 2
+    print("✅ Errori transitori non disattivano il mirror")
+
+def test_min_interval_and_writes():
+    """Entro l'intervallo minimo nessun refresh, salvo una scrittura del manager sulla tabella"""
+    client = _client()
+    generations = {TABLE: 0}
+    engine = SyncEngine(FakeManager(client), [TABLE], overlap_seconds=5.0, min_interval_seconds=60.0,
+                        generation=lambda table: generations[table])
+    first = engine.rows(TABLE)
+
+    _add_cliente(client, 11, '2025-01-11T00:00:00')
+    client.reset_stats()
+    # Stessa lista, nessuna richiesta: la riga scritta da un altro processo arriva dopo l'intervallo
+    assert engine.rows(TABLE) is first and client.get_stats()['requests'] == 0
+    assert engine.get_stats()['skipped_syncs'] == 1
+
+    # Una scrittura del manager (invalidazione della cache) forza il refresh delta
+    generations[TABLE] += 1
+    rows = engine.rows(TABLE)
+    assert [row['id'] for row in rows] == list(range(1, 12)) and client.get_stats()['requests'] > 0
+    print("✅ Intervallo minimo e refresh dopo le scritture corretti")
+
+def test_rows_in_id_order():
+    """Le righe restano ordinate per id anche con aggiornamenti e inserimenti fuori ordine"""
+    client = _client()
+    engine = _engine(client)
+    engine.rows(TABLE)
+
+    client.table(TABLE).update({'nome_cliente': 'NUOVO', 'data_aggiornamento': '2025-01-12T00:00:00'}).eq('id', 2).execute()
+    _add_cliente(client, 0, '2025-01-12T00:00:01')
+    assert [row['id'] for row in engine.rows(TABLE)] == list(range(0, 11))
+    print("✅ Righe ordinate per id")
+
+def test_concurrent_refresh_stats():
+    """I contatori restano coerenti con refresh concorrenti da più sessioni"""
+    client = _client()
+    engine = _engine(client)
+    engine.rows(TABLE)
+
+    def session():
+        for _ in range(20):
+            engine.rows(TABLE)
+
+    threads = [threading.Thread(target=session) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stats = engine.get_stats()
+    assert stats['full_syncs'] + stats['delta_syncs'] == 1 + 8 * 20
+    print("✅ Contatori coerenti con refresh concorrenti")
+
+def run_manager_mirror_check():
+    """Il SupabaseManager con un client iniettato usa il mirror (richiede le dipendenze dell'app)"""
+    try:
+        from database.supabase_manager import SupabaseManager
+    except ImportError as e:
+        print(f"⚠️ Verifica del manager saltata, dipendenze mancanti: {e}")
+        return
+
+    client = _client()
+    manager = SupabaseManager(client=client)
+    assert manager.sync_engine is not None
+    assert len(manager.get_all_clienti_gruppi()) == 10
+    assert manager.get_sync_stats()['tables'][TABLE]['synced']
+    # Join locale clienti + gruppo con le stesse colonne della join embedded
+    clienti = manager.get_clienti_by_gruppo(1)
+    assert len(clienti) == 10 and clienti[0]['nome_gruppo'] == 'Gruppo 1'
+    manager.close()
+    print("✅ Mirror attivo con il client iniettato")
+
+if __name__ == "__main__":
+    print("🔄 Test Mirror Locale")
+    print("=" * 40)
+
+    try:
+        test_full_then_delta()
+        test_overlap_window()
+        test_tombstones()
+        test_missing_schema_disables_mirror()
+        test_transient_error_keeps_mirror()
+        test_min_interval_and_writes()
+        test_rows_in_id_order()
+        test_concurrent_refresh_stats()
+        run_manager_mirror_check()
+        print("\n🎉 Tutti i test del mirror locale completati con successo!")
+    except AssertionError as e:
+        print(f"\n❌ Test fallito: {e}")
+        import traceback
+        traceback.print_exc()
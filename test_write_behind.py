@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Test per la coda write-behind e la lettura dell'utente con ruolo incorporato
+Verifica unione per chiave, flush a lotti, nuovo tentativo dopo un errore e login in una richiesta
+Creato da Ezio Camporeale
+"""
+
+import sys
+import time
+import threading
+from pathlib import Path
+
+# Aggiungi il percorso della directory corrente al path di Python
+current_dir = Path(__file__).parent
+sys.path.append(str(current_dir))
+
+from database.write_behind import WriteBehindQueue
+from database.fake_backend import FakeSupabaseClient
+from database.role_cache import RoleInfo
+
+def test_coalesce_and_flush():
+    """Più scritture sulla stessa chiave diventano una sola"""
+    batches = []
+    queue = WriteBehindQueue(batches.append, flush_interval=60)
+
+    queue.submit(1, '2025-01-01T10:00:00')
+    queue.submit(2, '2025-01-01T10:00:00')
+    queue.submit(1, '2025-01-01T10:00:05')
+    assert queue.pending() == 2
+
+    assert queue.flush() == 2
+    assert batches == [{1: '2025-01-01T10:00:05', 2: '2025-01-01T10:00:00'}]
+    assert queue.flush() == 0
+    stats = queue.get_stats()
+    assert stats['submitted'] == 3 and stats['coalesced'] == 1 and stats['batches'] == 1
+    queue.close()
+    print("✅ Unione per chiave corretta")
+
+def test_background_flush_when_batch_full():
+    """Raggiunto max_batch il thread in background scrive senza attendere l'intervallo"""
+    flushed = threading.Event()
+    batches = []
+
+    def flush_fn(batch):
+        batches.append(batch)
+        flushed.set()
+
+    queue = WriteBehindQueue(flush_fn, flush_interval=60, max_batch=3)
+    for user_id in range(3):
+        queue.submit(user_id, 'now')
+
+    assert flushed.wait(2), "Flush in background non eseguito"
+    assert batches == [{0: 'now', 1: 'now', 2: 'now'}]
+    queue.close()
+    print("✅ Flush in background corretto")
+
+def test_retry_after_error():
+    """Un flush fallito rimette in coda le scritture senza sovrascrivere quelle più recenti"""
+    calls = []
+
+    def flush_fn(batch):
+        calls.append(dict(batch))
+        if len(calls) == 1:
+            raise ConnectionError("rete non disponibile")
+
+    queue = WriteBehindQueue(flush_fn, flush_interval=60)
+    queue.submit(1, 'a')
+    queue.submit(2, 'a')
+    assert queue.flush() == 0 and queue.pending() == 2
+
+    queue.submit(1, 'b')
+    assert queue.flush() == 2
+    assert calls[-1] == {1: 'b', 2: 'a'}
+    assert queue.get_stats()['errors'] == 1
+    queue.close()
+    print("✅ Nuovo tentativo dopo errore corretto")
+
+def test_close_flushes_and_rejects():
+    """La chiusura scrive le ultime scritture e rifiuta le successive"""
+    batches = []
+    queue = WriteBehindQueue(batches.append, flush_interval=60)
+    queue.submit(1, 'x')
+    queue.close()
+
+    assert batches == [{1: 'x'}]
+    try:
+        queue.submit(2, 'y')
+        assert False, "Coda chiusa accetta scritture"
+    except RuntimeError:
+        pass
+    print("✅ Chiusura corretta")
+
+def test_user_with_embedded_role():
+    """Utente e ruolo arrivano nella stessa risposta"""
+    client = FakeSupabaseClient()
+    # I ruoli predefiniti sono inseriti dallo schema
+    admin_role = client.table('roles').select('id').eq('name', 'Admin').execute().data[0]['id']
+    client.seed('users', [{'id': 1, 'username': 'admin', 'email': 'admin@example.com',
+                           'password_hash': 'x', 'role_id': admin_role}])
+    client.reset_stats()
+
+    rows = client.table('users').select('*, roles(id, name, permissions)').eq('username', 'admin').limit(1).execute().data
+
+    assert client.get_stats()['requests'] == 1
+    role = RoleInfo.from_row(rows[0]['roles'])
+    assert role.id == admin_role and role.name == 'Admin' and role.allows('delete')
+    assert RoleInfo.from_row(None) is None
+
+    # Scrittura a lotti dell'ultimo login: una richiesta per istante
+    client.table('users').update({'last_login': '2025-01-01T10:00:00'}).in_('id', [1]).execute()
+    assert client.table('users').select('last_login').eq('id', 1).execute().data[0]['last_login'] == '2025-01-01T10:00:00'
+    print("✅ Utente con ruolo incorporato corretto")
+
+if __name__ == "__main__":
+    print("🕒 Test Write-Behind")
+    print("=" * 40)
+
+    try:
+        start = time.perf_counter()
+        test_coalesce_and_flush()
+        test_background_flush_when_batch_full()
+        test_retry_after_error()
+        test_close_flushes_and_rejects()
+        test_user_with_embedded_role()
+        print(f"\n🎉 Tutti i test write-behind completati in {time.perf_counter() - start:.2f}s!")
+    except AssertionError as e:
+        print(f"\n❌ Test fallito: {e}")
+        import traceback
+        traceback.print_exc()
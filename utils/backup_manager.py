@@ -0,0 +1,322 @@
+"""
+Backup compressi delle tabelle in BACKUPS_DIR: completi, incrementali su data_aggiornamento, restore e retention
+Ogni tabella è scritta pagina per pagina in NDJSON gzip: nessuna tabella viene caricata tutta in memoria
+Creato da Ezio Camporeale
+"""
+
+import os
+import gzip
+import json
+import shutil
+import hashlib
+import logging
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from config import (
+    BACKUPS_DIR, BACKUP_RETENTION_DAYS, BACKUP_TABLES, SYNC_MIRROR_TABLES,
+    SYNC_OVERLAP_SECONDS, QUERY_PAGE_SIZE, BULK_UPSERT_CHUNK_SIZE
+)
+
+MANIFEST_NAME = 'manifest.json'
+TOMBSTONES_TABLE = 'sync_tombstones'
+FILE_SUFFIX = '.ndjson.gz'
+
+# Un solo backup/restore/pruning alla volta nel processo
+_BACKUP_LOCK = threading.Lock()
+
+class BackupManager:
+    """Crea, elenca, ripristina ed elimina i backup delle tabelle"""
+
+    def __init__(self, supabase_manager, backups_dir: Path = BACKUPS_DIR,
+                 tables: Optional[List[str]] = None, incremental_tables: Optional[List[str]] = None,
+                 retention_days: int = BACKUP_RETENTION_DAYS, page_size: int = QUERY_PAGE_SIZE,
+                 overlap_seconds: float = SYNC_OVERLAP_SECONDS):
+        self.supabase_manager = supabase_manager
+        self.backups_dir = Path(backups_dir)
+        self.tables = tables or BACKUP_TABLES
+        # Tabelle con data_aggiornamento gestita dal server (create_sync_tombstones.sql): le altre sono sempre complete
+        self.incremental_tables = set(incremental_tables if incremental_tables is not None else SYNC_MIRROR_TABLES)
+        self.retention_days = retention_days
+        self.page_size = page_size
+        self.overlap_seconds = overlap_seconds
+
+    # ---------- elenco ----------
+
+    def list_backups(self) -> List[Dict[str, Any]]:
+        """Manifest dei backup completati, dal più vecchio al più recente"""
+        if not self.backups_dir.exists():
+            return []
+        manifests = []
+        for manifest_path in self.backups_dir.glob(f'*/{MANIFEST_NAME}'):
+            try:
+                manifests.append(json.loads(manifest_path.read_text(encoding='utf-8')))
+            except (OSError, ValueError) as e:
+                logging.warning(f"⚠️ Manifest non leggibile {manifest_path}: {e}")
+        return sorted(manifests, key=lambda manifest: manifest['created_at'])
+
+    def get_backup(self, backup_id: str) -> Optional[Dict[str, Any]]:
+        return next((manifest for manifest in self.list_backups() if manifest['id'] == backup_id), None)
+
+    # ---------- creazione ----------
+
+    def create_full_backup(self) -> Tuple[bool, str]:
+        """Snapshot completo di tutte le tabelle"""
+        return self._create_backup('full', None)
+
+    def create_incremental_backup(self) -> Tuple[bool, str]:
+        """Solo le righe modificate dopo l'ultimo backup (completo se non ne esiste uno)"""
+        backups = self.list_backups()
+        if not backups:
+            logging.info("ℹ️ Nessun backup precedente: eseguo un backup completo")
+            return self._create_backup('full', None)
+        return self._create_backup('incremental', backups[-1])
+
+    def _create_backup(self, kind: str, parent: Optional[Dict[str, Any]]) -> Tuple[bool, str]:
+        if not _BACKUP_LOCK.acquire(blocking=False):
+            return False, "❌ Un backup o un ripristino è già in corso"
+        try:
+            created_at = datetime.now()
+            directory = self._new_directory(created_at, kind)
+            manifest: Dict[str, Any] = {
+                'id': directory.name,
+                'type': kind,
+                'parent': parent['id'] if parent else None,
+                'created_at': created_at.isoformat(),
+                'format': 'ndjson.gz',
+                'tables': {},
+                'errors': {},
+            }
+
+            for table in self.tables:
+                since = self._since(table, parent)
+                try:
+                    manifest['tables'][table] = self._dump_table(directory, table, since)
+                except Exception as e:
+                    # Tabella assente nello schema (es. SQLite o Supabase parziale): il backup continua
+                    manifest['errors'][table] = str(e)
+                    logging.warning(f"⚠️ Backup tabella {table} non riuscito: {e}")
+
+            manifest['tombstone_cursor'], tombstones = self._dump_tombstones(directory, parent, manifest['errors'])
+            if tombstones is not None:
+                manifest['tables'][TOMBSTONES_TABLE] = tombstones
+
+            manifest['completed_at'] = datetime.now().isoformat()
+            manifest['rows'] = sum(info['rows'] for info in manifest['tables'].values())
+            # Il manifest è scritto per ultimo: una cartella senza manifest è un backup interrotto
+            _write_json_atomic(directory / MANIFEST_NAME, manifest)
+
+            logging.info(f"✅ Backup {manifest['id']}: {manifest['rows']} righe in {len(manifest['tables'])} tabelle")
+            return True, f"✅ Backup {manifest['id']} creato: {manifest['rows']} righe"
+        except Exception as e:
+            logging.error(f"❌ Errore durante il backup: {e}")
+            return False, f"❌ Errore durante il backup: {e}"
+        finally:
+            _BACKUP_LOCK.release()
+
+    def _new_directory(self, created_at: datetime, kind: str) -> Path:
+        self.backups_dir.mkdir(parents=True, exist_ok=True)
+        base = f"{created_at.strftime('%Y%m%d_%H%M%S')}_{kind}"
+        directory, suffix = self.backups_dir / base, 2
+        while directory.exists():
+            directory, suffix = self.backups_dir / f'{base}_{suffix}', suffix + 1
+        directory.mkdir()
+        return directory
+
+    def _since(self, table: str, parent: Optional[Dict[str, Any]]) -> Optional[str]:
+        """Timestamp da cui ripartire per un incrementale (None = tabella completa)"""
+        if parent is None or table not in self.incremental_tables:
+            return None
+        high_water = parent['tables'].get(table, {}).get('high_water')
+        if not high_water:
+            return None
+        # Le transazioni concorrenti possono confermare righe con timestamp appena precedenti
+        return _minus_seconds(high_water[0], self.overlap_seconds)
+
+    def _dump_table(self, directory: Path, table: str, since: Optional[str]) -> Dict[str, Any]:
+        """Scrive la tabella pagina per pagina e restituisce le informazioni per il manifest"""
+        incremental = table in self.incremental_tables
+        rows = self.supabase_manager.iter_table(
+            table,
+            order_by='data_aggiornamento' if incremental else 'id',
+            page_size=self.page_size,
+            after=(since, 0) if since is not None else None
+        )
+        info = self._write_rows(directory / f'{table}{FILE_SUFFIX}', rows,
+                                'data_aggiornamento' if incremental else None)
+        info['since'] = since
+        return info
+
+    def _dump_tombstones(self, directory: Path, parent: Optional[Dict[str, Any]],
+                         errors: Dict[str, str]) -> Tuple[Optional[int], Optional[Dict[str, Any]]]:
+        """Cursore dei tombstone; negli incrementali anche le eliminazioni avvenute dopo il backup precedente"""
+        try:
+            client = self.supabase_manager.supabase
+            if parent is None or parent.get('tombstone_cursor') is None:
+                result = client.table(TOMBSTONES_TABLE).select('id').order('id', desc=True).limit(1).execute()
+                return (result.data[0]['id'] if result.data else 0), None
+
+            rows = self.supabase_manager.iter_table(TOMBSTONES_TABLE, page_size=self.page_size,
+                                                    after=parent['tombstone_cursor'])
+            info = self._write_rows(directory / f'{TOMBSTONES_TABLE}{FILE_SUFFIX}', rows, None)
+            return info.pop('last_id') or parent['tombstone_cursor'], info
+        except Exception as e:
+            # Senza tombstone gli incrementali non registrano le eliminazioni
+            errors[TOMBSTONES_TABLE] = str(e)
+            return None, None
+
+    def _write_rows(self, path: Path, rows: Iterator[Dict[str, Any]], high_water_column: Optional[str]) -> Dict[str, Any]:
+        """NDJSON compresso con hash SHA-256; le righe arrivano in ordine crescente di cursore"""
+        count, last = 0, None
+        with gzip.open(path, 'wt', encoding='utf-8') as file:
+            for row in rows:
+                file.write(json.dumps(row, default=str, ensure_ascii=False) + '\n')
+                count, last = count + 1, row
+
+        info = {'file': path.name, 'rows': count, 'bytes': path.stat().st_size, 'sha256': _sha256(path),
+                'last_id': last['id'] if last else None, 'high_water': None}
+        if high_water_column and last is not None:
+            info['high_water'] = [str(last[high_water_column]), last['id']]
+        return info
+
+    # ---------- ripristino ----------
+
+    def restore_backup(self, backup_id: str, chunk_size: int = BULK_UPSERT_CHUNK_SIZE) -> Tuple[bool, str]:
+        """Ripristina lo stato del backup: righe reinserite (upsert per id) ed eliminazioni riapplicate
+
+        Le righe create dopo il backup non vengono rimosse.
+        """
+        if not _BACKUP_LOCK.acquire(blocking=False):
+            return False, "❌ Un backup o un ripristino è già in corso"
+        try:
+            chain = self._chain(backup_id)
+            for manifest in chain:
+                self._verify(manifest)
+
+            client = self.supabase_manager.supabase
+            restored = 0
+            # Tabelle in ordine di dipendenza; per ogni tabella i backup della catena dal completo in avanti
+            for table in self.tables:
+                for manifest in chain:
+                    if table not in manifest['tables']:
+                        continue
+                    for chunk in _chunks(self._read_rows(manifest, table), chunk_size):
+                        client.table(table).upsert(chunk, on_conflict='id').execute()
+                        restored += len(chunk)
+
+            deleted = self._apply_tombstones(chain, chunk_size)
+            self.supabase_manager.resync_mirror()
+
+            logging.info(f"✅ Ripristino {backup_id}: {restored} righe, {deleted} eliminazioni")
+            return True, f"✅ Backup {backup_id} ripristinato: {restored} righe, {deleted} eliminazioni"
+        except Exception as e:
+            logging.error(f"❌ Errore durante il ripristino del backup {backup_id}: {e}")
+            return False, f"❌ Errore durante il ripristino: {e}"
+        finally:
+            _BACKUP_LOCK.release()
+
+    def _chain(self, backup_id: str) -> List[Dict[str, Any]]:
+        """Backup completo di partenza seguito dagli incrementali fino a backup_id"""
+        by_id = {manifest['id']: manifest for manifest in self.list_backups()}
+        chain, current = [], by_id.get(backup_id)
+        if current is None:
+            raise ValueError(f"Backup {backup_id} non trovato")
+        while current is not None:
+            chain.append(current)
+            if current['type'] == 'full':
+                return list(reversed(chain))
+            current = by_id.get(current['parent'])
+        raise ValueError(f"Catena del backup {backup_id} incompleta: backup completo mancante")
+
+    def _verify(self, manifest: Dict[str, Any]):
+        """Controlla l'hash dei file prima di scrivere qualsiasi riga"""
+        for table, info in manifest['tables'].items():
+            path = self.backups_dir / manifest['id'] / info['file']
+            if not path.exists() or _sha256(path) != info['sha256']:
+                raise ValueError(f"File {info['file']} del backup {manifest['id']} mancante o corrotto")
+
+    def _read_rows(self, manifest: Dict[str, Any], table: str) -> Iterator[Dict[str, Any]]:
+        path = self.backups_dir / manifest['id'] / manifest['tables'][table]['file']
+        with gzip.open(path, 'rt', encoding='utf-8') as file:
+            for line in file:
+                yield json.loads(line)
+
+    def _apply_tombstones(self, chain: List[Dict[str, Any]], chunk_size: int) -> int:
+        """Elimina le righe cancellate dopo il backup completo (figli prima dei padri)"""
+        deleted_ids: Dict[str, List[int]] = {}
+        for manifest in chain:
+            if TOMBSTONES_TABLE in manifest['tables']:
+                for tombstone in self._read_rows(manifest, TOMBSTONES_TABLE):
+                    deleted_ids.setdefault(tombstone['table_name'], []).append(tombstone['row_id'])
+
+        client = self.supabase_manager.supabase
+        deleted = 0
+        for table in reversed(self.tables):
+            for chunk in _chunks(iter(deleted_ids.get(table, [])), chunk_size):
+                client.table(table).delete().in_('id', chunk).execute()
+                deleted += len(chunk)
+        return deleted
+
+    # ---------- retention ----------
+
+    def prune_backups(self, now: Optional[datetime] = None) -> Tuple[int, List[str]]:
+        """Elimina i backup più vecchi della retention, tranne quelli da cui dipendono backup conservati"""
+        if not _BACKUP_LOCK.acquire(blocking=False):
+            return 0, []
+        try:
+            cutoff = (now or datetime.now()) - timedelta(days=self.retention_days)
+            backups = self.list_backups()
+            by_id = {manifest['id']: manifest for manifest in backups}
+
+            keep = {manifest['id'] for manifest in backups if datetime.fromisoformat(manifest['created_at']) >= cutoff}
+            # L'ultima catena resta sempre ripristinabile, anche se più vecchia della retention
+            if backups:
+                keep.add(backups[-1]['id'])
+            for backup_id in list(keep):
+                parent = by_id[backup_id]['parent']
+                while parent and parent in by_id and parent not in keep:
+                    keep.add(parent)
+                    parent = by_id[parent]['parent']
+
+            removed = []
+            for directory in self.backups_dir.glob('*') if self.backups_dir.exists() else []:
+                # Cartelle senza manifest: backup interrotti (il lock esclude quelli in corso)
+                if directory.is_dir() and directory.name not in keep:
+                    shutil.rmtree(directory, ignore_errors=True)
+                    removed.append(directory.name)
+
+            if removed:
+                logging.info(f"✅ Retention backup: eliminati {len(removed)} backup più vecchi di {self.retention_days} giorni")
+            return len(removed), removed
+        finally:
+            _BACKUP_LOCK.release()
+
+def _chunks(rows: Iterator[Any], size: int) -> Iterator[List[Any]]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _write_json_atomic(path: Path, data: Dict[str, Any]):
+    tmp_path = path.with_suffix('.tmp')
+    tmp_path.write_text(json.dumps(data, indent=2, default=str), encoding='utf-8')
+    os.replace(tmp_path, path)
+
+def _minus_seconds(timestamp: str, seconds: float) -> str:
+    """Sottrae secondi da un timestamp ISO (invariato se non interpretabile)"""
+    try:
+        return (datetime.fromisoformat(timestamp) - timedelta(seconds=seconds)).isoformat()
+    except ValueError:
+        return timestamp
@@ -0,0 +1,59 @@
+"""
+Confronto tra righe originali e righe restituite da una griglia editabile, e paginazione delle griglie
+Le modifiche si ricavano dal diff per id: nessuno stato per singola cella tra un rerun e l'altro
+Creato da Ezio Camporeale
+"""
+
+import math
+from typing import Any, Dict, Iterable, List, Tuple
+
+def _scalar(value: Any) -> Any:
+    """Scalari numpy/pandas (int64, float64, bool_) come tipi Python, NaN come None"""
+    if hasattr(value, 'item') and not isinstance(value, (str, bytes)):
+        try:
+            value = value.item()
+        except (TypeError, ValueError):
+            pass
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+def normalize_cell(value: Any) -> Any:
+    """Valore confrontabile: None, NaN e stringa vuota coincidono, i numeri diventano float"""
+    value = _scalar(value)
+    if value is None or value == '':
+        return ''
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    return value
+
+def diff_rows(original: Iterable[Dict[str, Any]], edited: Iterable[Dict[str, Any]],
+              fields: Iterable[str], key: str = 'id') -> Dict[Any, Dict[str, Any]]:
+    """Campi modificati per id: {id: {campo: nuovo valore}} (le righe senza modifiche non compaiono)"""
+    fields = list(fields)
+    originals = {_scalar(row[key]): row for row in original}
+    changes: Dict[Any, Dict[str, Any]] = {}
+    for row in edited:
+        record_id = _scalar(row.get(key))
+        before = originals.get(record_id)
+        if before is None:
+            continue
+        changed = {field: _scalar(row.get(field)) for field in fields
+                   if field in row and normalize_cell(row.get(field)) != normalize_cell(before.get(field))}
+        if changed:
+            changes[record_id] = changed
+    return changes
+
+def apply_changes(rows: Iterable[Dict[str, Any]], changes: Dict[Any, Dict[str, Any]],
+                  key: str = 'id') -> List[Dict[str, Any]]:
+    """Copie delle righe con le modifiche in attesa applicate (le righe originali non cambiano)"""
+    return [{**row, **changes[row[key]]} if row[key] in changes else row for row in rows]
+
+def page_bounds(total: int, page: int, page_size: int) -> Tuple[int, int, int]:
+    """(inizio, fine, numero di pagine) della pagina richiesta, con la pagina riportata nell'intervallo valido"""
+    if page_size <= 0:
+        return 0, total, 1
+    pages = max(1, math.ceil(total / page_size))
+    page = min(max(page, 1), pages)
+    start = (page - 1) * page_size
+    return start, min(start + page_size, total), pages
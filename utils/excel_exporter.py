@@ -0,0 +1,139 @@
+"""
+Esportazione Excel dei gruppi PAMM e dei loro clienti, un foglio per gruppo
+Scrive con xlsxwriter in modalità constant_memory leggendo i clienti a pagine: né DataFrame né workbook in RAM
+Creato da Ezio Camporeale
+"""
+
+import re
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import xlsxwriter
+from config import (
+    EXPORT_PAGE_SIZE, COMMISSIONI_STANDARD, GRUPPI_PAMM_STATO_PROP_COLORS,
+    GRUPPI_PAMM_DEPOSITO_COLORS, GRUPPI_PAMM_COMMISSIONI_COLORS
+)
+from utils.excel_importer import EXCEL_COLUMN_MAP
+
+# Colonne lette dal database: le 14 dell'Excel più lo stato prop che colora il nome del cliente
+EXPORT_COLUMNS = [*EXCEL_COLUMN_MAP.values(), 'stato_prop']
+
+COLUMN_WIDTHS = {
+    'nome_cliente': 32, 'deposito_pamm': 14, 'fase_prop': 14, 'operazione_numero': 14,
+    'esito_broker': 18, 'esito_prop': 18, 'credenziali_broker': 22, 'credenziali_prop': 28,
+    'chi_ha_comprato_prop': 22
+}
+DEFAULT_COLUMN_WIDTH = 12
+
+MONEY_FIELDS = ('prelievo_prop', 'prelievo_profit')
+INVALID_SHEET_CHARS = r'[\[\]:*?/\\]'
+SHEET_NAME_MAX_LENGTH = 31
+
+@dataclass
+class ExportReport:
+    """Esito di un'esportazione"""
+    sheets: int = 0
+    rows: int = 0
+    errors: List[str] = field(default_factory=list)
+
+def sheet_title(nome_gruppo: str, used: set) -> str:
+    """Nome di foglio valido per Excel (31 caratteri, senza []:*?/\\) e univoco nel workbook"""
+    base = re.sub(INVALID_SHEET_CHARS, '_', nome_gruppo or 'Gruppo').strip("' ") or 'Gruppo'
+    title = base[:SHEET_NAME_MAX_LENGTH]
+    suffix = 2
+    while title.casefold() in used:
+        tail = f' ({suffix})'
+        title = base[:SHEET_NAME_MAX_LENGTH - len(tail)] + tail
+        suffix += 1
+    used.add(title.casefold())
+    return title
+
+class ExcelExporter:
+    """Esporta gruppi e clienti nel layout a 14 colonne della tabella editabile"""
+
+    def __init__(self, supabase_manager, page_size: int = EXPORT_PAGE_SIZE):
+        self.supabase_manager = supabase_manager
+        self.page_size = page_size
+
+    def export_workbook(self, target, gruppi: Optional[Iterable[Dict[str, Any]]] = None) -> ExportReport:
+        """Scrive il workbook su target (percorso o file binario); gruppi di default: tutti"""
+        report = ExportReport()
+        workbook = xlsxwriter.Workbook(target, {'constant_memory': True})
+        formats = _FormatCache(workbook)
+        used_titles: set = set()
+        try:
+            if gruppi is None:
+                gruppi = self.supabase_manager.iter_gruppi_pamm_gruppi(page_size=self.page_size)
+            for gruppo in gruppi:
+                worksheet = workbook.add_worksheet(sheet_title(gruppo.get('nome_gruppo'), used_titles))
+                clienti = self.supabase_manager.iter_clienti_gruppi(
+                    gruppo_id=gruppo['id'], page_size=self.page_size, columns=EXPORT_COLUMNS
+                )
+                report.rows += self._write_sheet(worksheet, formats, clienti)
+                report.sheets += 1
+        except Exception as e:
+            logging.error(f"❌ Errore esportazione Excel: {e}")
+            report.errors.append(str(e))
+        finally:
+            workbook.close()
+
+        logging.info(f"✅ Esportazione Excel: {report.sheets} fogli, {report.rows} clienti")
+        return report
+
+    def _write_sheet(self, worksheet, formats: '_FormatCache', clienti: Iterable[Dict[str, Any]]) -> int:
+        """Scrive intestazione e righe in ordine (in constant_memory ogni riga è scaricata su disco)"""
+        fields = list(EXCEL_COLUMN_MAP.values())
+        for col, field_name in enumerate(fields):
+            worksheet.set_column(col, col, COLUMN_WIDTHS.get(field_name, DEFAULT_COLUMN_WIDTH))
+        worksheet.freeze_panes(1, 1)
+        worksheet.write_row(0, 0, list(EXCEL_COLUMN_MAP.keys()), formats.get('header'))
+
+        rows = 0
+        for rows, cliente in enumerate(clienti, start=1):
+            for col, field_name in enumerate(fields):
+                value = cliente.get(field_name)
+                cell_format = formats.get(*cell_style(field_name, value, cliente))
+                if value is None or value == '':
+                    worksheet.write_blank(rows, col, None, cell_format)
+                else:
+                    worksheet.write(rows, col, value, cell_format)
+        if rows:
+            worksheet.autofilter(0, 0, rows, len(fields) - 1)
+        return rows
+
+def cell_style(field_name: str, value: Any, cliente: Dict[str, Any]) -> Tuple[str, ...]:
+    """Stile della cella: stessi colori condizionali di GruppiPAMMTable"""
+    colors = None
+    if field_name == 'nome_cliente':
+        colors = GRUPPI_PAMM_STATO_PROP_COLORS.get(cliente.get('stato_prop'))
+    elif field_name == 'deposito_pamm':
+        colors = GRUPPI_PAMM_DEPOSITO_COLORS.get(value, GRUPPI_PAMM_DEPOSITO_COLORS['default'])
+    elif field_name == 'commissioni_percentuale':
+        try:
+            standard = float(value if value is not None else COMMISSIONI_STANDARD) == COMMISSIONI_STANDARD
+            colors = GRUPPI_PAMM_COMMISSIONI_COLORS['standard' if standard else 'custom']
+        except (TypeError, ValueError):
+            colors = None
+
+    number = 'money' if field_name in MONEY_FIELDS else ''
+    return ('cell', number, *(colors or ('', '')))
+
+class _FormatCache:
+    """Un solo Format per combinazione di stile: xlsxwriter non deduplica i formati creati"""
+
+    def __init__(self, workbook):
+        self._workbook = workbook
+        self._formats: Dict[Tuple[str, ...], Any] = {}
+
+    def get(self, kind: str, number: str = '', background: str = '', color: str = ''):
+        key = (kind, number, background, color)
+        if key not in self._formats:
+            properties: Dict[str, Any] = {'border': 1}
+            if kind == 'header':
+                properties.update({'bold': True, 'bg_color': '#D9D9D9', 'text_wrap': True, 'valign': 'top'})
+            if number == 'money':
+                properties['num_format'] = '€ #,##0.00'
+            if background:
+                properties.update({'bg_color': background, 'font_color': color})
+            self._formats[key] = self._workbook.add_format(properties)
+        return self._formats[key]
@@ -0,0 +1,196 @@
+"""
+Importazione in streaming del foglio Excel "gruppi DEF" nei clienti dei gruppi PAMM
+Legge con openpyxl in sola lettura a blocchi di righe: la memoria resta costante anche su fogli grandi
+Creato da Ezio Camporeale
+"""
+
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import pandas as pd
+from openpyxl import load_workbook
+from config import BULK_UPSERT_CHUNK_SIZE
+from models import DepositoPAMM
+
+# Intestazioni del foglio -> campi di clienti_gruppi_pamm (stesse 14 colonne di test_excel_columns.py)
+EXCEL_COLUMN_MAP = {
+    "Cliente": "nome_cliente",
+    "Deposito Pamm": "deposito_pamm",
+    "Quota Prop": "quota_prop",
+    "Ciclo #": "ciclo_numero",
+    "Fase Prop": "fase_prop",
+    "Operazione #": "operazione_numero",
+    "ESITO BROKER": "esito_broker",
+    "ESITO PROP": "esito_prop",
+    "Prelievo prop": "prelievo_prop",
+    "Prelievo profit": "prelievo_profit",
+    "Commissioni 25%": "commissioni_percentuale",
+    "Credenziali Broker": "credenziali_broker",
+    "Credenziali PROP (MAI ACCESSI)": "credenziali_prop",
+    "CHI HA COMPRATO PROP": "chi_ha_comprato_prop"
+}
+
+INTEGER_FIELDS = ('quota_prop', 'ciclo_numero')
+FLOAT_FIELDS = ('prelievo_prop', 'prelievo_profit', 'commissioni_percentuale')
+TEXT_FIELDS = tuple(f for f in EXCEL_COLUMN_MAP.values() if f not in INTEGER_FIELDS + FLOAT_FIELDS)
+
+# Importo tra parentesi quadre o tonde alla fine del nome: "MANUEL CARINI [4000]", "LUIGI GUGLIELMELLI (2404)"
+IMPORTO_PATTERN = r'[\[\(]\s*([\d.,]+)\s*[\]\)]\s*$'
+HEADER_SCAN_ROWS = 20  # Righe esaminate per trovare l'intestazione
+
+@dataclass
+class ImportReport:
+    """Esito di un'importazione"""
+    rows_read: int = 0
+    rows_valid: int = 0
+    rows_saved: int = 0
+    rows_skipped: int = 0
+    errors: List[str] = field(default_factory=list)
+
+    @property
+    def success(self) -> bool:
+        return not self.errors and self.rows_valid > 0
+
+def normalize_header(value: Any) -> str:
+    """Intestazione confrontabile: spazi compressi e maiuscole ignorate"""
+    return ' '.join(str(value).split()).casefold() if value is not None else ''
+
+_HEADER_LOOKUP = {normalize_header(header): field_name for header, field_name in EXCEL_COLUMN_MAP.items()}
+
+def parse_clienti_chunk(df: pd.DataFrame) -> pd.DataFrame:
+    """Converte un blocco di righe grezze in colonne tipizzate (operazioni vettoriali sull'intero blocco)"""
+    df = df.copy()
+    for column in EXCEL_COLUMN_MAP.values():
+        if column not in df:
+            df[column] = None
+
+    names = df['nome_cliente'].astype('string').str.split().str.join(' ')
+    df['nome_cliente'] = names
+
+    # "4.000", "4,000" e "1.500,50": separatori delle migliaia rimossi, virgola decimale normalizzata
+    importo = names.str.extract(IMPORTO_PATTERN, expand=False)
+    importo = importo.str.replace(r'[.,](?=\d{3}(?:\D|$))', '', regex=True).str.replace(',', '.', regex=False)
+    df['importo_cliente'] = pd.to_numeric(importo, errors='coerce').fillna(0.0)
+
+    for column in INTEGER_FIELDS + FLOAT_FIELDS:
+        raw = df[column].astype('string').str.strip().str.rstrip('%').str.replace(',', '.', regex=False)
+        df[f'_{column}_raw'] = raw
+        df[column] = pd.to_numeric(raw, errors='coerce')
+
+    for column in TEXT_FIELDS:
+        if column != 'nome_cliente':
+            df[column] = df[column].astype('string').str.strip().fillna('')
+
+    deposito = df['deposito_pamm'].str.casefold()
+    df['deposito_pamm'] = deposito.map({'depositata': DepositoPAMM.DEPOSITATA.value, '': DepositoPAMM.NON_DEPOSITATA.value})
+    return df
+
+def validate_clienti_chunk(df: pd.DataFrame, gruppo_id: int) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """Separa le righe valide (record pronti per l'upsert) dagli errori con il numero di riga Excel"""
+    invalid = pd.Series('', index=df.index, dtype='string')
+
+    invalid = invalid.mask(df['nome_cliente'].fillna('') == '', 'nome cliente mancante')
+    for column in INTEGER_FIELDS + FLOAT_FIELDS:
+        raw = df[f'_{column}_raw']
+        bad_number = (raw.fillna('') != '') & df[column].isna()
+        invalid = invalid.mask((invalid == '') & bad_number, f'{column} non numerico')
+    invalid = invalid.mask((invalid == '') & df['deposito_pamm'].isna(), 'deposito_pamm deve essere "Depositata" o vuoto')
+
+    errors = [f"Riga {row}: {message} ({name})" for row, message, name in
+              zip(df['_excel_row'][invalid != ''], invalid[invalid != ''], df['nome_cliente'][invalid != ''].fillna(''))]
+
+    valid = df[invalid == ''].drop_duplicates('nome_cliente', keep='last')
+    duplicates = int((invalid == '').sum()) - len(valid)
+    if duplicates:
+        errors.append(f"{duplicates} righe duplicate nel blocco: mantenuta l'ultima occorrenza")
+
+    valid = valid.assign(
+        gruppo_pamm_id=gruppo_id,
+        quota_prop=valid['quota_prop'].fillna(1).astype(int),
+        ciclo_numero=valid['ciclo_numero'].fillna(0).astype(int),
+        prelievo_prop=valid['prelievo_prop'].fillna(0.0),
+        prelievo_profit=valid['prelievo_profit'].fillna(0.0),
+        commissioni_percentuale=valid['commissioni_percentuale'].fillna(25.0),
+    )
+    columns = ['gruppo_pamm_id', 'importo_cliente', *EXCEL_COLUMN_MAP.values()]
+    records = valid[columns].astype(object).where(valid[columns].notna(), None).to_dict('records')
+    return records, errors
+
+class ExcelImporter:
+    """Importa un foglio del workbook nei clienti di un gruppo PAMM con upsert a blocchi"""
+
+    def __init__(self, supabase_manager, chunk_size: int = BULK_UPSERT_CHUNK_SIZE):
+        self.supabase_manager = supabase_manager
+        self.chunk_size = chunk_size
+
+    @staticmethod
+    def sheet_names(source) -> List[str]:
+        """Nomi dei fogli del workbook"""
+        workbook = load_workbook(source, read_only=True, data_only=True)
+        try:
+            return list(workbook.sheetnames)
+        finally:
+            workbook.close()
+            _rewind(source)
+
+    def iter_chunks(self, source, sheet_name: Optional[str] = None) -> Iterator[pd.DataFrame]:
+        """Blocchi di righe del foglio come DataFrame grezzi (colonna _excel_row = numero di riga)"""
+        _rewind(source)
+        workbook = load_workbook(source, read_only=True, data_only=True)
+        try:
+            sheet = workbook[sheet_name] if sheet_name else workbook.active
+            rows = sheet.iter_rows(values_only=True)
+
+            header_map, header_row = None, 0
+            for header_row, values in enumerate(rows, start=1):
+                header_map = {i: _HEADER_LOOKUP[normalize_header(v)] for i, v in enumerate(values)
+                              if normalize_header(v) in _HEADER_LOOKUP}
+                if 'nome_cliente' in header_map.values() or header_row >= HEADER_SCAN_ROWS:
+                    break
+            if not header_map or 'nome_cliente' not in header_map.values():
+                raise ValueError(f"Intestazione 'Cliente' non trovata nelle prime {HEADER_SCAN_ROWS} righe")
+
+            buffer: List[Dict[str, Any]] = []
+            for excel_row, values in enumerate(rows, start=header_row + 1):
+                if not any(v not in (None, '') for v in values):
+                    continue
+                record = {name: values[i] if i < len(values) else None for i, name in header_map.items()}
+                record['_excel_row'] = excel_row
+                buffer.append(record)
+                if len(buffer) >= self.chunk_size:
+                    yield pd.DataFrame(buffer)
+                    buffer = []
+            if buffer:
+                yield pd.DataFrame(buffer)
+        finally:
+            workbook.close()
+
+    def import_workbook(self, source, gruppo_id: int, sheet_name: Optional[str] = None,
+                        dry_run: bool = False, aggiornato_da: Optional[str] = None) -> ImportReport:
+        """Legge, valida e salva il foglio (aggiornato_da = autore dell'importazione); con dry_run valida soltanto"""
+        report = ImportReport()
+        try:
+            for chunk in self.iter_chunks(source, sheet_name):
+                report.rows_read += len(chunk)
+                records, errors = validate_clienti_chunk(parse_clienti_chunk(chunk), gruppo_id)
+                report.errors.extend(errors)
+                report.rows_valid += len(records)
+                report.rows_skipped += len(chunk) - len(records)
+
+                if records and not dry_run:
+                    saved, save_errors = self.supabase_manager.import_clienti_gruppi_pamm(
+                        records, self.chunk_size, aggiornato_da=aggiornato_da
+                    )
+                    report.rows_saved += saved
+                    report.errors.extend(save_errors)
+        except Exception as e:
+            logging.error(f"❌ Errore importazione Excel: {e}")
+            report.errors.append(f"Errore lettura file: {e}")
+
+        logging.info(f"✅ Importazione Excel: {report.rows_saved}/{report.rows_read} righe salvate, {len(report.errors)} errori")
+        return report
+
+def _rewind(source):
+    """Riporta all'inizio i file caricati (UploadedFile/BytesIO) dopo una lettura"""
+    if hasattr(source, 'seek'):
+        source.seek(0)
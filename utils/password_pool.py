@@ -0,0 +1,190 @@
+"""
+Pool limitato per hash e verifica delle password e limitatore dei tentativi di login
+bcrypt rilascia il GIL: un pool di thread separato lo esegue in parallelo senza bloccare i rerun
+Creato da Ezio Camporeale
+"""
+
+import os
+import time
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Deque, Dict, Optional
+from config import (
+    PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_QUEUE, PASSWORD_HASH_TIMEOUT,
+    LOGIN_MAX_ATTEMPTS, LOGIN_ATTEMPT_WINDOW_SECONDS, LOGIN_LOCKOUT_SECONDS
+)
+
+class PasswordPoolBusy(Exception):
+    """Troppe operazioni sulle password in coda, o risultato non arrivato entro il timeout"""
+
+class PasswordWorkerPool:
+    """Esegue il lavoro CPU-bound sulle password con al massimo max_workers thread e max_queue richieste in attesa"""
+
+    def __init__(self, max_workers: Optional[int] = None, max_queue: int = 64, timeout: float = 30.0):
+        self.max_workers = max_workers or os.cpu_count() or 2
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='password-worker')
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._stats = {'completed': 0, 'rejected': 0, 'errors': 0, 'timeouts': 0, 'max_queue_depth': 0,
+                       'wait_ms': 0.0, 'run_ms': 0.0}
+
+    def run(self, fn: Callable[..., Any], *args) -> Any:
+        """Esegue fn(*args) nel pool e ne attende il risultato (PasswordPoolBusy se la coda è piena o in timeout)"""
+        with self._lock:
+            if self._queued >= self.max_queue:
+                self._stats['rejected'] += 1
+                raise PasswordPoolBusy(f"{self._queued} operazioni sulle password in coda")
+            self._queued += 1
+            self._stats['max_queue_depth'] = max(self._stats['max_queue_depth'], self._queued)
+        submitted = time.perf_counter()
+
+        def task():
+            started = time.perf_counter()
+            with self._lock:
+                self._queued -= 1
+                self._running += 1
+                self._stats['wait_ms'] += (started - submitted) * 1000
+            try:
+                return fn(*args)
+            except Exception:
+                with self._lock:
+                    self._stats['errors'] += 1
+                raise
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    self._stats['completed'] += 1
+                    self._stats['run_ms'] += (time.perf_counter() - started) * 1000
+
+        try:
+            future = self._executor.submit(task)
+        except RuntimeError:
+            with self._lock:
+                self._queued -= 1
+            raise
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            if future.done():
+                raise
+            # Pool saturo: come per la coda piena, non è un esito della verifica
+            with self._lock:
+                self._stats['timeouts'] += 1
+            raise PasswordPoolBusy(f"Nessun risultato entro {self.timeout:g}s")
+
+    def queue_depth(self) -> int:
+        """Operazioni in attesa di un worker"""
+        with self._lock:
+            return self._queued
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Profondità della coda, operazioni in corso e tempi medi di attesa ed esecuzione"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['queue_depth'] = self._queued
+            stats['running'] = self._running
+        completed = stats['completed']
+        stats['avg_wait_ms'] = round(stats.pop('wait_ms') / completed, 2) if completed else 0.0
+        stats['avg_run_ms'] = round(stats.pop('run_ms') / completed, 2) if completed else 0.0
+        stats['max_workers'] = self.max_workers
+        stats['max_queue'] = self.max_queue
+        return stats
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+class LoginAttemptLimiter:
+    """Blocca un username per lockout_seconds dopo max_attempts fallimenti in window_seconds"""
+
+    def __init__(self, max_attempts: int = 5, window_seconds: float = 300.0, lockout_seconds: float = 300.0):
+        self.max_attempts = max_attempts
+        self.window_seconds = window_seconds
+        self.lockout_seconds = lockout_seconds
+        self._failures: Dict[str, Deque[float]] = {}
+        self._locked_until: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._stats = {'blocked': 0, 'lockouts': 0}
+
+    @staticmethod
+    def _key(username: str) -> str:
+        return (username or '').strip().lower()
+
+    def retry_after(self, username: str, now: Optional[float] = None) -> float:
+        """Secondi prima del prossimo tentativo consentito (0 se consentito)"""
+        now = time.monotonic() if now is None else now
+        key = self._key(username)
+        with self._lock:
+            locked_until = self._locked_until.get(key, 0.0)
+            if locked_until > now:
+                return locked_until - now
+            self._locked_until.pop(key, None)
+            return 0.0
+
+    def check(self, username: str, now: Optional[float] = None) -> float:
+        """Come retry_after, ma conta i tentativi bloccati"""
+        wait = self.retry_after(username, now)
+        if wait:
+            with self._lock:
+                self._stats['blocked'] += 1
+        return wait
+
+    def record_failure(self, username: str, now: Optional[float] = None):
+        """Registra un tentativo fallito; al max_attempts-esimo nella finestra blocca l'username"""
+        now = time.monotonic() if now is None else now
+        key = self._key(username)
+        with self._lock:
+            failures = self._failures.setdefault(key, deque())
+            failures.append(now)
+            while failures and failures[0] <= now - self.window_seconds:
+                failures.popleft()
+            if len(failures) >= self.max_attempts:
+                self._locked_until[key] = now + self.lockout_seconds
+                self._stats['lockouts'] += 1
+                failures.clear()
+                logging.warning(f"⚠️ Username {key} bloccato per {self.lockout_seconds:.0f}s dopo {self.max_attempts} tentativi falliti")
+            # Le voci vuote non restano in memoria
+            if not failures:
+                del self._failures[key]
+
+    def record_success(self, username: str):
+        """Azzera i fallimenti dopo un login riuscito"""
+        key = self._key(username)
+        with self._lock:
+            self._failures.pop(key, None)
+            self._locked_until.pop(key, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Username bloccati e tentativi respinti"""
+        now = time.monotonic()
+        with self._lock:
+            stats = dict(self._stats)
+            stats['locked_users'] = sum(1 for until in self._locked_until.values() if until > now)
+            stats['tracked_users'] = len(self._failures)
+        return stats
+
+_shared_lock = threading.Lock()
+_shared_pool: Optional[PasswordWorkerPool] = None
+_shared_limiter: Optional[LoginAttemptLimiter] = None
+
+def get_password_pool() -> PasswordWorkerPool:
+    """Pool condiviso da tutte le sessioni del processo"""
+    global _shared_pool
+    if _shared_pool is None:
+        with _shared_lock:
+            if _shared_pool is None:
+                _shared_pool = PasswordWorkerPool(PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_QUEUE, PASSWORD_HASH_TIMEOUT)
+    return _shared_pool
+
+def get_login_limiter() -> LoginAttemptLimiter:
+    """Limitatore condiviso da tutte le sessioni del processo"""
+    global _shared_limiter
+    if _shared_limiter is None:
+        with _shared_lock:
+            if _shared_limiter is None:
+                _shared_limiter = LoginAttemptLimiter(LOGIN_MAX_ATTEMPTS, LOGIN_ATTEMPT_WINDOW_SECONDS, LOGIN_LOCKOUT_SECONDS)
+    return _shared_limiter